@@ -0,0 +1,43 @@
+"""Measures the per-call cost of `colored()` (every message of a verbose build
+goes through it), with a cached style.
+
+```sh
+python benchmarks/colors.py
+python benchmarks/colors.py --calls 1000000
+```
+
+Exits with status `1` if a call takes more than `TARGET_US`, which only
+happens if styles are computed again on every call.
+"""
+
+import os
+import sys
+from argparse import ArgumentParser
+from timeit import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from maketree.terminal_colors import colored  # noqa: E402
+
+# Target per call (in microseconds)
+TARGET_US = 20.0
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100_000, help="calls to time")
+    args = parser.parse_args()
+
+    seconds = timeit(
+        lambda: colored("src/", "light_green", attrs=["italic", "bold"]),
+        number=args.calls,
+    )
+    per_call = seconds / args.calls * 1e6
+    print("colored(): %.2f us per call (target: %.0f us)" % (per_call, TARGET_US))
+    if per_call > TARGET_US:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Times every phase of maketree on synthetic trees, and writes the results as JSON.
+
+```sh
+python benchmarks/phases.py                                  # All shapes, 10^3..10^5
+python benchmarks/phases.py --shapes deep --sizes 1000000 --runs 1
+python benchmarks/phases.py -o results/$(git rev-parse --short HEAD).json
+```
+
+Phases, in the order a build & extraction runs them: `parse`, `validate`,
+`normalize`, `pipeline` (the three above, fused, as the CLI runs them),
+`existing` (`get_existing_paths`), `build` (`TreeBuilder`), `extract`,
+`write` (`TreeWriter`) and `print_tree`. Every phase but `build` is run
+`--runs` times and the best time is kept. Trees are built in a temporary
+directory (in `--tmp`, if given), so `build` & `extract` also measure
+that filesystem.
+
+The summary goes to stderr, JSON to stdout (or `--output`).
+"""
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from io import StringIO
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.trees import SHAPES, write as write_tree  # noqa: E402
+from maketree.cli import VERSION  # noqa: E402
+from maketree.console import Console  # noqa: E402
+from maketree.core.extractor import Extractor  # noqa: E402
+from maketree.core.normalizer import Normalizer  # noqa: E402
+from maketree.core.parser import Parser  # noqa: E402
+from maketree.core.pipeline import Pipeline  # noqa: E402
+from maketree.core.tree_builder import TreeBuilder  # noqa: E402
+from maketree.core.tree_writer import TreeWriter  # noqa: E402
+from maketree.core.validator import Validator, check_name  # noqa: E402
+from maketree.utils import get_existing_paths, print_tree  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+# Version of the JSON layout below
+RESULTS_VERSION = 1
+
+
+def timed(function: Callable[[], Any], runs: int) -> Tuple[float, Any]:
+    """Call `function` `runs` times. Returns the best time (in seconds)
+    and the result of the last call."""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def bench(shape: str, entries: int, runs: int, tmp: str) -> Dict[str, Dict]:
+    """Time every phase on a `shape` tree of `entries` entries. Returns
+    `{PHASE: {"seconds": ..., "entries": ..., "per_second": ...}}`."""
+    console = Console(verbose=False, no_color=True, stream=StringIO())
+    workdir = tempfile.mkdtemp(prefix="maketree-bench-", dir=tmp)
+    try:
+        treefile = os.path.join(workdir, "%s.tree" % shape)
+        write_tree(shape, entries, treefile)
+        dst = os.path.join(workdir, "dst")
+        os.mkdir(dst)
+
+        results = {}
+
+        def record(phase: str, seconds: float, count: int):
+            results[phase] = {
+                "seconds": round(seconds, 6),
+                "entries": count,
+                "per_second": round(count / seconds) if seconds else None,
+            }
+
+        seconds, tree = timed(lambda: Parser.parse_file(treefile), runs)
+        record("parse", seconds, entries)
+
+        # Names are cached while validating, every run starts cold
+        def validate():
+            check_name.cache_clear()
+            Validator.validate(tree, console, root=dst)
+
+        seconds, _ = timed(validate, runs)
+        record("validate", seconds, entries)
+
+        seconds, paths = timed(lambda: Normalizer.normalize(tree, dst), runs)
+        count = len(paths["directories"]) + len(paths["files"])
+        record("normalize", seconds, count)
+
+        def pipeline():
+            check_name.cache_clear()
+            Pipeline.run(treefile, dst, console)
+
+        seconds, _ = timed(pipeline, runs)
+        record("pipeline", seconds, entries)
+
+        seconds, _ = timed(lambda: get_existing_paths(paths["files"]), runs)
+        record("existing", seconds, len(paths["files"]))
+
+        # Only once, it creates the tree
+        seconds, _ = timed(lambda: TreeBuilder.build(paths, console), 1)
+        record("build", seconds, count)
+
+        seconds, extracted = timed(lambda: Extractor.extract(Path(dst)), runs)
+        record("extract", seconds, len(extracted))
+
+        outfile = os.path.join(workdir, "extracted.tree")
+        seconds, _ = timed(lambda: TreeWriter.write_file(extracted, outfile), runs)
+        record("write", seconds, len(extracted))
+
+        def render():
+            console.stream = StringIO()
+            print_tree(tree, console, dst)
+
+        seconds, _ = timed(render, runs)
+        record("print_tree", seconds, entries)
+
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def metadata() -> Dict[str, Any]:
+    """Where & when the results were measured."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+
+    return {
+        "version": RESULTS_VERSION,
+        "maketree": VERSION,
+        "commit": commit or None,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+    }
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--shapes",
+        nargs="+",
+        choices=sorted(SHAPES),
+        default=list(SHAPES),
+        help="shapes of trees (default: all)",
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=DEFAULT_SIZES,
+        help="numbers of entries (default: %s)" % " ".join(map(str, DEFAULT_SIZES)),
+    )
+    parser.add_argument("--runs", type=int, default=3, help="runs per phase")
+    parser.add_argument("--tmp", default=None, help="where to build the trees")
+    parser.add_argument("-o", "--output", help="write the JSON into this file")
+    args = parser.parse_args()
+
+    benchmarks: List[Dict[str, Any]] = []
+    for shape in args.shapes:
+        for entries in args.sizes:
+            phases = bench(shape, entries, args.runs, args.tmp)
+            benchmarks.append({"shape": shape, "entries": entries, "phases": phases})
+
+            print("%s, %d entries:" % (shape, entries), file=sys.stderr)
+            for phase, result in phases.items():
+                print(
+                    "  %-10s %10.2f ms  %12s entries/s"
+                    % (phase, result["seconds"] * 1000, result["per_second"]),
+                    file=sys.stderr,
+                )
+
+    results = {**metadata(), "benchmarks": benchmarks}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Measures how long maketree takes to start (import time of the CLI).
+
+maketree is often run thousands of times from scripts, so startup matters more
+than usual. `maketree.cli` only imports what every run needs, everything else
+is imported where it's used (see the NOTE in `maketree/cli.py`).
+
+```sh
+python benchmarks/startup.py           # Summary & slowest imports
+python benchmarks/startup.py --runs 20
+```
+
+Exits with status `1` if the median import time is above `TARGET_MS`.
+"""
+
+import os
+import subprocess
+import sys
+from argparse import ArgumentParser
+from statistics import median
+from typing import List, Tuple
+
+# Target for `import maketree.cli` (median, in milliseconds)
+TARGET_MS = 25.0
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module: str) -> List[Tuple[str, int, int]]:
+    """Import `module` in a fresh interpreter with `-X importtime`, and return
+    `(MODULE, SELF_US, CUMULATIVE_US)` for every module it imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import %s" % module],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        times.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    return times
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="number of runs")
+    parser.add_argument("--module", default="maketree.cli", help="module to import")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to show")
+    args = parser.parse_args()
+
+    totals = []
+    slowest = {}  # MODULE: SELF_US (of the last run)
+    for _ in range(args.runs):
+        times = import_times(args.module)
+        totals.append(next(cum for name, _, cum in times if name == args.module))
+        slowest = {name: self_us for name, self_us, _ in times}
+
+    total_ms = median(totals) / 1000
+    print("import %s: %.1f ms (median of %d runs)" % (args.module, total_ms, args.runs))
+    print("target: %.1f ms\n" % TARGET_MS)
+
+    print("slowest imports (self time):")
+    ranked = sorted(slowest.items(), key=lambda item: item[1], reverse=True)
+    for name, self_us in ranked[: args.top]:
+        print("  %7.2f ms  %s" % (self_us / 1000, name))
+
+    if total_ms > TARGET_MS:
+        print("\nslower than the target!")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
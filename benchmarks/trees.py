@@ -0,0 +1,124 @@
+"""Generates synthetic `.tree` files of a given shape & size, for benchmarks.
+
+```sh
+python benchmarks/trees.py balanced 100000 > big.tree
+python benchmarks/trees.py enterprise 1000000 | maketree - big/ -cd -nC
+```
+
+Shapes:
+- `wide`: every file in one directory (one huge listing)
+- `deep`: chains of `DEEP_DEPTH` nested directories (long paths)
+- `balanced`: `FANOUT` files & `FANOUT` subdirectories in every directory,
+  as many levels as needed
+- `enterprise`: `examples/enterprise.tree`, repeated per team & division
+"""
+
+import os
+import sys
+from argparse import ArgumentParser
+from itertools import islice
+from typing import Callable, Dict, Iterator, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE = os.path.join(ROOT, "examples", "enterprise.tree")
+
+INDENT = "    "
+FANOUT = 10
+DEEP_DEPTH = 40
+
+
+def wide(entries: int) -> Iterator[str]:
+    """One directory, with all the files."""
+    yield "files/"
+    for f in range(entries - 1):
+        yield "%sfile_%d.txt" % (INDENT, f)
+
+
+def deep(entries: int) -> Iterator[str]:
+    """Chains of `DEEP_DEPTH` directories, with a file at the bottom."""
+    for chain in range(sys.maxsize):
+        for depth in range(DEEP_DEPTH):
+            yield "%sd%d_%d/" % (INDENT * depth, chain, depth)
+        yield "%sleaf.txt" % (INDENT * DEEP_DEPTH)
+
+
+def balanced(entries: int) -> Iterator[str]:
+    """`FANOUT` files & `FANOUT` subdirectories per directory (the last level
+    only has files), as many levels as `entries` need. The entries left are
+    shared evenly between subdirectories, so the last level is only partly
+    filled, but evenly."""
+    levels, count = 1, FANOUT
+    while count < entries:
+        levels, count = levels + 1, FANOUT + FANOUT * (1 + count)
+
+    def level(depth: int, budget: int) -> Iterator[str]:
+        indent = INDENT * depth
+        files = min(FANOUT, budget)
+        for f in range(files):
+            yield "%sfile_%d.txt" % (indent, f)
+        budget -= files
+        if depth + 1 == levels:
+            return
+
+        dirs = min(FANOUT, budget)
+        for d in range(dirs):
+            share = budget // (dirs - d)  # Even share of what's left
+            budget -= share
+            yield "%sdir_%d/" % (indent, d)
+            yield from level(depth + 1, share - 1)
+
+    return level(0, entries)
+
+
+def enterprise(entries: int) -> Iterator[str]:
+    """The enterprise example, once per team, 100 teams per division."""
+    with open(TEMPLATE, encoding="utf-8") as f:
+        template = [line.rstrip() for line in f if line.strip()]
+
+    for division in range(sys.maxsize):
+        yield "division_%d/" % division
+        for team in range(100):
+            yield "%steam_%d/" % (INDENT, team)
+            for line in template:
+                yield INDENT * 2 + line
+
+
+# SHAPE: GENERATOR(ENTRIES), may yield more than ENTRIES lines
+SHAPES: Dict[str, Callable[[int], Iterator[str]]] = {
+    "wide": wide,
+    "deep": deep,
+    "balanced": balanced,
+    "enterprise": enterprise,
+}
+
+
+def generate(shape: str, entries: int) -> List[str]:
+    """Returns the first `entries` lines of a tree of `shape`."""
+    return list(islice(SHAPES[shape](entries), entries))
+
+
+def write(shape: str, entries: int, filepath: str):
+    """Write a tree of `shape` with `entries` entries into `filepath`."""
+    with open(filepath, "w", encoding="utf-8") as f:
+        for line in islice(SHAPES[shape](entries), entries):
+            f.write(line + "\n")
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("shape", choices=sorted(SHAPES), help="shape of the tree")
+    parser.add_argument("entries", type=int, help="number of entries")
+    args = parser.parse_args()
+
+    try:
+        for line in islice(SHAPES[args.shape](args.entries), args.entries):
+            sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+    except BrokenPipeError:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
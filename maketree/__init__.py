@@ -0,0 +1,32 @@
+"""Create complex project structures effortlessly.
+
+The Python API (see `maketree.api`) is importable from here, and only
+loaded when first used, so the CLI doesn't pay for it:
+
+```
+import maketree
+
+maketree.build("app.tree", "myapp")
+```
+"""
+
+__all__ = [
+    "build",
+    "extract",
+    "BuildResult",
+    "ExtractResult",
+    "MaketreeError",
+    "SourceError",
+    "InvalidTreeError",
+    "DestinationError",
+    "CollisionError",
+    "ExistingFilesError",
+]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        from maketree import api
+
+        return getattr(api, name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
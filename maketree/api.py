@@ -0,0 +1,307 @@
+"""Python API: build & extract trees in-process, without spawning `maketree`.
+
+```
+import maketree
+
+result = maketree.build("app.tree", "myapp", skip=True)
+print(result.directories, result.files)
+maketree.build(text="src/\n    app.py\n", dst="myapp", skip=True)
+
+result = maketree.extract("myapp")
+result.entries  # [(TYPE, NAME, DEPTH), ...]
+result.text()   # Same as a .tree file
+```
+
+Nothing is printed and nothing prompts. Errors are raised as `MaketreeError`
+subclasses, never by exiting (unlike `maketree.cli`).
+"""
+
+import os
+from io import StringIO
+from maketree.console import Console
+from maketree.utils import (
+    is_valid_dirpath,
+    get_existing_paths,
+    rebase_paths,
+    unique_paths,
+    create_dir,
+)
+from typing import List, Dict, Tuple, Union, Optional, Sequence, Iterable, Any
+from typing import NamedTuple
+
+# A tree file path (a `str` is always a path, see `text` of `build`), an
+# open text file (or lines) of a `.tree`, or a parsed tree
+Source = Union[str, "os.PathLike[str]", Iterable[str], List[Dict]]
+
+
+class MaketreeError(Exception):
+    """Base class of the errors raised by the API."""
+
+
+class SourceError(MaketreeError):
+    """The source doesn't exist, or can't be read or parsed."""
+
+
+class InvalidTreeError(MaketreeError):
+    """The tree has invalid entries. `errors` holds the formatted messages,
+    `details` a dict per error (`line`, `type`, `name`, `reason`)."""
+
+    def __init__(self, *args: object, errors=None, details=None) -> None:
+        super().__init__(*args)
+        self.errors: List[str] = errors or []
+        self.details: List[Dict[str, Any]] = details or []
+
+
+class DestinationError(MaketreeError):
+    """A destination doesn't exist (and can't be created), the tree doesn't
+    fit in it, or building into it failed."""
+
+
+class CollisionError(MaketreeError):
+    """Paths of the tree differ only in case or Unicode normalization (see
+    `collisions` of `build`). `collisions` holds them, as `(PATH, OTHER)`."""
+
+    def __init__(self, *args: object, collisions=None) -> None:
+        super().__init__(*args)
+        self.collisions: List[Tuple[str, str]] = collisions or []
+
+
+class ExistingFilesError(MaketreeError):
+    """Files of the tree already exist (pass `skip` or `overwrite`).
+    `paths` holds them."""
+
+    def __init__(self, *args: object, paths=None) -> None:
+        super().__init__(*args)
+        self.paths: List[str] = paths or []
+
+
+class BuildResult(NamedTuple):
+    """Returned by `build`. Counts are totals of all destinations."""
+
+    directories: int
+    files: int
+    # Paths of the tree in every destination (created or not)
+    paths: Dict[str, List[str]]
+
+
+class ExtractResult(NamedTuple):
+    """Returned by `extract`."""
+
+    # (TYPE, NAME, DEPTH), TYPE: "directory", "file" or "comment"
+    entries: List[Tuple[str, str, int]]
+
+    def text(self) -> str:
+        """The entries in `.tree` format."""
+        from maketree.core.tree_writer import TreeWriter
+
+        file = StringIO()
+        TreeWriter.write_lines(self.entries, file)
+        return file.getvalue()
+
+
+def build(
+    source: Optional[Source] = None,
+    dst: Union[str, Sequence[str]] = ".",
+    *,
+    text: Optional[str] = None,
+    skip: bool = False,
+    overwrite: bool = False,
+    create_dst: bool = True,
+    collisions: str = "off",
+    jobs: int = 1,
+    max_errors: Optional[int] = None,
+) -> BuildResult:
+    """
+    ### Build
+    Build the tree of `source` (or `text`) into `dst`, the same as
+    `maketree SOURCE DST --no-confirm --collisions COLLISIONS` would.
+
+    #### Args:
+    - `source`: path of a `.tree`, `.tree.gz`, `.treeb` or `.plan` file
+    (a `str` is always a path), an open text file (or list of lines) in
+    `.tree` format, or a parsed tree (list of dicts, see
+    `Parser.parse_file`), which isn't modified
+    - `dst`: destination, or a list of them (built in parallel, once each)
+    - `text`: the tree as a string in `.tree` format, instead of `source`
+    - `skip`: skip existing files
+    - `overwrite`: overwrite existing files
+    - `create_dst`: create the destinations if they don't exist
+    - `collisions`: `on` to refuse paths differing only in case or Unicode
+    normalization, `auto` only if the destination folds them, `off` (see
+    `--collisions`)
+    - `jobs`: validate with this many processes (see `Validator.validate`)
+    - `max_errors`: stop validating after this many errors
+
+    Raises `SourceError`, `InvalidTreeError`, `DestinationError` (also if
+    building fails), `CollisionError`, `ExistingFilesError` (unless `skip`
+    or `overwrite`) or `ValueError`.
+    """
+    if skip and overwrite:
+        raise ValueError("skip and overwrite are mutually exclusive")
+    if (source is None) == (text is None):
+        raise ValueError("pass either source or text")
+    if collisions not in ("off", "on", "auto"):
+        raise ValueError("collisions must be 'off', 'on' or 'auto'")
+
+    destinations = [dst] if isinstance(dst, (str, os.PathLike)) else list(dst)
+    destinations = unique_paths(os.fspath(path) for path in destinations)
+    if not destinations:
+        raise ValueError("no destination given")
+
+    for path in destinations:
+        if os.path.isdir(path):
+            continue
+        if not create_dst:
+            raise DestinationError("destination path '%s' does not exist." % path)
+        valid = is_valid_dirpath(path)
+        if valid is not True:
+            raise DestinationError(valid)
+
+    console = Console(verbose=False, no_color=True)
+    paths = _load(source, text, destinations, console, jobs, max_errors)
+    plans = [(path, rebase_paths(paths, path)) for path in destinations]
+
+    if collisions != "off":
+        for path, dst_paths in plans:
+            _check_collisions(dst_paths, path, collisions)
+
+    if not skip and not overwrite:
+        existing = []
+        for _, dst_paths in plans:
+            existing.extend(get_existing_paths(dst_paths["files"]))
+        if existing:
+            raise ExistingFilesError(
+                "found %d existing files." % len(existing), paths=existing
+            )
+
+    for path in destinations:
+        created = create_dir(path)
+        if created is not True:
+            raise DestinationError(created)
+
+    from maketree.core.tree_builder import TreeBuilder
+
+    try:
+        counts = TreeBuilder.build_many(plans, console, skip=skip, overwrite=overwrite)
+    except OSError as e:
+        raise DestinationError(str(e)) from e
+    all_paths: Dict[str, List[str]] = {"directories": [], "files": []}
+    for _, dst_paths in plans:
+        all_paths["directories"].extend(dst_paths["directories"])
+        all_paths["files"].extend(dst_paths["files"])
+
+    return BuildResult(
+        directories=sum(count[0] for count in counts),
+        files=sum(count[1] for count in counts),
+        paths=all_paths,
+    )
+
+
+def _check_collisions(paths: Dict[str, List[str]], dst: str, mode: str):
+    """Raise `CollisionError` if `paths` collide in `dst` (see `build`)."""
+    from maketree.core.collisions import CollisionIndex
+
+    fold_case = fold_unicode = True
+    if mode == "auto":
+        fold_case, fold_unicode = CollisionIndex.probe(dst)
+        if not fold_case and not fold_unicode:
+            return
+
+    found = CollisionIndex(fold_case, fold_unicode).find(paths)
+    if found:
+        raise CollisionError(
+            "found %d colliding paths in '%s'." % (len(found), dst),
+            collisions=found,
+        )
+
+
+def _load(
+    source: Optional[Source],
+    text: Optional[str],
+    destinations: List[str],
+    console: Console,
+    jobs: int,
+    max_errors: Optional[int],
+) -> Dict[str, List[str]]:
+    """Parse & validate `source` or `text` (see `build`) for `destinations`.
+    Returns its paths, relative to the tree."""
+    from maketree.core.parser import ParseError
+    from maketree.core.pipeline import Pipeline
+    from maketree.core.validator import ValidationError
+
+    options = {"console": console, "max_errors": max_errors, "jobs": jobs}
+    try:
+        if text is not None:
+            _, paths = Pipeline.run_string(text, destinations, **options)
+        elif isinstance(source, (str, os.PathLike)):
+            filepath = os.fspath(source)
+            if not os.path.isfile(filepath):
+                raise SourceError("source '%s' does not exist." % filepath)
+            if filepath.endswith(".plan"):
+                return _load_plan(filepath, destinations)
+            _, paths = Pipeline.run(filepath, destinations, **options)
+        elif isinstance(source, list) and all(isinstance(i, dict) for i in source):
+            _, paths = Pipeline.run_tree(source, destinations, **options)
+        else:
+            _, paths = Pipeline.run_lines(source, destinations, **options)
+    except ValidationError as e:
+        raise InvalidTreeError(str(e), errors=e.errors, details=e.details) from None
+    except (ParseError, UnicodeDecodeError, OSError) as e:
+        raise SourceError("cannot parse source: %s" % e) from e
+
+    return paths
+
+
+def _load_plan(filepath: str, destinations: List[str]) -> Dict[str, List[str]]:
+    """Load the compiled plan `filepath`, checked against `destinations`."""
+    from maketree.core.plan import Plan
+
+    paths, lengths = Plan.load(filepath)
+    for path in destinations:
+        valid = Plan.check(lengths, path)
+        if valid is not True:
+            raise DestinationError("cannot build into '%s': %s" % (path, valid))
+
+    return paths
+
+
+def extract(
+    path: Union[str, "os.PathLike[str]"],
+    output: Optional[str] = None,
+    *,
+    follow_links: bool = False,
+    one_file_system: bool = False,
+    mark_links: bool = False,
+) -> ExtractResult:
+    """
+    ### Extract
+    Extract the directory tree at `path`, the same as `maketree -et PATH`.
+
+    #### Args:
+    - `output`: also write the tree into this file (format picked from
+    its extension, see `TreeWriter.write_file`)
+    - `follow_links`, `one_file_system`, `mark_links`: see `Extractor.extract`
+
+    Raises `SourceError` if `path` is not a directory or can't be read.
+    """
+    from pathlib import Path
+    from maketree.core.extractor import Extractor
+
+    if not os.path.isdir(path):
+        raise SourceError("'%s' is not a directory." % os.fspath(path))
+
+    try:
+        entries = Extractor.extract(
+            Path(path),
+            follow_links=follow_links,
+            one_file_system=one_file_system,
+            mark_links=mark_links,
+        )
+        if output:
+            from maketree.core.tree_writer import TreeWriter
+
+            TreeWriter.write_file(entries, output)
+    except OSError as e:
+        raise SourceError(str(e)) from e
+
+    return ExtractResult(entries)
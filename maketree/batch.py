@@ -0,0 +1,219 @@
+"""Runs many builds from a manifest file in one invocation (`maketree --batch jobs.txt`)."""
+
+import os
+import shlex
+from contextlib import redirect_stderr
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from maketree.console import Console
+from maketree.core.templates import TemplateCache
+from argparse import Namespace
+from typing import List, Dict, Any, Tuple, Union
+
+# Options that don't make sense for a job (they don't build anything)
+# (--profile & --cprofile profile the whole batch, not a job)
+NOT_ALLOWED = (
+    "extract_tree",
+    "convert",
+    "graphical",
+    "batch",
+    "watch",
+    "profile",
+    "profile_output",
+    "cprofile",
+)
+
+
+class Batch:
+    """
+    ### Batch
+    Build many trees in one go. Every non-empty line of the manifest is a job,
+    written the same way as the arguments of `maketree` (`#` starts a comment):
+
+    ```
+    # SRC         DST               OPTIONS
+    tenant.tree   tenants/acme      -cd
+    tenant.tree   tenants/globex    -cd --skip
+    "my app.tree" apps/web          -cd -col auto
+    ```
+
+    Every distinct `.tree` file is parsed once (see `TemplateCache`), then
+    jobs run concurrently in a pool of threads. Jobs never ask for
+    confirmation. Output of every job is collected and printed when the job
+    is done, followed by an aggregate summary.
+    """
+
+    @classmethod
+    def load_manifest(cls, filepath: str) -> List[Tuple[int, List[str]]]:
+        """Read the jobs of manifest `filepath`, as `(LINE NUMBER, ARGUMENTS)`."""
+        jobs = []
+        with open(filepath, encoding="utf-8") as f:
+            for number, line in enumerate(f, start=1):
+                argv = shlex.split(line, comments=True)
+                if argv:
+                    jobs.append((number, argv))
+
+        return jobs
+
+    @classmethod
+    def run(
+        cls,
+        filepath: str,
+        console: Console,
+        jobs: int = 1,
+        progress: bool = False,
+    ) -> Dict[str, int]:
+        """
+        ### Run
+        Run all jobs of manifest `filepath`, `jobs` at a time. Prints results
+        through `console` (or writes events, if it has an `EventWriter`).
+
+        Returns the summary `{"jobs", "failed", "directories", "files"}`.
+        """
+        manifest = cls.load_manifest(filepath)
+        templates = TemplateCache(maxsize=len(manifest) or 1)
+
+        # Parse all jobs first, so bad lines are reported before anything is built
+        parsed = []
+        for number, argv in manifest:
+            args = cls.parse_job(argv)
+            parsed.append((number, argv, args))
+
+        # Every distinct template parsed once (errors are reported by its jobs)
+        for number, argv, args in parsed:
+            if not isinstance(args, str) and os.path.isfile(args.src):
+                try:
+                    templates.get(args.src)
+                except Exception:
+                    pass
+
+        meter = None
+        if progress:
+            from maketree.progress import Progress
+
+            meter = Progress("Batch", total=len(parsed)).start()
+
+        summary = {"jobs": len(parsed), "failed": 0, "directories": 0, "files": 0}
+        try:
+            with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+                futures = {
+                    executor.submit(cls.run_job, args, console, templates): (
+                        number,
+                        argv,
+                    )
+                    for number, argv, args in parsed
+                }
+                for future in as_completed(futures):
+                    number, argv = futures[future]
+                    result = future.result()
+                    cls.report(number, argv, result, console)
+
+                    if result["status"]:
+                        summary["failed"] += 1
+                    summary["directories"] += result["directories"]
+                    summary["files"] += result["files"]
+                    if meter:
+                        meter.update(argv[0])
+        finally:
+            if meter:
+                meter.stop()
+
+        return summary
+
+    @classmethod
+    def parse_job(cls, argv: List[str]) -> Union[Namespace, str]:
+        """Parse the arguments of a job. Returns the parsed arguments, or
+        the reason they're invalid."""
+        from maketree import cli
+
+        usage = StringIO()
+        try:
+            with redirect_stderr(usage):
+                args = cli.parse_args(argv)
+        except SystemExit:
+            # Last line of argparse's usage message is the error
+            return usage.getvalue().strip().splitlines()[-1].replace("error: ", "")
+
+        if not args.src:
+            return "the following argument is required: src"
+        if args.src == "-":
+            return "cannot read the tree from stdin in a batch"
+        for name in NOT_ALLOWED:
+            if getattr(args, name):
+                return "option --%s is not allowed in a batch" % name.replace("_", "-")
+
+        # Nobody to answer, or to look at a progress bar per job
+        args.no_confirm = True
+        args.progress = False
+        return args
+
+    @classmethod
+    def run_job(
+        cls,
+        args: Union[Namespace, str],
+        console: Console,
+        templates: TemplateCache,
+    ) -> Dict[str, Any]:
+        """Run a single job (`args` from `parse_job`). Returns its result
+        `{"status", "output", "events", "directories", "files"}`."""
+        from maketree import cli
+
+        # Same settings as the batch's console, output collected
+        buffer = StringIO()
+        events = None
+        if console.events:
+            from maketree.events import EventWriter
+
+            events = EventWriter(StringIO())
+        job_console = Console(console.VERBOSE, console.NO_COLOR, buffer, events)
+
+        result = {"status": 0, "output": "", "events": "", "directories": 0, "files": 0}
+        try:
+            if isinstance(args, str):
+                job_console.error(args)  # Exits with status 1
+            counts = cli.run(args, job_console, templates)
+            if counts:
+                result["directories"], result["files"] = counts
+        except SystemExit as e:
+            result["status"] = e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            buffer.write("Error: %s\n" % e)
+            result["status"] = 1
+        finally:
+            if events:
+                events.flush()
+
+        result["output"] = buffer.getvalue()
+        if events:
+            result["events"] = events.stream.getvalue()
+        return result
+
+    @classmethod
+    def report(cls, number: int, argv: List[str], result: Dict, console: Console):
+        """Print the result of the job on line `number` of the manifest."""
+        if console.events:
+            # Events of the job, then the job's own result
+            console.events.flush()
+            console.events.stream.write(result["events"])
+            console.stream.write(result["output"])
+            console.event(
+                "job",
+                line=number,
+                argv=argv,
+                status=result["status"],
+                directories=result["directories"],
+                files=result["files"],
+            )
+            return
+
+        status = "failed" if result["status"] else "done"
+        header = "[line %d] %s: %s" % (number, shlex.join(argv), status)
+        console.print(
+            header,
+            fgcolor=console.clr_error if result["status"] else console.clr_success,
+            force_print=True,
+        )
+        output = result["output"].strip("\n")
+        if output:
+            console.print(output, force_print=True)
+        console.print("", force_print=True)
@@ -1,44 +1,114 @@
 """Frontend of the project (Argument handling and stuff)"""
 
+import os
 import sys
-from pathlib import Path
-from argparse import ArgumentParser
-from maketree.core.parser import Parser, ParseError
-from maketree.core.validator import Validator, ValidationError
-from maketree.core.extractor import Extractor
-from maketree.core.tree_writer import TreeWriter
-from maketree.core.tree_builder import TreeBuilder
-from maketree.core.normalizer import Normalizer
+from argparse import ArgumentParser, Namespace
+from contextlib import nullcontext
+from typing import List, Optional
 from maketree.console import Console
 from maketree.utils import (
     is_valid_dirpath,
     get_existing_paths,
+    rebase_paths,
+    unique_paths,
     print_tree,
     create_dir,
 )
-from typing import List, Dict
+
+# NOTE: Everything else is imported where it's used, so every run only
+# pays for what it does (e.g, the extractor is only imported for -et).
+# Keep it that way, see benchmarks/startup.py
 
 
 PROGRAM = "maketree"
 VERSION = "1.2.0"
 
+# Trees with more entries than this are summarized before confirming
+PREVIEW_MAX_ENTRIES = 200
+PREVIEW_DEPTH = 2
+PREVIEW_CHILDREN = 10
+
+
+def main(argv: Optional[List[str]] = None, templates=None):
+    """Run maketree with `argv` (default: `sys.argv[1:]`). `templates` is a
+    `TemplateCache` to load `.tree` files from (e.g, in `maketree serve`)."""
+    if argv is None:
+        argv = sys.argv[1:]
+
+    # maketree serve/compile (a tree file can't be named that, no `.tree`)
+    if argv[:1] == ["serve"]:
+        from maketree.server import serve_main
+
+        return serve_main(argv[1:])
+
+    # maketree compile
+    if argv[:1] == ["compile"]:
+        return compile_main(argv[1:])
+
+    args = parse_args(argv)
+
+    # Console? (is this fuc**ing Yavascript?)
+    # (messages go to stderr, when stdout is reserved for a streamed tree or events)
+    if args.format == "ndjson":
+        from maketree.events import EventWriter
+
+        events = EventWriter(sys.stdout)
+        console = Console(args.verbose, True, stream=sys.stderr, events=events)
+    elif args.extract_tree and args.output == "-":
+        console = Console(args.verbose, args.no_color, stream=sys.stderr)
+    else:
+        console = Console(args.verbose, args.no_color)
+
+    profiler = cprofiler = None
+    if args.profile or args.profile_output or args.cprofile:
+        profiler = start_profiler(args, console)
+    if args.cprofile:
+        import cProfile
+
+        cprofiler = cProfile.Profile()
+        cprofiler.enable()
+
+    try:
+        run(args, console, templates, profiler)
+    finally:
+        if cprofiler:
+            cprofiler.disable()
+        # Nothing to report if it stopped at the arguments (no phase ran)
+        if profiler and profiler.phases:
+            if cprofiler:
+                cprofiler.dump_stats(args.cprofile)
+            if args.profile or args.profile_output:
+                write_profile(profiler, args.profile_output, console)
+        if console.events:
+            console.events.flush()
 
-def main():
-    args = parse_args()
 
+def run(args: Namespace, console: Console, templates=None, profiler=None):
+    """Do whatever `args` (parsed command-line arguments) ask for. Returns the
+    number of directories & files created, if a tree was built. Phases are
+    timed with `profiler` (a `Profiler`), if given."""
     sourcefile = args.src
-    dstpath = Path(args.dst)
+    destinations = unique_paths(args.dst)
+    dstpath = destinations[0]
     CREATE_DST = args.create_dst
     EXTRACT_TREE = args.extract_tree
-    VERBOSE: bool = args.verbose
+    CONVERT = args.convert
     OVERWRITE: bool = args.overwrite
     SKIP: bool = args.skip
     PRINT_TREE = args.graphical
-    NO_COLORS = args.no_color
     NO_CONFIRM = args.no_confirm
+    COLLISIONS = args.collisions
+    DEPTH = args.depth
+    COLLAPSE = args.collapse
+    PROGRESS: bool = args.progress
+    BATCH = args.batch
+    WATCH: bool = args.watch
+    PRUNE: bool = args.prune
+    NDJSON = console.events is not None
 
-    # Console? (is this fuc**ing Yavascript?)
-    console = Console(VERBOSE, NO_COLORS)
+    # Time phases (nothing to time without --profile)
+    phase = profiler.phase if profiler else nullcontext
+    operations = {} if profiler else None
 
     # Mutually Exclusive
     if OVERWRITE and SKIP:
@@ -50,45 +120,88 @@ def main():
             )
         )
 
-    # Source .tree not provided?
-    if not sourcefile:
-        if not EXTRACT_TREE:
-            console.error("the following argument is required: src")
+    if PRUNE and not WATCH:
+        console.error("option --prune only works with --watch.")
 
-        # Convert path into Path object
-        extract_tree_path = Path(EXTRACT_TREE)
+    # Convert a tree file into another format and Exit.
+    if CONVERT:
+        convert_src, convert_dst = CONVERT
+        if not os.path.isfile(convert_src):
+            console.error("source '%s' does not exist." % convert_src)
 
-        if not extract_tree_path.exists():
-            console.error(f"the following path does not exist: '{extract_tree_path}'")
+        from maketree.core.parser import ParseError
+        from maketree.core.tree_writer import TreeWriter
 
-        # Extract tree into a file
-        extracted_tree = Extractor.extract(extract_tree_path, console=console)
+        console.verbose("Converting '%s' into '%s'..." % (convert_src, convert_dst))
+        try:
+            with phase("convert"):
+                count = TreeWriter.convert(convert_src, convert_dst)
+            if profiler:
+                profiler.entries("convert", count)
+        except (ParseError, UnicodeDecodeError, OSError) as e:
+            console.error(str(e))
 
-        # Pass the tree into FileWriter
-        filename = TreeWriter.write(extracted_tree, console)
+        if NDJSON:
+            console.event("converted", src=convert_src, dst=convert_dst, entries=count)
+            sys.exit(0)
 
         print(
             console.color_substrs(
-                f"Tree has been extracted into '{filename}'",
-                [filename],
+                f"{count} entries have been converted into '{convert_dst}'",
+                [convert_dst],
                 "light_green",
             )
         )
         sys.exit(0)
 
-    # Convert to Path object
-    sourcefile = Path(sourcefile)
+    # Build every job of a manifest and Exit.
+    if BATCH:
+        if sourcefile:
+            console.error(
+                "option --batch takes no src or dst (they're in the manifest)"
+            )
+        if not os.path.isfile(BATCH):
+            console.error("manifest '%s' does not exist." % BATCH)
+        with phase("batch"):
+            run_batch(BATCH, args.batch_jobs, PROGRESS, console)
+
+    # Source .tree not provided?
+    if not sourcefile:
+        if not EXTRACT_TREE:
+            console.error("the following argument is required: src")
+
+        # Extract tree into a file (or stdout) and Exit.
+        with phase("extract"):
+            extract(args, console)
+        sys.exit(0)
+
+    # SRC from stdin? (a prompt would read the tree, not an answer)
+    FROM_STDIN = sourcefile == "-"
+    IS_PLAN = sourcefile.endswith(".plan")
+    if FROM_STDIN:
+        if WATCH:
+            console.error("cannot --watch stdin, only a source file.")
+        if not NO_CONFIRM and not PRINT_TREE:
+            console.error(
+                console.color_substrs(
+                    "reading the tree from stdin needs --no-confirm (or --graphical).",
+                    ["--no-confirm", "--graphical"],
+                    "light_yellow",
+                )
+            )
 
     # SRC Exists?
-    if not sourcefile.exists():
+    elif not os.path.exists(sourcefile):
         console.error("source '%s' does not exist." % sourcefile)
 
-    # SRC Tree file?
-    if not sourcefile.name.endswith(".tree"):
-        console.error("source '%s' is not a .tree file." % sourcefile)
+    # SRC Tree file (or compiled plan)?
+    elif not IS_PLAN and not sourcefile.endswith((".tree", ".tree.gz", ".treeb")):
+        console.error("source '%s' is not a .tree (or .plan) file." % sourcefile)
 
     # DST Exists?
-    if not dstpath.is_dir():
+    for dstpath in destinations:
+        if os.path.isdir(dstpath):
+            continue
         if CREATE_DST:
             console.verbose("Validating '%s'..." % dstpath)
             valid = is_valid_dirpath(dstpath)
@@ -102,53 +215,121 @@ def main():
                     "light_red",
                 )
             )
+    dstpath = destinations[0]
 
-    # Parse the source file
-    console.verbose("Parsing %s..." % sourcefile)
-    parsed_tree = Parser.parse_file(sourcefile)
+    # Many destinations: paths relative to the tree, checked against all of them
+    rootpath = dstpath if len(destinations) == 1 else destinations
 
-    # Validate the parsed tree (Does nothing on Pass, Exits on fail)
-    console.verbose("Validating parsed tree...")
-    try:
-        Validator.validate(parsed_tree, console=console)
-    except ValidationError as e:
-        print(e)
-        sys.exit(1)
+    # Parsing, validating & normalizing are fused, timed as one phase
+    load_phase = "plan" if IS_PLAN else "pipeline"
+    with phase(load_phase):
+        if IS_PLAN:
+            # Already parsed, validated & normalized (only lengths are checked)
+            parsed_tree, paths = load_plan(sourcefile, destinations, console)
+            if PRINT_TREE or not NO_CONFIRM:
+                from maketree.core.plan import Plan
+
+                parsed_tree = Plan.to_tree(paths)
+        else:
+            parsed_tree, paths = parse_tree(
+                sourcefile, rootpath, args, console, templates
+            )
+    entries = len(paths["directories"]) + len(paths["files"])
+    if profiler:
+        profiler.entries(load_phase, entries)
+
+    # (DESTINATION, ITS PATHS), for every destination
+    if len(destinations) == 1 and not IS_PLAN:
+        plans = [(dstpath, paths)]
+    else:
+        with phase("rebase"):
+            plans = [(dst, rebase_paths(paths, dst)) for dst in destinations]
+        if profiler:
+            profiler.entries("rebase", entries * len(plans))
+    root_label = ", ".join(destinations)
 
     # Print the graphical tree and Exit.
     if PRINT_TREE:
-        print_tree(parsed_tree, root=dstpath, console=console)
+        if NDJSON:
+            for _, dst_paths in plans:
+                for path in dst_paths["directories"]:
+                    console.event("planned", type="directory", path=path)
+                for path in dst_paths["files"]:
+                    console.event("planned", type="file", path=path)
+            sys.exit(0)
+
+        with phase("print_tree"):
+            print_tree(
+                parsed_tree,
+                root=root_label,
+                console=console,
+                max_depth=DEPTH,
+                max_children=COLLAPSE,
+            )
         sys.exit(0)
 
+    # Paths that would be the same file on the destination?
+    if COLLISIONS != "off":
+        with phase("collisions"):
+            for dst, dst_paths in plans:
+                check_collisions(dst_paths, dst, COLLISIONS, console)
+        if profiler:
+            profiler.entries("collisions", entries * len(plans))
+
+    # No prompts between events
+    if NDJSON and not NO_CONFIRM:
+        console.error("--format ndjson needs --no-confirm (or --graphical).")
+
     # Confirm before proceeding
     if not NO_CONFIRM:
-        print_tree(parsed_tree, root=dstpath, console=console)
-        proceed: bool = console.input_confirm(
-            "Create this structure? (y/N): ", fgcolor="light_magenta"
-        )
+        # Summarize large trees (unless asked otherwise)
+        summarize = entries > PREVIEW_MAX_ENTRIES and DEPTH is None and COLLAPSE is None
+        with phase("print_tree"):
+            print_tree(
+                parsed_tree,
+                root=root_label,
+                console=console,
+                max_depth=PREVIEW_DEPTH if summarize else DEPTH,
+                max_children=PREVIEW_CHILDREN if summarize else COLLAPSE,
+            )
+        if summarize:
+            print(
+                console.color_substrs(
+                    "\n(summary of %d entries, see all with -g)" % entries,
+                    ["-g"],
+                    "light_yellow",
+                ),
+                file=console.stream,
+            )
+        with phase("confirm"):  # Waiting for an answer
+            proceed: bool = console.input_confirm(
+                "Create this structure? (y/N): ", fgcolor="light_magenta"
+            )
         if not proceed:
             sys.exit(0)
 
-    console.verbose("Creating tree paths...")
-
-    # Create paths from tree nodes
-    paths: Dict[str, List[str]] = Normalizer.normalize(parsed_tree, dstpath)
-
     # If Overwrite and Skip both are false
     if not OVERWRITE and not SKIP:
         # Check existing paths
         console.verbose("Checking existing paths...\n")
-        existing_paths = get_existing_paths(paths["files"])
-        count = len(existing_paths)
-        # Any path exists?
-        if count:
+        count = 0
+        for _, dst_paths in plans:
+            with phase("existing"):
+                existing_paths = get_existing_paths(dst_paths["files"], operations)
+            count += len(existing_paths)
+            for path in existing_paths:
+                console.event("exists", type="file", path=path)
             console.print_lines(
                 existing_paths,
                 "Warning: File already exists: ",
                 color="light_yellow",
                 force_print=False,
             )
-            print()
+        if profiler:
+            profiler.entries("existing", len(paths["files"]) * len(plans))
+        # Any path exists?
+        if count:
+            print(file=console.stream)
             console.error(
                 console.color_substrs(
                     f"Found {count} existing files, cannot proceed. "
@@ -159,22 +340,51 @@ def main():
             )
 
     # Create dstpath here...
-    console.verbose("Creating '%s'..." % dstpath)
-    created = create_dir(dstpath)
-    if created is not True:
-        console.error(created)
+    for dst in destinations:
+        console.verbose("Creating '%s'..." % dst)
+        created = create_dir(dst)
+        if created is not True:
+            console.error(created)
 
-    console.verbose("Creating tree in '%s'...\n" % dstpath)
+    console.verbose("Creating tree in '%s'...\n" % root_label)
 
     # Create the files and dirs finally
-    build_count = TreeBuilder.build(
-        paths,
-        console,
-        skip=SKIP,
-        overwrite=OVERWRITE,
-    )
+    from maketree.core.tree_builder import TreeBuilder
+
+    progress = None
+    if PROGRESS:
+        from maketree.progress import Progress
+
+        total = (len(paths["directories"]) + len(paths["files"])) * len(plans)
+        progress = Progress("Building", total=total).start()
+    try:
+        with phase("build"):
+            counts = TreeBuilder.build_many(
+                plans, console, SKIP, OVERWRITE, progress, operations
+            )
+    finally:
+        if progress:
+            progress.stop()
+    if profiler:
+        profiler.entries("build", entries * len(plans))
+        profiler.add_operations(operations)
+    build_count = (sum(c[0] for c in counts), sum(c[1] for c in counts))
 
     # Completion message
+    if NDJSON:
+        if len(plans) > 1:
+            for (dst, _), (dirs, files) in zip(plans, counts):
+                console.event("built", dst=dst, directories=dirs, files=files)
+        console.event("built", directories=build_count[0], files=build_count[1])
+        if WATCH:
+            watch(sourcefile, plans, args, console)
+        return build_count
+
+    if len(plans) > 1:
+        print(file=console.stream)
+        for (dst, _), (dirs, files) in zip(plans, counts):
+            print(f"{dst}: {dirs} directories and {files} files", file=console.stream)
+
     built_dirs = f"{build_count[0]} directories"
     built_files = f"{build_count[1]} files"
 
@@ -183,12 +393,425 @@ def main():
             f"\n{built_dirs} and {built_files} have been created.",
             [built_dirs, built_files],
             "light_green",
+        ),
+        file=console.stream,
+    )
+    if WATCH:
+        watch(sourcefile, plans, args, console)
+    return build_count
+
+
+def parse_tree(sourcefile: str, rootpath, args: Namespace, console: Console, templates):
+    """Parse, validate & normalize `sourcefile` (in one pass), relative to
+    `rootpath` (see `Pipeline.run`). Exits on errors. Returns the tree & paths."""
+    from maketree.core.parser import Parser, ParseError
+    from maketree.core.validator import ValidationError
+    from maketree.core.pipeline import Pipeline
+
+    try:
+        if sourcefile == "-":
+            # Parsed while it's being read (generators can pipe huge trees)
+            console.verbose("Parsing & Validating stdin...")
+            stdin = getattr(sys.stdin, "buffer", None)
+            return Pipeline.run_lines(
+                Parser.open_stream(stdin) if stdin else sys.stdin,
+                rootpath,
+                console=console,
+                max_errors=args.max_errors,
+                jobs=args.jobs,
+            )
+
+        console.verbose("Parsing & Validating %s..." % sourcefile)
+        if templates is not None:
+            # Parsed once, then only validated & normalized
+            return Pipeline.run_tree(
+                templates.get(sourcefile),
+                rootpath,
+                console=console,
+                max_errors=args.max_errors,
+                jobs=args.jobs,
+            )
+        return Pipeline.run(
+            sourcefile,
+            rootpath,
+            console=console,
+            max_errors=args.max_errors,
+            jobs=args.jobs,
+        )
+    except ValidationError as e:
+        if console.events:
+            for detail in e.details:
+                console.event("invalid", **detail)
+            console.error("found %d invalid entries." % len(e.errors))
+
+        print(e, file=console.stream)
+        if len(e.errors) > 1:
+            print("\nFound %d invalid entries." % len(e.errors), file=console.stream)
+        sys.exit(1)
+    except (ParseError, UnicodeDecodeError) as e:
+        source = "stdin" if sourcefile == "-" else "'%s'" % sourcefile
+        console.error("cannot parse %s: %s" % (source, e))
+
+
+def load_plan(planfile: str, destinations: List[str], console: Console):
+    """Load the compiled `planfile`, and check it fits in every one of the
+    `destinations`. Exits on errors. Returns an empty tree & the paths."""
+    console.verbose("Loading %s..." % planfile)
+    from maketree.core.parser import ParseError
+    from maketree.core.plan import Plan
+
+    try:
+        paths, lengths = Plan.load(planfile)
+    except (ParseError, UnicodeDecodeError, OSError) as e:
+        console.error("cannot load '%s': %s" % (planfile, e))
+
+    for dst in destinations:
+        valid = Plan.check(lengths, dst)
+        if valid is not True:
+            console.error("cannot build '%s' into '%s': %s" % (planfile, dst, valid))
+
+    return [], paths
+
+
+def compile_main(argv: List[str]):
+    """`maketree compile SRC [-o PLAN]`: compile a tree file into a plan."""
+    parser = ArgumentParser(
+        prog="%s compile" % PROGRAM,
+        description="Compile a tree file into a plan, to build it without "
+        "parsing & validating it every time.",
+    )
+    parser.add_argument("src", help="source file (.tree, .tree.gz or .treeb)")
+    parser.add_argument(
+        "-o",
+        "--output",
+        metavar="PLAN",
+        help="where to write the plan (default: SRC with a .plan extension)",
+    )
+    parser.add_argument(
+        "-me",
+        "--max-errors",
+        metavar="N",
+        type=int,
+        help="stop validating after N errors (default: report all)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        metavar="N",
+        type=int,
+        default=1,
+        help="use N processes for large trees, 0 for one per CPU (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-nc", "--no-color", action="store_true", help="don't use colors in output"
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="enable verbose mode"
+    )
+    args = parser.parse_args(argv)
+    console = Console(args.verbose, args.no_color)
+
+    sourcefile = args.src
+    if not os.path.isfile(sourcefile):
+        console.error("source '%s' does not exist." % sourcefile)
+
+    output = args.output
+    if not output:
+        output = sourcefile
+        for extension in (".tree.gz", ".treeb", ".tree"):
+            if output.endswith(extension):
+                output = output[: -len(extension)]
+                break
+        output += ".plan"
+
+    from maketree.core.plan import Plan
+    from maketree.core.parser import ParseError
+    from maketree.core.validator import ValidationError
+
+    console.verbose("Compiling '%s' into '%s'..." % (sourcefile, output))
+    try:
+        count = Plan.compile(
+            sourcefile,
+            output,
+            console=console,
+            max_errors=args.max_errors,
+            jobs=args.jobs,
+        )
+    except ValidationError as e:
+        print(e)
+        if len(e.errors) > 1:
+            print("\nFound %d invalid entries." % len(e.errors))
+        sys.exit(1)
+    except (ParseError, UnicodeDecodeError, OSError) as e:
+        console.error("cannot compile '%s': %s" % (sourcefile, e))
+
+    print(
+        console.color_substrs(
+            f"{count} operations have been compiled into '{output}'",
+            [output],
+            "light_green",
         )
     )
 
 
-def parse_args():
-    """Parse command-line arguments and return."""
+def start_profiler(args: Namespace, console: Console):
+    """Check the profile outputs of `args` (exits if one can't be written,
+    they never replace anything but older outputs) and return a `Profiler`."""
+    from maketree.profiler import Profiler
+
+    outputs = [(args.profile_output, "report"), (args.cprofile, "stats")]
+    outputs = [(path, kind) for path, kind in outputs if path]
+    if len({os.path.realpath(path) for path, _ in outputs}) < len(outputs):
+        console.error("--profile-output and --cprofile need different files.")
+
+    for path, kind in outputs:
+        valid = Profiler.check_output(path, kind)
+        if valid is not True:
+            console.error("cannot write the profile %s: %s" % (kind, valid))
+
+    return Profiler()
+
+
+def write_profile(profiler, output: Optional[str], console: Console):
+    """Print the report of `profiler` on stderr (or as a `profile` event),
+    or write it as JSON into `output`, if given."""
+    profiler.stop()
+    if output:
+        import json
+
+        try:
+            with open(output, "w", encoding="utf-8") as f:
+                json.dump(profiler.report(), f, indent=2)
+                f.write("\n")
+        except OSError as e:
+            console.warning("cannot write profile '%s': %s" % (output, e))
+    elif console.events:
+        console.event("profile", **profiler.report())
+    else:
+        profiler.print_report(sys.stderr)
+
+
+def watch(sourcefile: str, plans, args: Namespace, console: Console):
+    """Keep the built `plans` in sync with `sourcefile` (until Ctrl+C)."""
+    from maketree.watch import Watch
+
+    if console.events:
+        console.events.flush()
+    Watch.run(
+        sourcefile,
+        plans,
+        console,
+        prune=args.prune,
+        max_errors=args.max_errors,
+        jobs=args.jobs,
+    )
+
+
+def run_batch(manifest: str, jobs: int, progress: bool, console: Console):
+    """Run the jobs of `manifest` (`jobs` at a time, 0 for one per CPU),
+    print the summary and exit, with status `1` if any job failed."""
+    from maketree.batch import Batch
+
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+
+    try:
+        summary = Batch.run(manifest, console, jobs=jobs, progress=progress)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        console.error("cannot read manifest '%s': %s" % (manifest, e))
+
+    status = 1 if summary["failed"] else 0
+    if console.events:
+        console.event("batch", **summary)
+        sys.exit(status)
+
+    succeeded = f"{summary['jobs'] - summary['failed']} of {summary['jobs']} jobs"
+    built = f"{summary['directories']} directories and {summary['files']} files"
+    print(
+        console.color_substrs(
+            f"{succeeded} succeeded, {built} have been created.",
+            [succeeded, built],
+            "light_red" if status else "light_green",
+        ),
+        file=console.stream,
+    )
+    sys.exit(status)
+
+
+def check_collisions(paths, dstpath: str, mode: str, console: Console):
+    """Exit with an error if any of the `paths` collide when names are compared
+    case-insensitively & Unicode normalized. With `mode` `auto`, only the
+    kinds of folding the file system at `dstpath` actually does are checked."""
+    from maketree.core.collisions import CollisionIndex
+
+    fold_case = fold_unicode = True
+    if mode == "auto":
+        console.verbose("Probing '%s'..." % dstpath)
+        fold_case, fold_unicode = CollisionIndex.probe(dstpath)
+        if not fold_case and not fold_unicode:
+            return
+
+    console.verbose("Checking colliding paths...\n")
+    collisions = CollisionIndex(fold_case, fold_unicode).find(paths)
+    if not collisions:
+        return
+
+    for first, other in collisions:
+        if console.events:
+            console.event("collision", path=first, other=other)
+        else:
+            console.warning("Collision: '%s' and '%s'" % (first, other))
+    if not console.events:
+        print(file=console.stream)
+    console.error(
+        f"Found {len(collisions)} colliding paths, cannot proceed. "
+        "(names differ only in case or Unicode normalization)"
+    )
+
+
+def extract(args: Namespace, console: Console):
+    """Extract the directory tree at `args.extract_tree` into a file,
+    or stream it to stdout if `args.output` is `-`."""
+    from pathlib import Path
+    from maketree.core.extractor import Extractor
+    from maketree.core.snapshot import Snapshot
+    from maketree.core.tree_writer import TreeWriter
+
+    extract_tree_path = Path(args.extract_tree)
+    INCREMENTAL: bool = args.incremental
+    FOLLOW_LINKS: bool = args.follow_links
+    ONE_FILE_SYSTEM: bool = args.one_file_system
+    MARK_LINKS: bool = args.mark_links
+    METADATA: bool = args.metadata
+    GZIP: bool = args.gzip
+    BINARY: bool = args.binary
+    OUTPUT: str = args.output
+    TO_STDOUT = OUTPUT == "-"
+    PROGRESS: bool = args.progress
+
+    if not extract_tree_path.exists():
+        console.error(f"the following path does not exist: '{extract_tree_path}'")
+
+    if TO_STDOUT and console.events:
+        console.error("cannot stream the tree to stdout with --format ndjson.")
+
+    progress = None
+
+    try:
+        # Extract tree with metadata into a .tsv file
+        if METADATA:
+            columns = Extractor.extract_columns(
+                extract_tree_path,
+                console=console,
+                follow_links=FOLLOW_LINKS,
+                one_file_system=ONE_FILE_SYSTEM,
+            )
+            if TO_STDOUT:
+                TreeWriter.write_metadata_lines(columns, sys.stdout)
+                sys.stdout.flush()
+                return
+
+            if OUTPUT:
+                filename = OUTPUT
+                with open(filename, "w", encoding="utf-8") as f:
+                    TreeWriter.write_metadata_lines(columns, f)
+            else:
+                filename = TreeWriter.write_metadata(columns, console)
+
+            if console.events:
+                console.event("extracted", path=filename, entries=len(columns))
+                return
+
+            print(
+                console.color_substrs(
+                    f"Tree metadata has been extracted into '{filename}'",
+                    [filename],
+                    "light_green",
+                )
+            )
+            return
+
+        # Load snapshot of the previous extraction (if incremental)
+        snapshot = None
+        if INCREMENTAL:
+            if OUTPUT and not TO_STDOUT:
+                snapshot_file = Snapshot.path_for(OUTPUT)
+            else:
+                snapshot_file = Snapshot.path_for(
+                    "%s.tree" % (extract_tree_path.absolute().name or "tree")
+                )
+            console.verbose("Loading snapshot '%s'..." % snapshot_file)
+            snapshot = Snapshot.load(snapshot_file)
+
+        # Entries are yielded while walking, and written as they come
+        extracted_tree = Extractor.iter_extract(
+            extract_tree_path,
+            console=console,
+            snapshot=snapshot,
+            follow_links=FOLLOW_LINKS,
+            one_file_system=ONE_FILE_SYSTEM,
+            mark_links=MARK_LINKS,
+        )
+        if PROGRESS:
+            from maketree.progress import Progress
+
+            progress = Progress("Extracting").start()
+            extracted_tree = progress.track(
+                extracted_tree,
+                current=lambda entry: entry[1] if entry[0] == "directory" else None,
+            )
+
+        if TO_STDOUT:
+            filename = None
+            TreeWriter.write_stream(
+                extracted_tree,
+                sys.stdout.buffer,
+                compress=GZIP,
+                binary=BINARY,
+            )
+        elif OUTPUT:
+            # Explicit path, format picked from its extension
+            filename = OUTPUT
+            console.verbose("Writing tree to %s..." % filename)
+            TreeWriter.write_file(extracted_tree, filename)
+        else:
+            # Pass the tree into FileWriter
+            filename = TreeWriter.write(
+                list(extracted_tree),
+                console,
+                compress=GZIP,
+                binary=BINARY,
+            )
+    except BrokenPipeError:
+        # Reader went away (e.g, `| head`), silence the flush at exit
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+    except OSError as e:
+        console.error(str(e))
+    finally:
+        if progress:
+            progress.stop()
+
+    # Save snapshot for the next extraction
+    if INCREMENTAL:
+        console.verbose("Saving snapshot '%s'..." % snapshot_file)
+        Snapshot.save(snapshot, snapshot_file)
+
+    if filename and console.events:
+        console.event("extracted", path=filename)
+    elif filename:
+        print(
+            console.color_substrs(
+                f"Tree has been extracted into '{filename}'",
+                [filename],
+                "light_green",
+            )
+        )
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    """Parse command-line arguments (default: `sys.argv[1:]`) and return."""
 
     parser = ArgumentParser(
         prog=PROGRAM,
@@ -200,13 +823,15 @@ def parse_args():
     parser.add_argument(
         "src",
         nargs="?",
-        help="source file (with .tree extension)",
+        help="source file (with .tree, .tree.gz or .treeb extension), "
+        "a compiled .plan, or - to read the tree from stdin",
     )
     parser.add_argument(
         "dst",
-        nargs="?",
-        default=".",
-        help="where to create the tree structure (default: %(default)s)",
+        nargs="*",
+        default=["."],
+        help="where to create the tree structure, the same tree is built into "
+        "every one of many (default: .)",
     )
     parser.add_argument(
         "-cd",
@@ -220,16 +845,171 @@ def parse_args():
         metavar="",
         help="write directory tree into a .tree file. (takes a PATH)",
     )
+    parser.add_argument(
+        "-out",
+        "--output",
+        metavar="PATH",
+        help="with -et, write the tree into PATH instead, or to stdout if PATH is -",
+    )
+    parser.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="with -et, only re-list directories changed since the last extraction",
+    )
+    parser.add_argument(
+        "-fl",
+        "--follow-links",
+        action="store_true",
+        help="with -et, descend into symlinked directories (each only once)",
+    )
+    parser.add_argument(
+        "-ofs",
+        "--one-file-system",
+        action="store_true",
+        help="with -et, don't descend into directories on other file systems",
+    )
+    parser.add_argument(
+        "-ml",
+        "--mark-links",
+        action="store_true",
+        help="with -et, mark symlinks (and skipped directories) with comments",
+    )
+    parser.add_argument(
+        "-m",
+        "--metadata",
+        action="store_true",
+        help="with -et, write paths with size, mode & mtime into a .tsv file",
+    )
+    parser.add_argument(
+        "-z",
+        "--gzip",
+        action="store_true",
+        help="with -et, write a gzip compressed .tree.gz file",
+    )
+    parser.add_argument(
+        "-b",
+        "--binary",
+        action="store_true",
+        help="with -et, write a binary .treeb file (fastest to load)",
+    )
+    parser.add_argument(
+        "-ct",
+        "--convert-tree",
+        dest="convert",
+        nargs=2,
+        metavar=("SRC", "DST"),
+        help="convert SRC tree file into DST (.tree, .tree.gz or .treeb)",
+    )
     parser.add_argument(
         "-g",
         "--graphical",
         action="store_true",
         help="show source file as graphical tree and exit",
     )
+    parser.add_argument(
+        "-gd",
+        "--depth",
+        metavar="N",
+        type=int,
+        help="show only N levels of the graphical tree",
+    )
+    parser.add_argument(
+        "-gc",
+        "--collapse",
+        metavar="N",
+        type=int,
+        help="show only N entries per directory of the graphical tree",
+    )
     parser.add_argument(
         "-o", "--overwrite", action="store_true", help="overwrite existing files"
     )
     parser.add_argument("-s", "--skip", action="store_true", help="skip existing files")
+    parser.add_argument(
+        "-me",
+        "--max-errors",
+        metavar="N",
+        type=int,
+        help="stop validating after N errors (default: report all)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        metavar="N",
+        type=int,
+        default=1,
+        help="use N processes for large trees, 0 for one per CPU (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-col",
+        "--collisions",
+        choices=("off", "on", "auto"),
+        default="off",
+        help="check for paths differing only in case or Unicode normalization, "
+        "auto to check only if the destination folds them (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-w",
+        "--watch",
+        action="store_true",
+        help="after building, keep watching src and create entries added to it",
+    )
+    parser.add_argument(
+        "-pr",
+        "--prune",
+        action="store_true",
+        help="with --watch, also delete entries removed from src (if empty)",
+    )
+    parser.add_argument(
+        "-bt",
+        "--batch",
+        metavar="MANIFEST",
+        help="build many trees, one 'SRC DST [OPTIONS]' job per line of MANIFEST "
+        "(see --batch-jobs)",
+    )
+    parser.add_argument(
+        "-bj",
+        "--batch-jobs",
+        metavar="N",
+        type=int,
+        default=1,
+        help="with --batch, run N jobs at a time, 0 for one per CPU "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "-pf",
+        "--profile",
+        action="store_true",
+        help="time every phase & count filesystem operations, print a report on "
+        "stderr",
+    )
+    parser.add_argument(
+        "-pfo",
+        "--profile-output",
+        metavar="FILE",
+        help="write the --profile report as JSON into FILE instead",
+    )
+    parser.add_argument(
+        "-cpf",
+        "--cprofile",
+        metavar="FILE",
+        help="run under cProfile, and write the stats into FILE "
+        "(see them with: python -m pstats FILE)",
+    )
+    parser.add_argument(
+        "-p",
+        "--progress",
+        action="store_true",
+        help="show progress (entries/s, ETA) on stderr while building or extracting",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=("text", "ndjson"),
+        default="text",
+        help="output format, ndjson writes one JSON event per line to stdout "
+        "(default: %(default)s)",
+    )
     parser.add_argument(
         "-nc",
         "--no-color",
@@ -246,4 +1026,4 @@ def parse_args():
         "-v", "--verbose", action="store_true", help="enable verbose mode"
     )
 
-    return parser.parse_args()
+    return parser.parse_args(argv)
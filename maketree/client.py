@@ -0,0 +1,94 @@
+"""Thin client for `maketree serve`: sends the command-line to the server and prints its output.
+
+```sh
+maketree serve &                          # Once
+maketree-client app.tree dst -cd -nC      # Same arguments as maketree
+```
+
+Kept tiny (only stdlib modules that load fast), since skipping the startup
+cost of maketree is the whole point.
+"""
+
+import json
+import os
+import socket
+import sys
+from typing import List, Optional, Tuple
+
+# Environment variable to override the socket path with
+SOCKET_ENV = "MAKETREE_SOCKET"
+
+
+def default_socket_path() -> str:
+    """Returns the socket path the server & client use, unless told otherwise."""
+    if os.environ.get(SOCKET_ENV):
+        return os.environ[SOCKET_ENV]
+
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "maketree.sock")
+    return os.path.join(private_dir(), "maketree.sock")
+
+
+def private_dir() -> str:
+    """Returns the directory (in `/tmp`) of the default socket, when there's no
+    `$XDG_RUNTIME_DIR`. Only the current user may enter it (see `serve_main`)."""
+    return os.path.join("/tmp", "maketree-%d" % os.getuid())
+
+
+def check_owner(path: str):
+    """Raise `PermissionError` if `path` (a socket, or its directory) is not
+    owned by the current user, another user could be listening on it."""
+    if os.stat(path).st_uid != os.getuid():
+        raise PermissionError("'%s' is owned by another user" % path)
+
+
+def request(
+    argv: List[str],
+    cwd: Optional[str] = None,
+    socket_path: Optional[str] = None,
+) -> Tuple[int, str, str]:
+    """
+    ### Request
+    Run maketree with `argv` (in `cwd`) on the server, and return a tuple of
+    the exit status, stdout and stderr (same as running `maketree` would).
+
+    Raises `OSError` if the server is not reachable, or its socket is not
+    owned by the current user.
+    """
+    message = {"argv": argv, "cwd": cwd or os.getcwd()}
+    socket_path = socket_path or default_socket_path()
+    check_owner(socket_path)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(message).encode() + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+
+        with sock.makefile("rb") as f:
+            response = json.loads(f.readline())
+
+    return response["status"], response["stdout"], response["stderr"]
+
+
+def main(argv: Optional[List[str]] = None):
+    if argv is None:
+        argv = sys.argv[1:]
+
+    try:
+        status, stdout, stderr = request(argv)
+    except (OSError, ValueError) as e:
+        print(
+            "Error: cannot reach maketree server (%s), is it running?" % e,
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    sys.stdout.write(stdout)
+    sys.stdout.flush()
+    sys.stderr.write(stderr)
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,18 @@
+import re
 import sys
-from maketree.terminal_colors import printc, colored
-from typing import List, Optional
+from functools import lru_cache
+from maketree.terminal_colors import printc, compile_style, RESET
+from typing import List, Optional, TextIO, Tuple, Pattern, Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from maketree.events import EventWriter
+
+
+@lru_cache(maxsize=256)
+def substrs_pattern(substrs: Tuple[str, ...]) -> Pattern:
+    """Returns a regex matching any of `substrs` (longest first, so one
+    sub-string can't break up a longer one)."""
+    return re.compile("|".join(map(re.escape, sorted(substrs, key=len, reverse=True))))
 
 
 class Console:
@@ -11,6 +23,11 @@ class Console:
     #### ARGS:
     - `verbose`: decides whether to print verbose messages or not
     - `no_color`: decides whether to use colors in output or not
+    - `stream`: where to print messages (default: `sys.stdout`). Use
+    `sys.stderr` when stdout is reserved for data (e.g, a streamed tree)
+    - `events`: an `EventWriter` (machine-readable output). If given, errors,
+    warnings etc. are written as events (instead of printed), and `event()`
+    writes events (instead of doing nothing)
 
     """
 
@@ -18,9 +35,13 @@ class Console:
         self,
         verbose: bool,
         no_color: bool,
+        stream: Optional[TextIO] = None,
+        events: Optional["EventWriter"] = None,
     ):
         self.VERBOSE = verbose
         self.NO_COLOR = no_color
+        self.stream = stream
+        self.events = events
 
         self.clr_info = "light_blue"
         self.clr_error = "light_red"
@@ -29,56 +50,55 @@ class Console:
         self.clr_primary = "light_magenta"
         self.clr_secondary = "yellow"
 
+    def event(self, event: str, **fields: Any):
+        """Write an event (see `maketree.events`), does nothing without `events`."""
+        if self.events:
+            self.events.emit(event, **fields)
+
     def error(self, message: str):
         """Print `message` and exit with status `1`. Use for errors only."""
-        self.print(
-            self.color_substrs(
-                "Error: %s" % message,
-                ["Error:"],
-                self.clr_error,
-            ),
-            force_print=True,
-        )
+        if self.events:
+            self.events.emit("error", message=message)
+            self.events.flush()
+        else:
+            self.print(
+                self.labeled("Error:", message, self.clr_error), force_print=True
+            )
         sys.exit(1)
 
     def info(self, message: str):
         """Print `message`. Use for informational messages."""
-        self.print(
-            self.color_substrs(
-                "[INFO] %s" % message,
-                ["[INFO]"],
-                self.clr_info,
-            ),
-            force_print=True,
-        )
+        if self.events:
+            return self.events.emit("info", message=message)
+        self.print(self.labeled("[INFO]", message, self.clr_info), force_print=True)
 
     def verbose(self, message: str):
         """Print `message`. Use for verbose messages."""
         if self.VERBOSE:
-            print("[*] %s" % message)
+            print("[*] %s" % message, file=self.stream)
 
     def warning(self, message: str):
         """Print `message`. Use for warning messages."""
+        if self.events:
+            return self.events.emit("warning", message=message)
         self.print(
-            self.color_substrs(
-                "Warning: %s" % message,
-                ["Warning:"],
-                self.clr_warning,
-            ),
-            force_print=True,
+            self.labeled("Warning:", message, self.clr_warning), force_print=True
         )
 
     def success(self, message: str):
         """Print `message`. Use for success messages."""
+        if self.events:
+            return self.events.emit("success", message=message)
         self.print(
-            self.color_substrs(
-                "Success: %s" % message,
-                ["Success:"],
-                self.clr_success,
-            ),
-            force_print=True,
+            self.labeled("Success:", message, self.clr_success), force_print=True
         )
 
+    def labeled(self, label: str, message: str, fgcolor: str) -> str:
+        """Returns `message` after `label` (colored with `fgcolor`)."""
+        if self.NO_COLOR:
+            return "%s %s" % (label, message)
+        return "%s%s%s %s" % (compile_style(fgcolor), label, RESET, message)
+
     def print(
         self,
         text: str,
@@ -106,10 +126,16 @@ class Console:
             return
 
         if self.NO_COLOR:
-            print(text, sep=sep, end=end, flush=flush)
+            print(text, sep=sep, end=end, file=self.stream, flush=flush)
             return
 
-        print(colored(text, fgcolor, bgcolor, attrs), sep=sep, end=end, flush=flush)
+        print(
+            self.colored(text, fgcolor, bgcolor, attrs),
+            sep=sep,
+            end=end,
+            file=self.stream,
+            flush=flush,
+        )
 
     def print_lines(
         self,
@@ -153,6 +179,10 @@ class Console:
             except KeyboardInterrupt:
                 # Force quit
                 sys.exit(1)
+            except EOFError:
+                # Nothing to read (e.g, stdin is not a terminal), that's a no
+                print(file=self.stream)
+                return False
             except:
                 continue
 
@@ -172,17 +202,14 @@ class Console:
         - `fgcolor`: foreground color of substrings
 
         """
-        if self.NO_COLOR:
+        substrs = tuple(str(string) for string in substrs if str(string))
+        if self.NO_COLOR or not substrs:
             return text
 
-        colored_text = text
-        for string in substrs:
-            colored_text = colored_text.replace(
-                str(string),
-                colored(str(string), fgcolor),
-            )
-
-        return colored_text
+        # All sub-strings in a single pass
+        pattern = substrs_pattern(substrs)
+        prefix = compile_style(fgcolor)
+        return pattern.sub(lambda match: prefix + match.group() + RESET, text)
 
     def colored(
         self,
@@ -196,4 +223,6 @@ class Console:
         if self.NO_COLOR:
             return text
 
-        return colored(text, fgcolor, bgcolor, attrs)
+        return compile_style(fgcolor, bgcolor, tuple(attrs) if attrs else None) + (
+            text + RESET
+        )
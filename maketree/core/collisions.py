@@ -0,0 +1,95 @@
+"""Finds paths that would collide on case-insensitive or normalization-folding file systems."""
+
+from os.path import exists, dirname, abspath, join
+from unicodedata import normalize
+from typing import List, Dict, Tuple, Iterable, Callable
+
+
+class CollisionIndex:
+    """
+    ### Collision Index
+    Hashes every path of a normalized plan by a folded key (casefolded and/or
+    Unicode normalized), so paths that are different strings but the same
+    file on the destination (e.g, `README.md` and `Readme.md`, or `é` as
+    NFC and NFD) are all found in a single linear pass, before building.
+
+    ```
+    index = CollisionIndex(fold_case=True, fold_unicode=True)
+    collisions = index.find(paths)  # [(FIRST PATH, COLLIDING PATH)]
+    ```
+    """
+
+    def __init__(self, fold_case: bool = True, fold_unicode: bool = True):
+        self.fold_case = fold_case
+        self.fold_unicode = fold_unicode
+
+    def key(self, path: str) -> str:
+        """Return the folded key of `path` (same key, same file)."""
+        # Canonical caseless matching: NFD(casefold(NFD(path)))
+        unicode = self.fold_unicode and not path.isascii()
+        if unicode:
+            path = normalize("NFD", path)
+        if self.fold_case:
+            path = path.casefold()
+            if unicode:
+                path = normalize("NFD", path)
+        return path
+
+    def find(self, paths: Dict[str, List[str]]) -> List[Tuple[str, str]]:
+        """
+        ### Find
+        Returns every collision in `paths` (the output of `Normalizer.normalize`),
+        as tuples of the first path with a key, and the one colliding with it.
+        Directories and files are checked against each other too.
+        """
+        return self.find_in(paths["directories"] + paths["files"])
+
+    def find_in(self, paths: Iterable[str]) -> List[Tuple[str, str]]:
+        """Same as `find`, for an iterable of path strings."""
+        key: Callable[[str], str] = self.key
+        if not self.fold_case and not self.fold_unicode:
+            key = str  # Only exact duplicates (a dir & a file)
+
+        first: Dict[str, str] = {}  # KEY: FIRST PATH
+        collisions = []
+        for path in paths:
+            folded = key(path)
+            if folded in first:
+                collisions.append((first[folded], path))
+            else:
+                first[folded] = path
+
+        return collisions
+
+    @classmethod
+    def probe(cls, path: str) -> Tuple[bool, bool]:
+        """
+        ### Probe
+        Find out how the file system at `path` (or its nearest existing parent)
+        compares names, by creating a couple of files in a temporary directory.
+
+        Returns a tuple `(CASE INSENSITIVE, NORMALIZATION INSENSITIVE)`,
+        `(False, False)` if the probe can't be done (e.g, read-only).
+        """
+        from tempfile import TemporaryDirectory
+
+        path = abspath(path)
+        while not exists(path) and dirname(path) != path:
+            path = dirname(path)
+
+        try:
+            with TemporaryDirectory(prefix=".maketree-", dir=path) as tmp:
+                # Case
+                open(join(tmp, "Probe"), "w").close()
+                case = exists(join(tmp, "PROBE"))
+
+                # Unicode normalization (é, composed and decomposed)
+                try:
+                    open(join(tmp, "\u00e9"), "w").close()
+                    unicode = exists(join(tmp, "e\u0301"))
+                except (OSError, UnicodeError):
+                    unicode = False
+        except OSError:
+            return False, False
+
+        return case, unicode
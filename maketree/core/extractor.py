@@ -1,11 +1,22 @@
 """Extracts a directory tree and writes into a file. (preferably .tree)"""
 
 import os
+from time import time_ns
+from os.path import basename, join
 from pathlib import Path
 from maketree.console import Console
-from maketree.utils import incremented_filename, now
 
-from typing import Optional, List, Tuple
+from array import array
+from typing import Optional, List, Tuple, Dict, Any, Set, Iterator
+
+
+# Directories modified this close (in ns) to the extraction are never
+# cached in a snapshot, because filesystem timestamps are too coarse to
+# tell a later change apart from the one we've just seen.
+RACY_WINDOW_NS = 2_000_000_000
+
+# (SUBDIRS, FILES, SYMLINKS {NAME: TARGET})
+Listing = Tuple[List[str], List[str], Dict[str, str]]
 
 
 class Extractor:
@@ -16,6 +27,10 @@ class Extractor:
         cls,
         path: Path,
         console: Optional[Console] = None,
+        snapshot: Optional[Dict[str, Any]] = None,
+        follow_links: bool = False,
+        one_file_system: bool = False,
+        mark_links: bool = False,
     ) -> List[Tuple[str, str, int]]:
         """
         ### Extract
@@ -23,32 +38,370 @@ class Extractor:
 
         #### Args:
         - `path`: path to a directory (must be a `Path` object)
+        - `snapshot`: a snapshot (see `maketree.core.snapshot`) from a previous
+        extraction. Directories whose mtime & inode haven't changed since are
+        not listed again. The snapshot is updated in place.
+        - `follow_links`: descend into symlinked directories. Every directory
+        is only descended once (tracked by device & inode), so link cycles
+        and bind mounts don't get traversed again.
+        - `one_file_system`: don't descend into directories on other devices
+        - `mark_links`: add a `comment` entry before every symlink and every
+        directory that was not descended, explaining why.
 
         #### Output Tree Structure:
         ```
         tree = [
-            (TYPE, NAME, DEPTH),
+            (TYPE, NAME, DEPTH),  # TYPE: "directory", "file" or "comment"
         ]
         ```
         """
-        path = path.absolute()  # Path to absolute
-        tree: List[Tuple[str, str, int]] = []
+        return list(
+            cls.iter_extract(
+                path,
+                console=console,
+                snapshot=snapshot,
+                follow_links=follow_links,
+                one_file_system=one_file_system,
+                mark_links=mark_links,
+            )
+        )
+
+    @classmethod
+    def iter_extract(
+        cls,
+        path: Path,
+        console: Optional[Console] = None,
+        snapshot: Optional[Dict[str, Any]] = None,
+        follow_links: bool = False,
+        one_file_system: bool = False,
+        mark_links: bool = False,
+    ) -> Iterator[Tuple[str, str, int]]:
+        """
+        ### Iter Extract
+        Same as `extract`, but yields the entries while the directories are
+        being walked (e.g, to stream them into a file or pipe).
+
+        The `snapshot` is only updated once the generator is exhausted.
+        """
+        walk = cls._walk(
+            path.absolute(),
+            console=console,
+            snapshot=snapshot,
+            follow_links=follow_links,
+            one_file_system=one_file_system,
+            mark_links=mark_links,
+        )
+        for entry, _ in walk:
+            yield entry
+
+    @classmethod
+    def extract_columns(
+        cls,
+        path: Path,
+        console: Optional[Console] = None,
+        follow_links: bool = False,
+        one_file_system: bool = False,
+        mark_links: bool = False,
+    ) -> "TreeColumns":
+        """
+        ### Extract Columns
+        Same as `extract`, but also collects the size, mode and mtime of
+        every entry (from the same directory scan), and returns them
+        as `TreeColumns` (parallel arrays) instead of a list of tuples.
+
+        Symlinks are not followed for file metadata (`lstat`).
+        """
+        columns = TreeColumns()
+        walk = cls._walk(
+            path.absolute(),
+            console=console,
+            follow_links=follow_links,
+            one_file_system=one_file_system,
+            mark_links=mark_links,
+            with_stats=True,
+        )
+        for entry, stat in walk:
+            columns.append(entry, stat)
+
+        return columns
+
+    @classmethod
+    def _walk(
+        cls,
+        path: Path,
+        console: Optional[Console] = None,
+        snapshot: Optional[Dict[str, Any]] = None,
+        follow_links: bool = False,
+        one_file_system: bool = False,
+        mark_links: bool = False,
+        with_stats: bool = False,
+    ) -> Iterator[Tuple[Tuple[str, str, int], Optional[os.stat_result]]]:
+        """Walk the (absolute) `path` and yield `((TYPE, NAME, DEPTH), STAT)`
+        for every entry. `STAT` is `None` unless `with_stats` is `True`."""
+        # Previous & Current snapshot entries
+        old_dirs: Dict[str, list] = {}
+        new_dirs: Dict[str, list] = {}
+        if snapshot is not None and snapshot.get("root") == str(path):
+            old_dirs = snapshot.get("dirs", {})
+        cutoff = time_ns() - RACY_WINDOW_NS
+
+        # Directories need a `stat` only when one of these is on
+        needs_stat = (
+            snapshot is not None or follow_links or one_file_system or with_stats
+        )
+        visited: Set[Tuple[int, int]] = set()  # (DEVICE, INODE)
+        root_device: Optional[int] = None
+
+        # Depth-first, parents before children (same order as `os.walk`)
+        # (PATH, RELPATH, DEPTH, SYMLINK TARGET)
+        stack: List[Tuple[str, str, int, Optional[str]]] = [(str(path), "", 0, None)]
+        while stack:
+            dirpath, relpath, depth, target = stack.pop()
+            dir_name = basename(dirpath) or dirpath
+
+            link_comment = None
+            if mark_links and target is not None:
+                link_comment = ("comment", "%s/ -> %s" % (dir_name, target), depth)
+
+            stat = None
+            if needs_stat:
+                try:
+                    stat = os.stat(dirpath)
+                except OSError:
+                    continue
+
+                if root_device is None:
+                    root_device = stat.st_dev
 
-        # Write stuff to stuff.stuff :)
-        for root, _, files in os.walk(path):
-            current_path = Path(root)
+                # Descend only once per directory, and only on the same device
+                reason = None
+                if follow_links and (stat.st_dev, stat.st_ino) in visited:
+                    reason = "already extracted"
+                elif one_file_system and stat.st_dev != root_device:
+                    reason = "on another file system"
 
-            depth = len(current_path.relative_to(path).parts)
-            dir_name = current_path.name or root
+                if reason:
+                    if console:
+                        console.verbose("not descending %s/, %s" % (dir_name, reason))
+                        console.event("not_descended", path=dirpath, reason=reason)
+                    if mark_links:
+                        if link_comment:
+                            yield link_comment, None
+                        yield (
+                            "comment",
+                            "%s/ not descended, %s" % (dir_name, reason),
+                            depth,
+                        ), None
+                    yield ("directory", dir_name, depth), stat
+                    continue
 
-            console.verbose("found %s/..." % dir_name)
+                if follow_links:
+                    visited.add((stat.st_dev, stat.st_ino))
 
-            # Append directory line
-            tree.append(("directory", dir_name, depth))
+            file_stats: Optional[Dict[str, os.stat_result]] = None
+            if with_stats:
+                file_stats = {}
 
-            # Append file lines
+            if snapshot is None:
+                listing = cls._scandir(dirpath, follow_links, mark_links, file_stats)
+            else:
+                listing = cls._scandir_cached(
+                    dirpath,
+                    relpath,
+                    stat,
+                    old_dirs,
+                    new_dirs,
+                    cutoff,
+                    follow_links,
+                    mark_links,
+                )
+
+            # Unreadable directory (skipped, just like `os.walk` does)
+            if listing is None:
+                continue
+
+            dirs, files, links = listing
+
+            if console:
+                console.verbose("found %s/..." % dir_name)
+
+            # Directory line
+            if link_comment:
+                yield link_comment, None
+            yield ("directory", dir_name, depth), stat
+
+            # File lines
             for file in files:
-                console.verbose("found %s..." % file)
-                tree.append(("file", file, (depth + 1)))
+                if console:
+                    console.verbose("found %s..." % file)
+                if mark_links and file in links:
+                    yield ("comment", "%s -> %s" % (file, links[file]), depth + 1), None
+                yield ("file", file, (depth + 1)), (
+                    file_stats.get(file) if file_stats else None
+                )
+
+            # Symlinked directories that are not followed
+            if mark_links and not follow_links and links:
+                file_names = set(files)
+                for name, link_target in links.items():
+                    if name not in file_names:
+                        yield (
+                            "comment",
+                            "%s/ -> %s (not followed)" % (name, link_target),
+                            depth + 1,
+                        ), None
+
+            # Push sub-directories (reversed, so they pop in order)
+            for dir_ in reversed(dirs):
+                stack.append(
+                    (
+                        join(dirpath, dir_),
+                        join(relpath, dir_),
+                        depth + 1,
+                        links.get(dir_),
+                    )
+                )
+
+        if snapshot is not None:
+            snapshot["root"] = str(path)
+            snapshot["dirs"] = new_dirs
+
+    @classmethod
+    def _scandir(
+        cls,
+        dirpath: str,
+        follow_links: bool = False,
+        read_links: bool = False,
+        file_stats: Optional[Dict[str, os.stat_result]] = None,
+    ) -> Optional[Listing]:
+        """List `dirpath` and return a tuple of sub-directory names, file names
+        and symlinks. Symlinked directories are left out of sub-directories,
+        unless `follow_links` is `True`. Symlink targets are only read if
+        `read_links` is `True`. If `file_stats` is given, it's filled with
+        the `lstat` of every file. Returns `None` if unreadable."""
+        dirs = []
+        files = []
+        links = {}
+        try:
+            with os.scandir(dirpath) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+
+                    if entry.is_symlink():
+                        links[entry.name] = ""
+                        if read_links:
+                            try:
+                                links[entry.name] = os.readlink(entry.path)
+                            except OSError:
+                                links[entry.name] = "?"
+
+                        if is_dir and not follow_links:
+                            continue
+
+                    if is_dir:
+                        dirs.append(entry.name)
+                    else:
+                        files.append(entry.name)
+                        if file_stats is not None:
+                            try:
+                                file_stats[entry.name] = entry.stat(
+                                    follow_symlinks=False
+                                )
+                            except OSError:
+                                pass
+        except OSError:
+            return None
+
+        return dirs, files, links
+
+    @classmethod
+    def _scandir_cached(
+        cls,
+        dirpath: str,
+        relpath: str,
+        stat: os.stat_result,
+        old_dirs: Dict[str, list],
+        new_dirs: Dict[str, list],
+        cutoff: int,
+        follow_links: bool = False,
+        read_links: bool = False,
+    ) -> Optional[Listing]:
+        """Same as `_scandir`, but reuses the listing from `old_dirs` when
+        the directory's mtime & inode are unchanged. Records into `new_dirs`."""
+        cached = old_dirs.get(relpath)
+        if (
+            cached is not None
+            and cached[0] == stat.st_mtime_ns
+            and cached[1] == stat.st_ino
+        ):
+            new_dirs[relpath] = cached
+            return cached[2], cached[3], {}
+
+        listing = cls._scandir(dirpath, follow_links, read_links)
+        if listing is None:
+            return None
+
+        # Too recent to be trusted next time? Symlinks can change their
+        # target's type without touching the mtime, so those aren't cached.
+        dirs, files, links = listing
+        if stat.st_mtime_ns < cutoff and not links:
+            new_dirs[relpath] = [stat.st_mtime_ns, stat.st_ino, dirs, files]
+
+        return listing
+
+
+class TreeColumns:
+    """
+    ### Tree Columns
+    Extracted tree with metadata, stored column-wise (parallel arrays)
+    instead of a tuple per entry. Entry `i` is made up of `types[i]`,
+    `names[i]`, `depths[i]`, `sizes[i]`, `modes[i]` and `mtimes[i]`.
+
+    Indexing/Iterating yields `(TYPE, NAME, DEPTH)` tuples, so it can be
+    used wherever the output of `Extractor.extract` is expected.
+    """
+
+    TYPES = ("directory", "file", "comment")
+    TYPE_CODES = {type_: code for code, type_ in enumerate(TYPES)}
+
+    __slots__ = ("types", "names", "depths", "sizes", "modes", "mtimes")
+
+    def __init__(self):
+        self.types = array("B")  # Index into `TYPES`
+        self.names: List[str] = []
+        self.depths = array("I")
+        self.sizes = array("q")  # Bytes
+        self.modes = array("I")  # `st_mode`
+        self.mtimes = array("q")  # Nanoseconds since epoch
+
+    def append(
+        self,
+        entry: Tuple[str, str, int],
+        stat: Optional[os.stat_result] = None,
+    ):
+        """Append an entry (and its metadata, zeros if `stat` is `None`)."""
+        self.types.append(self.TYPE_CODES[entry[0]])
+        self.names.append(entry[1])
+        self.depths.append(entry[2])
+        if stat is None:
+            self.sizes.append(0)
+            self.modes.append(0)
+            self.mtimes.append(0)
+        else:
+            self.sizes.append(stat.st_size)
+            self.modes.append(stat.st_mode)
+            self.mtimes.append(stat.st_mtime_ns)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, index: int) -> Tuple[str, str, int]:
+        return (self.TYPES[self.types[index]], self.names[index], self.depths[index])
 
-        return tree
+    def __iter__(self) -> Iterator[Tuple[str, str, int]]:
+        types = self.TYPES
+        for code, name, depth in zip(self.types, self.names, self.depths):
+            yield (types[code], name, depth)
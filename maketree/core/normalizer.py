@@ -30,6 +30,8 @@ class Normalizer:
         """
         dirs = []  # Holds normalized dirs
         files = []  # Holds normalized files
+        seen_dirs = set()  # Same as above (for de-duplication)
+        seen_files = set()
 
         def traverse(node: Dict, path: List):
             for child in node.get("children", []):
@@ -38,13 +40,15 @@ class Normalizer:
 
                 if child["type"] == "directory":
                     # Add if not already
-                    if str_path not in dirs:
+                    if str_path not in seen_dirs:
+                        seen_dirs.add(str_path)
                         dirs.append(str_path)
                     # Got Children?
                     if child["children"]:
                         traverse(child, path + [name])
                 else:  # File
-                    if str_path not in files:
+                    if str_path not in seen_files:
+                        seen_files.add(str_path)
                         files.append(str_path)
 
         traverse(
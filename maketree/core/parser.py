@@ -1,7 +1,23 @@
 """Responsible for reading and parsing the structure file (in `.tree` format),
 that users provide to define the directory structure."""
 
-from typing import List
+import io
+import mmap
+import os
+from contextlib import closing
+from itertools import count as count_from
+from maketree.core import tree_binary
+from typing import List, Dict, Tuple, Iterable, Iterator, TextIO, BinaryIO
+from typing import Any, Callable, Optional
+
+# First bytes of a gzip compressed file (`.tree.gz`)
+GZIP_MAGIC = b"\x1f\x8b"
+
+# (TYPE, NAME, INDENT, LINE)
+Entry = Tuple[str, str, int, int]
+
+# visit(ITEM, PARENT_STATE) -> STATE
+Visitor = Callable[[Dict, Any], Any]
 
 
 class ParseError(Exception):
@@ -10,22 +26,108 @@ class ParseError(Exception):
         self.args = args
 
 
+class _Prepended(io.RawIOBase):
+    """Reads `head` (bytes already read from `stream`), then the rest of `stream`."""
+
+    def __init__(self, head: bytes, stream: BinaryIO):
+        self.head = head
+        self.stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self.head:
+            data, self.head = self.head[: len(buffer)], self.head[len(buffer) :]
+        else:
+            read = getattr(self.stream, "read1", self.stream.read)
+            data = read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
 class Parser:
 
     @classmethod
-    def parse_file(cls, filepath: str):
-        """Parse `filepath` .tree file and return the tree in a usable format (e.g, `dict` or `list`)"""
-        with open(filepath, encoding="utf-8") as srcfile:
-            raw_data = srcfile.readlines()
+    def parse_file(
+        cls,
+        filepath: str,
+        visit: Optional[Visitor] = None,
+        root_state: Any = None,
+    ):
+        """Parse `filepath` .tree file and return the tree in a usable format (e.g, `dict` or `list`)
+
+        Gzip compressed files (`.tree.gz`) are decompressed on the fly and
+        binary files (`.treeb`) are memory-mapped. Lines are streamed, the
+        whole file is never read into memory.
+
+        See `_build_tree` for `visit` and `root_state`."""
+        # Entries closed first (parsing may stop early), then the file
+        with open(filepath, "rb") as file, closing(
+            cls._iter_file(file, filepath)
+        ) as entries:
+            return cls._build_tree(entries, visit, root_state)
+
+    @classmethod
+    def parse_string(
+        cls,
+        text: str,
+        visit: Optional[Visitor] = None,
+        root_state: Any = None,
+    ):
+        """Parse `text` (the contents of a .tree file) and return the tree,
+        same as `parse_file`. Lines are split off as they're parsed."""
+        from io import StringIO
 
-        return Parser._parse_lines(raw_data)
+        return cls._parse_lines(StringIO(text), visit, root_state)
 
     @classmethod
-    def _parse_lines(cls, lines: List[str]):
+    def load_entries(cls, filepath: str) -> List[Tuple[str, str, int]]:
+        """Load `filepath` (any format) as a flat list of `(TYPE, NAME, DEPTH)`
+        tuples, the same format `Extractor.extract` returns."""
+        with open(filepath, "rb") as file, closing(
+            cls._iter_file(file, filepath)
+        ) as entries:
+            return [(type_, name, depth) for type_, name, depth, _ in entries]
+
+    @classmethod
+    def open_stream(cls, stream: BinaryIO) -> TextIO:
+        """Wrap the binary `stream` (e.g, `sys.stdin.buffer`) for reading as
+        text, decompressing if gzipped. It's only read as lines are needed.
+
+        Raises `ParseError` for binary trees (they need a seekable file)."""
+        # A pipe may have less than that for now (peek() would return it),
+        # read until there's enough or it ends, then put it back in front
+        magic = b""
+        while len(magic) < len(tree_binary.MAGIC):
+            chunk = stream.read(len(tree_binary.MAGIC) - len(magic))
+            if not chunk:
+                break
+            magic += chunk
+        if magic == tree_binary.MAGIC:
+            raise ParseError("binary trees (.treeb) can't be streamed, use a file.")
+
+        stream = io.BufferedReader(_Prepended(magic, stream))
+        if magic[: len(GZIP_MAGIC)] == GZIP_MAGIC:
+            import gzip
+
+            return gzip.open(stream, "rt", encoding="utf-8")
+
+        return io.TextIOWrapper(stream, encoding="utf-8")
+
+    @classmethod
+    def _parse_lines(
+        cls,
+        lines: Iterable[str],
+        visit: Optional[Visitor] = None,
+        root_state: Any = None,
+    ):
         """Parse `lines` into tree structure"""
-        stack = []  # Keep track of parent dirs
-        tree = []  # Final parsed tree (list of dicts)
+        return cls._build_tree(cls._iter_lines(lines), visit, root_state)
 
+    @classmethod
+    def _iter_lines(cls, lines: Iterable[str]) -> Iterator[Entry]:
+        """Yield an entry for every non-empty, non-comment line in `lines`"""
         for i, line in enumerate(lines):
             line = line.rstrip()
 
@@ -33,53 +135,132 @@ class Parser:
             if not line:
                 continue
 
+            name = line.lstrip()
+
             # Comment?
-            if line.lstrip().startswith("//"):
+            if name.startswith("//"):
                 continue
 
             # Indentation level of current entry
-            indent_level: int = (len(line) - len(line.lstrip())) // 4
+            indent_level: int = (len(line) - len(name)) // 4
 
             if line.endswith("/"):  # Its a Directory
+                yield ("directory", name[:-1], indent_level, i + 1)  # Remove `/` too
+            else:  # Its a File
+                yield ("file", name, indent_level, i + 1)
+
+    @classmethod
+    def _iter_file(cls, file: BinaryIO, filepath: str) -> Iterator[Entry]:
+        """Yield an entry for every entry in `file` (`filepath`, opened in
+        binary mode), whichever format it's in. It's only opened once."""
+        magic = file.read(len(tree_binary.MAGIC))
+        file.seek(0)
+        if magic == tree_binary.MAGIC:
+            yield from cls._iter_binary(file, filepath)
+        elif magic[: len(GZIP_MAGIC)] == GZIP_MAGIC:
+            import gzip
+            from io import TextIOWrapper
+
+            with gzip.GzipFile(fileobj=file) as gz:
+                yield from cls._iter_lines(TextIOWrapper(gz, encoding="utf-8"))
+        else:
+            from io import TextIOWrapper
+
+            # (Detached after, `file` is closed by the caller)
+            text = TextIOWrapper(file, encoding="utf-8")
+            try:
+                yield from cls._iter_lines(text)
+            finally:
+                text.detach()
+
+    @classmethod
+    def _iter_binary(cls, file: BinaryIO, filepath: str) -> Iterator[Entry]:
+        """Yield an entry for every record in the binary `file` (`filepath`).
+        Line numbers are record numbers (i.e, lines of the `.tree` equivalent)."""
+        # (An empty file can't even be mapped)
+        if os.fstat(file.fileno()).st_size < tree_binary.HEADER.size:
+            raise ParseError("'%s' is truncated." % filepath)
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, count, strings_size = tree_binary.HEADER.unpack_from(mm)
+            if magic != tree_binary.MAGIC or version != tree_binary.VERSION:
+                raise ParseError("'%s' is not a valid .treeb file." % filepath)
+
+            records_start = tree_binary.HEADER.size
+            strings_start = records_start + count * tree_binary.RECORD.size
+            if len(mm) < strings_start + strings_size:
+                raise ParseError("'%s' is truncated." % filepath)
+
+            # Names (all at once), then Records
+            strings_end = strings_start + strings_size
+            names = mm[strings_start:strings_end].decode("utf-8").split("\0")
+            if len(names) != count + 1:
+                raise ParseError("'%s' has a corrupt string table." % filepath)
+
+            types = tree_binary.TYPES
+            with memoryview(mm) as view, view[records_start:strings_start] as records:
+                for i, (type_code, depth, _), name in zip(
+                    count_from(1),
+                    tree_binary.RECORD.iter_unpack(records),
+                    names,
+                ):
+                    if type_code >= len(types):
+                        raise ParseError(
+                            "'%s' has a corrupt record %d." % (filepath, i)
+                        )
+                    yield (types[type_code], name, depth, i)
+
+    @classmethod
+    def _build_tree(
+        cls,
+        entries: Iterable[Entry],
+        visit: Optional[Visitor] = None,
+        root_state: Any = None,
+    ) -> List[Dict]:
+        """Build the tree structure from `entries`.
+
+        If given, `visit(item, parent_state)` is called for every item as soon
+        as it's parsed, and its return value becomes the `parent_state` of the
+        item's children (`root_state` for top level items)."""
+        stack = []  # Keep track of parent dirs (INDENT, CHILDREN, STATE)
+        tree = []  # Final parsed tree (list of dicts)
+
+        for type_, name, indent_level, line in entries:
+            # Pop from stack til the correct parent
+            while stack and stack[-1][0] >= indent_level:
+                stack.pop()
+
+            # Parent's children (or Top Level, if stack is empty)
+            if stack:
+                siblings, parent_state = stack[-1][1], stack[-1][2]
+            else:
+                siblings, parent_state = tree, root_state
+
+            if type_ == "directory":
+                children = []
                 item = {
-                    "name": line.strip()[:-1],  # Remove `/` too
+                    "name": name,
                     "type": "directory",
-                    "line": i + 1,
+                    "line": line,
                     "indent": indent_level,
-                    "children": [],
+                    "children": children,
                 }
+                siblings.append(item)
 
-                # Pop from stack til the correct parent
-                while stack and stack[-1]["indent_level"] >= indent_level:
-                    stack.pop()
-
-                if stack:
-                    # Add this dir to its parent's children
-                    stack[-1]["item"]["children"].append(item)
-                else:
-                    # Top Level directory, stack is empty
-                    tree.append(item)
+                state = visit(item, parent_state) if visit else None
 
                 # Push this dir onto stack
-                stack.append({"item": item, "indent_level": indent_level})
-
-            else:  # Its a File
+                stack.append((indent_level, children, state))
+            else:
                 item = {
-                    "name": line.strip(),
+                    "name": name,
                     "type": "file",
-                    "line": i + 1,
+                    "line": line,
                     "indent": indent_level,
                 }
+                siblings.append(item)
 
-                # Pop from stack til the correct parent
-                while stack and stack[-1]["indent_level"] >= indent_level:
-                    stack.pop()
-
-                if stack:
-                    # Add this file to current parent's children
-                    stack[-1]["item"]["children"].append(item)
-                else:
-                    # Top Level file, stack empty
-                    tree.append(item)
+                if visit:
+                    visit(item, parent_state)
 
         return tree
@@ -0,0 +1,200 @@
+"""Parses, validates and normalizes a `.tree` in a single pass over its entries."""
+
+from os.path import join as join_path
+from maketree.console import Console
+from maketree.core.parser import Parser
+from maketree.core.validator import Validator, PathLimits, check_name
+from typing import List, Dict, Tuple, Iterable, Optional, Set, Union, Sequence
+
+
+class _StopParsing(Exception):
+    """Raised from inside the parser, once `max_errors` is reached."""
+
+
+class Pipeline:
+    """Fused `Parser` -> `Validator` -> `Normalizer`.
+
+    Every entry is validated and gets its normalized path the moment it's
+    parsed, instead of walking the whole tree two more times afterwards."""
+
+    @classmethod
+    def run(
+        cls,
+        filepath: str,
+        rootpath: Union[str, Sequence[str]] = ".",
+        console: Optional[Console] = None,
+        max_errors: Optional[int] = None,
+        jobs: int = 1,
+    ) -> Tuple[List[Dict], Dict[str, List[str]]]:
+        """
+        ### Run
+        Parse the `filepath` tree file, validate it and normalize its paths
+        (relative to `rootpath`).
+
+        Returns a tuple of the parsed tree and the paths dictionary (same as
+        `Parser.parse_file` and `Normalizer.normalize`). Raises `ValidationError`
+        (same messages as `Validator.validate`) if any entry is invalid.
+
+        #### Args:
+        - `filepath`: the tree file (`.tree`, `.tree.gz` or `.treeb`)
+        - `rootpath`: the root of the normalized paths. Full paths & names are
+        also checked against the length limits of its filesystem. With a list
+        of destinations, paths are relative to the tree (see `rebase_paths`) and
+        checked against the limits of every destination. An empty list gives
+        relative paths, with only names checked (e.g, to compile a plan)
+        - `max_errors`: stop after this many errors (`None` for no limit)
+        - `jobs`: validate with this many processes (see `Validator.validate`),
+        in which case validation is a separate pass over the parsed tree
+        """
+        return cls._run(
+            lambda visit, root_state: Parser.parse_file(filepath, visit, root_state),
+            rootpath,
+            console,
+            max_errors,
+            jobs,
+        )
+
+    @classmethod
+    def run_lines(
+        cls,
+        lines: Iterable[str],
+        rootpath: Union[str, Sequence[str]] = ".",
+        console: Optional[Console] = None,
+        max_errors: Optional[int] = None,
+        jobs: int = 1,
+    ) -> Tuple[List[Dict], Dict[str, List[str]]]:
+        """Same as `run`, but parses `lines` (e.g, an open file or a list of strings)."""
+        return cls._run(
+            lambda visit, root_state: Parser._parse_lines(lines, visit, root_state),
+            rootpath,
+            console,
+            max_errors,
+            jobs,
+        )
+
+    @classmethod
+    def run_string(
+        cls,
+        text: str,
+        rootpath: Union[str, Sequence[str]] = ".",
+        console: Optional[Console] = None,
+        max_errors: Optional[int] = None,
+        jobs: int = 1,
+    ) -> Tuple[List[Dict], Dict[str, List[str]]]:
+        """Same as `run`, but parses `text` (the contents of a `.tree` file)."""
+        return cls._run(
+            lambda visit, root_state: Parser.parse_string(text, visit, root_state),
+            rootpath,
+            console,
+            max_errors,
+            jobs,
+        )
+
+    @classmethod
+    def run_tree(
+        cls,
+        tree: List[Dict],
+        rootpath: Union[str, Sequence[str]] = ".",
+        console: Optional[Console] = None,
+        max_errors: Optional[int] = None,
+        jobs: int = 1,
+    ) -> Tuple[List[Dict], Dict[str, List[str]]]:
+        """Same as `run`, but for an already parsed `tree` (e.g, from a
+        `TemplateCache`). The `tree` is not modified, and is returned as is."""
+        return cls._run(
+            lambda visit, root_state: cls._visit_tree(tree, visit, root_state),
+            rootpath,
+            console,
+            max_errors,
+            jobs,
+        )
+
+    @classmethod
+    def _visit_tree(cls, tree: List[Dict], visit, root_state) -> List[Dict]:
+        """Call `visit(item, parent_state)` for every item of `tree` in line
+        order, just like `Parser` does while parsing. Returns `tree`."""
+        stack = [(item, root_state) for item in reversed(tree)]
+        while stack:
+            item, state = stack.pop()
+            child_state = visit(item, state)
+            if item.get("children"):
+                stack.extend(
+                    (child, child_state) for child in reversed(item["children"])
+                )
+
+        return tree
+
+    @classmethod
+    def _run(
+        cls,
+        parse,
+        rootpath: Union[str, Sequence[str]],
+        console: Optional[Console],
+        max_errors: Optional[int],
+        jobs: int,
+    ) -> Tuple[List[Dict], Dict[str, List[str]]]:
+        """Call `parse(visit, root_state)` with a visitor that validates and
+        normalizes each item, and return the tree and paths."""
+        validate = jobs == 1
+        roots: Union[str, List[str]]
+        if isinstance(rootpath, (list, tuple)):
+            roots, rootpath = [str(root) for root in rootpath], ""
+        else:
+            roots = rootpath = str(rootpath)
+        limits = PathLimits(roots) if roots else None
+
+        dirs: List[str] = []  # Holds normalized dirs
+        files: List[str] = []  # Holds normalized files
+        seen_dirs: Set[str] = set()  # Same as above (for de-duplication)
+        seen_files: Set[str] = set()
+        errors: List[Tuple[Dict, str]] = []  # (ITEM, REASON)
+
+        # State of every directory: (NORMALIZED PATH, FULL PATH LENGTH)
+        def visit(item: Dict, parent: Tuple[str, int]) -> Tuple[str, int]:
+            name = item["name"]
+            parent_path, parent_length = parent
+
+            length = 0
+            if validate:
+                valid = check_name(item["type"], name)
+                if limits:
+                    # Children's lengths need it, whether this name is valid or not
+                    length, fits = limits.check(name, parent_length)
+                    if valid is True:
+                        valid = fits
+                if valid is not True:
+                    errors.append((item, valid))
+                    if max_errors and len(errors) >= max_errors:
+                        raise _StopParsing()
+
+            path = join_path(parent_path, name)
+            if item["type"] == "directory":
+                if path not in seen_dirs:
+                    seen_dirs.add(path)
+                    dirs.append(path)
+            elif path not in seen_files:
+                seen_files.add(path)
+                files.append(path)
+
+            return path, length
+
+        try:
+            tree = parse(visit, (rootpath, limits.root_length if limits else 0))
+        except _StopParsing:
+            tree = []
+
+        if errors:
+            raise Validator.error(errors, console)
+
+        # Validate separately (in parallel)
+        if not validate:
+            Validator.validate(
+                tree,
+                console=console,
+                max_errors=max_errors,
+                jobs=jobs,
+                root=roots or None,
+                size=len(dirs) + len(files),  # No fewer than its distinct names
+            )
+
+        return tree, {"directories": dirs, "files": files}
@@ -0,0 +1,180 @@
+"""Compiled build plans (`.plan`): the validated & normalized paths of a `.tree`, ready to build.
+
+```
+maketree-plan	1	10	6
+D	src
+F	src/app.py
+F	README.md
+```
+
+The header holds the format version, then the length of the longest path &
+name (see `path_length`), so a plan is checked against the limits of a
+destination without looking at every path. Then one operation per line, in
+build order: `D` (make directory) or `F` (create file), a tab and the path,
+relative and `/`-separated. Names can't contain tabs or newlines (`Validator`).
+"""
+
+import os
+from os.path import basename
+from maketree.core.parser import ParseError
+from maketree.utils import path_length
+from typing import List, Dict, Tuple, Union, Optional
+
+MAGIC = "maketree-plan"
+VERSION = 1
+EXTENSION = ".plan"
+
+
+class Plan:
+    """
+    ### Plan
+    Compile a `.tree` into a `.plan` once, then build it as many times as
+    needed without parsing, validating or normalizing it again.
+
+    ```
+    count = Plan.compile("app.tree", "app.plan")
+    paths, lengths = Plan.load("app.plan")
+    valid = Plan.check(lengths, "dst")
+    TreeBuilder.build(rebase_paths(paths, "dst"))
+    ```
+    """
+
+    @classmethod
+    def compile(
+        cls,
+        filepath: str,
+        dst: str,
+        console=None,
+        max_errors: Optional[int] = None,
+        jobs: int = 1,
+    ) -> int:
+        """Parse & validate the `filepath` tree file and write its plan into
+        `dst`. Raises the same errors as `Pipeline.run`. Returns the number
+        of operations written.
+
+        Lengths aren't checked here (only recorded), but against the real
+        destination when the plan is loaded (see `check`)."""
+        from maketree.core.pipeline import Pipeline
+
+        _, paths = Pipeline.run(
+            filepath, [], console=console, max_errors=max_errors, jobs=jobs
+        )
+        cls.write(paths, dst)
+        return len(paths["directories"]) + len(paths["files"])
+
+    @classmethod
+    def write(cls, paths: Dict[str, List[str]], filepath: str):
+        """Write the (relative) `paths` dictionary as a plan into `filepath`."""
+        dirs, files = paths["directories"], paths["files"]
+        max_path = max_name = 0
+        for path in dirs + files:
+            max_path = max(max_path, path_length(path))
+            max_name = max(max_name, path_length(basename(path)))
+
+        with open(filepath, "w", encoding="utf-8", newline="\n") as f:
+            f.write("%s\t%d\t%d\t%d\n" % (MAGIC, VERSION, max_path, max_name))
+            for op, op_paths in (("D", dirs), ("F", files)):
+                for path in op_paths:
+                    if os.sep != "/":
+                        path = path.replace(os.sep, "/")
+                    f.write("%s\t%s\n" % (op, path))
+
+    @classmethod
+    def load(cls, filepath: str) -> Tuple[Dict[str, List[str]], Tuple[int, int]]:
+        """
+        ### Load
+        Read the plan `filepath`. Returns a tuple of the paths dictionary
+        (relative, see `rebase_paths`) and the lengths of the longest path & name.
+
+        Raises `ParseError` if `filepath` is not a valid plan.
+        """
+        with open(filepath, encoding="utf-8", newline="\n") as f:
+            header = f.readline().rstrip("\n").split("\t")
+            # Only "\n" ends a line, names may hold other line breaks (U+2028, ...)
+            lines = f.read().split("\n")
+        if lines and not lines[-1]:
+            lines.pop()
+
+        if (
+            len(header) != 4
+            or header[0] != MAGIC
+            or not all(field.isdigit() for field in header[1:])
+        ):
+            raise ParseError("'%s' is not a valid plan." % filepath)
+        if int(header[1]) != VERSION:
+            raise ParseError(
+                "'%s' is a version %s plan, expected %d (compile it again)."
+                % (filepath, header[1], VERSION)
+            )
+
+        dirs: List[str] = []
+        files: List[str] = []
+        ops = {"D": dirs, "F": files}
+        for number, line in enumerate(lines, start=2):
+            op_paths = ops.get(line[:1])
+            if op_paths is None or line[1:2] != "\t" or len(line) < 3:
+                raise ParseError("'%s' is corrupt at line %d." % (filepath, number))
+            # Not validated, but never built outside of the destination
+            if not cls.is_safe(line[2:]):
+                raise ParseError(
+                    "'%s' has an unsafe path at line %d: %r"
+                    % (filepath, number, line[2:])
+                )
+            op_paths.append(line[2:])
+
+        if os.sep != "/":
+            dirs = [path.replace("/", os.sep) for path in dirs]
+            files = [path.replace("/", os.sep) for path in files]
+
+        lengths = (int(header[2]), int(header[3]))
+        return {"directories": dirs, "files": files}, lengths
+
+    @classmethod
+    def is_safe(cls, path: str) -> bool:
+        """Is `path` (relative, `/`-separated) inside the directory it's
+        built into? Absolute paths, drive letters (`C:`), backslashes and
+        empty, `.` or `..` components are rejected."""
+        if "\\" in path or "\0" in path or ":" in path:
+            return False
+        return all(part not in ("", ".", "..") for part in path.split("/"))
+
+    @classmethod
+    def check(cls, lengths: Tuple[int, int], root: str) -> Union[bool, str]:
+        """Check the longest path & name of a plan (`lengths`, from `load`)
+        against the limits of `root`'s filesystem. Returns `True` if they
+        fit, the reason (`str`) if not."""
+        from maketree.core.validator import PathLimits
+
+        max_path, max_name = lengths
+        limits = PathLimits(root)
+        if max_name > limits.name_max:
+            return "names cannot be longer than %d %s on this filesystem" % (
+                limits.name_max,
+                limits.unit,
+            )
+
+        length = limits.root_length + 1 + max_path
+        if length >= limits.path_max:
+            return "the full path would be %d %s long, the limit is %d" % (
+                length,
+                limits.unit,
+                limits.path_max - 1,
+            )
+
+        return True
+
+    @classmethod
+    def to_tree(cls, paths: Dict[str, List[str]]) -> List[Dict]:
+        """Returns the (relative) `paths` as a tree (same structure as
+        `Parser.parse_file`), e.g, to print it. Directories come first."""
+        tree: List[Dict] = []
+        children = {"": tree}  # DIRPATH: ITS CHILDREN
+        for type_, key in (("directory", "directories"), ("file", "files")):
+            for path in paths[key]:
+                parent, _, name = path.rpartition(os.sep)
+                item = {"type": type_, "name": name}
+                if type_ == "directory":
+                    item["children"] = children[path] = []
+                children.setdefault(parent, tree).append(item)
+
+        return tree
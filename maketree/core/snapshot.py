@@ -0,0 +1,61 @@
+"""Stores directory mtimes/inodes of an extracted tree, so later extractions
+of the same tree can skip re-listing directories that haven't changed."""
+
+import json
+from os.path import exists
+from typing import Dict, Any
+
+
+class Snapshot:
+    """Load & Save the snapshot used by `Extractor` in incremental mode.
+
+    ```
+    # Snapshot Structure
+    {
+        "version": 1,
+        "root": "/abs/path/to/extracted/dir",
+        "dirs": {
+            # RELPATH: [MTIME_NS, INODE, [SUBDIRS], [FILES]]
+            "": [1700000000000000000, 1234, ["src"], ["README.md"]],
+            "src": [1700000000000000000, 1235, [], ["main.py"]],
+        },
+    }
+    ```
+    """
+
+    VERSION = 1
+    EXTENSION = ".snap"
+
+    @classmethod
+    def new(cls) -> Dict[str, Any]:
+        """Return an empty snapshot."""
+        return {"version": cls.VERSION, "root": "", "dirs": {}}
+
+    @classmethod
+    def path_for(cls, treefile: str) -> str:
+        """Return the snapshot filepath that belongs to `treefile`."""
+        return "%s%s" % (treefile, cls.EXTENSION)
+
+    @classmethod
+    def load(cls, filepath: str) -> Dict[str, Any]:
+        """Load the snapshot from `filepath`. Returns an empty snapshot if
+        the file doesn't exist, is unreadable or has a different version."""
+        if not exists(filepath):
+            return cls.new()
+
+        try:
+            with open(filepath, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return cls.new()
+
+        if not isinstance(snapshot, dict) or snapshot.get("version") != cls.VERSION:
+            return cls.new()
+
+        return snapshot
+
+    @classmethod
+    def save(cls, snapshot: Dict[str, Any], filepath: str):
+        """Write the `snapshot` into `filepath` (compact JSON)."""
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
@@ -0,0 +1,69 @@
+"""Keeps parsed `.tree` files in memory, for processes that build the same templates over and over."""
+
+import os
+from collections import OrderedDict
+from threading import Lock
+from maketree.core.parser import Parser
+from typing import List, Dict, Tuple
+
+# Max number of parsed templates kept
+TEMPLATE_CACHE_SIZE = 64
+
+
+class TemplateCache:
+    """
+    ### Template Cache
+    Parsed trees, keyed by the absolute path of their file. An entry is only
+    reused while the file's mtime & size are unchanged, so edited templates
+    are parsed again. Least recently used templates are dropped first.
+
+    Trees are shared, don't modify them (`Pipeline.run_tree` doesn't).
+    Safe to use from multiple threads.
+
+    ```
+    templates = TemplateCache()
+    tree = templates.get("app.tree")  # Parsed
+    tree = templates.get("app.tree")  # Cached
+    tree, paths = Pipeline.run_tree(tree, "dst")
+    ```
+    """
+
+    def __init__(self, maxsize: int = TEMPLATE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        # ABSPATH: ((MTIME_NS, SIZE), TREE)
+        self._trees: "OrderedDict[str, Tuple[Tuple[int, int], List[Dict]]]"
+        self._trees = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, filepath: str) -> List[Dict]:
+        """Return the parsed tree of `filepath` (any format), parsing it only
+        if it's not cached or has changed. Raises the same errors as
+        `Parser.parse_file`."""
+        path = os.path.abspath(filepath)
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._trees.get(path)
+            if cached is not None and cached[0] == version:
+                self._trees.move_to_end(path)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        tree = Parser.parse_file(path)
+
+        with self._lock:
+            self._trees[path] = (version, tree)
+            self._trees.move_to_end(path)
+            while len(self._trees) > self.maxsize:
+                self._trees.popitem(last=False)
+
+        return tree
+
+    def clear(self):
+        """Drop all cached templates."""
+        with self._lock:
+            self._trees.clear()
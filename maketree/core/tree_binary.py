@@ -0,0 +1,25 @@
+"""Layout of the compact binary `.treeb` format (read by `Parser`, written by `TreeWriter`).
+
+```
+HEADER   MAGIC (8s) | VERSION (H) | padding (2x) | COUNT (I) | STRINGS_SIZE (I)
+RECORDS  COUNT x [ TYPE (B) | padding (x) | DEPTH (H) | NAME_OFFSET (I) ]
+STRINGS  UTF-8 names, NUL-terminated, in record order
+```
+
+All integers are little-endian. `NAME_OFFSET` is the byte offset of the name
+in STRINGS. Since names are in record order, the whole table can also be
+decoded at once and split at the NULs (that's what `Parser` does).
+"""
+
+from struct import Struct
+
+MAGIC = b"MKTREEB\0"
+VERSION = 1
+EXTENSION = ".treeb"
+
+HEADER = Struct("<8sHxxII")
+RECORD = Struct("<BxHI")
+
+# Record TYPE codes
+TYPES = ("directory", "file")
+TYPE_CODES = {type_: code for code, type_ in enumerate(TYPES)}
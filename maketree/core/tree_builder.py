@@ -2,9 +2,12 @@
 based on the parsed data from the structure file."""
 
 import os
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, TYPE_CHECKING
 from maketree.console import Console
 
+if TYPE_CHECKING:
+    from maketree.progress import Progress
+
 
 class TreeBuilder:
     """Build the tree parsed from `.tree` file"""
@@ -16,6 +19,9 @@ class TreeBuilder:
         console: Optional[Console] = None,
         skip: bool = False,
         overwrite: bool = False,
+        progress: Optional["Progress"] = None,
+        operations: Optional[Dict[str, int]] = None,
+        errors: Optional[List[Tuple[str, OSError]]] = None,
     ) -> Tuple[int, int]:
         """
         ### Build
@@ -25,43 +31,113 @@ class TreeBuilder:
         - `paths`: the paths dictionary
         - `skip`: skips existing files
         - `overwrite`: overwrites existing files
+        - `progress`: a (started) progress meter, updated for every path
+        - `operations`: a dict to count the filesystem operations issued in
+        (`mkdir`, `open`), e.g, for `--profile`
+        - `errors`: a list to collect `(PATH, OSError)` in, instead of raising
+        on the first entry that can't be created (e.g, for `--watch`)
         - `verbose`: print messages while creating dirs/files
         - `no_color`: print messages without colors
 
         Returns a `tuple[int, int]` containing the number of
         dirs and files created, in that order.
         """
-        # Console instance from CLI
-        cls.console = console
+        # (Passed along, never kept, so builds can run in parallel threads)
+        console = console or Console(verbose=False, no_color=True)
 
         # Create directories
-        dirs_created = cls.create_dirs(paths["directories"])
+        dirs_created = cls.create_dirs(
+            paths["directories"], console, progress, operations, errors
+        )
 
         # Create Files
         files_created = cls.create_files(
             paths["files"],
             skip=skip,
             overwrite=overwrite,
+            console=console,
+            progress=progress,
+            operations=operations,
+            errors=errors,
         )
 
         return (dirs_created, files_created)
 
     @classmethod
-    def create_dirs(cls, dirs: List[str]) -> int:
+    def build_many(
+        cls,
+        plans: List[Tuple[str, Dict[str, List[str]]]],
+        console: Optional[Console] = None,
+        skip: bool = False,
+        overwrite: bool = False,
+        progress: Optional["Progress"] = None,
+        operations: Optional[Dict[str, int]] = None,
+    ) -> List[Tuple[int, int]]:
+        """Same as `build`, for every `(DESTINATION, PATHS)` in `plans`, in
+        parallel threads if more than one. Returns the counts of each.
+        Destinations must be distinct (see `unique_paths`), or threads race."""
+        if len(plans) == 1:
+            dst_paths = plans[0][1]
+            return [
+                cls.build(dst_paths, console, skip, overwrite, progress, operations)
+            ]
+
+        # Counted per thread, added up after
+        counters = [{} if operations is not None else None for _ in plans]
+
+        def build(plan, counter):
+            return cls.build(plan[1], console, skip, overwrite, progress, counter)
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=min(len(plans), 32)) as executor:
+            counts = list(executor.map(build, plans, counters))
+
+        if operations is not None:
+            for counter in counters:
+                for name, count in counter.items():
+                    operations[name] = operations.get(name, 0) + count
+        return counts
+
+    @classmethod
+    def create_dirs(
+        cls,
+        dirs: List[str],
+        console: Optional[Console] = None,
+        progress: Optional["Progress"] = None,
+        operations: Optional[Dict[str, int]] = None,
+        errors: Optional[List[Tuple[str, OSError]]] = None,
+    ) -> int:
         """Create files with names found in `files`.
         Returns the number of dirs created."""
         count = 0
+        console = console or Console(verbose=False, no_color=True)
+        events = console.events
         for path in dirs:
+            if progress:
+                progress.update(path)
             try:
                 os.mkdir(path)  # Create the directory
                 count += 1
-                cls.console.print("[D] Creating '%s'" % path, "light_green")
+                console.print("[D] Creating '%s'" % path, "light_green")
+                if events:
+                    events.emit("created", type="directory", path=path)
 
             except FileExistsError:
-                cls.console.print(
+                console.print(
                     "[D] Skipping '%s', already exists" % path,
                     "light_yellow",
                 )
+                if events:
+                    events.emit("skipped", type="directory", path=path)
+            except OSError as e:
+                if errors is None:
+                    raise
+                errors.append((path, e))
+
+        # One mkdir per path (counted once, not in the loop)
+        if operations is not None:
+            operations["mkdir"] = operations.get("mkdir", 0) + len(dirs)
         return count
 
     @classmethod
@@ -70,30 +146,53 @@ class TreeBuilder:
         files: List[str],
         skip: bool = False,
         overwrite: bool = False,
+        console: Optional[Console] = None,
+        progress: Optional["Progress"] = None,
+        operations: Optional[Dict[str, int]] = None,
+        errors: Optional[List[Tuple[str, OSError]]] = None,
     ) -> int:
         """Create files with names found in `files`. Returns the number of files created."""
         count = 0
+        overwritten = 0
+        console = console or Console(verbose=False, no_color=True)
+        events = console.events
         for path in files:
+            if progress:
+                progress.update(path)
             try:
                 # Create file
                 with open(path, "x") as _:
-                    cls.console.print("[f] Creating '%s'" % path, "light_green")
+                    console.print("[f] Creating '%s'" % path, "light_green")
 
                 count += 1
+                if events:
+                    events.emit("created", type="file", path=path)
             except FileExistsError:
                 # Skip file
                 if skip:
-                    cls.console.print(
+                    console.print(
                         "[F] Skipping '%s', already exists" % path,
                         "light_yellow",
                     )
+                    if events:
+                        events.emit("skipped", type="file", path=path)
                     continue
 
                 # Overwrite file
                 if overwrite:
                     count += 1
-                    cls.console.print("[F] Overwriting '%s'" % path, "light_blue")
+                    overwritten += 1
+                    console.print("[F] Overwriting '%s'" % path, "light_blue")
+                    if events:
+                        events.emit("overwritten", type="file", path=path)
                     with open(path, "w") as _:
                         continue
+            except OSError as e:
+                if errors is None:
+                    raise
+                errors.append((path, e))
 
+        # One open per path, and another per overwritten file
+        if operations is not None:
+            operations["open"] = operations.get("open", 0) + len(files) + overwritten
         return count
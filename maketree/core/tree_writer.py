@@ -1,10 +1,26 @@
 """Contains logic for writing extracted tree structure into a .tree file"""
 
+import io
+import re
+import gzip
 from os.path import join, exists
 from maketree.console import Console
+from maketree.core import tree_binary
+from maketree.core.parser import Parser
 from maketree.utils import incremented_filename
 
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Iterable, TextIO, BinaryIO, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from maketree.core.extractor import TreeColumns
+
+# Lines formatted before each `writelines`, and size of the file buffer
+WRITE_BATCH_SIZE = 4096
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Names with these (legal on POSIX) would break `.tsv` rows, they're escaped
+TSV_SPECIAL = re.compile(r"[\\\t\n\r]")
+TSV_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
 
 
 class TreeWriter:
@@ -17,6 +33,8 @@ class TreeWriter:
         extracted_tree: List[Tuple[str, str, int]],
         console: Console,
         save_to: str = ".",
+        compress: bool = False,
+        binary: bool = False,
     ) -> str:
         """
         ### Write
@@ -25,28 +43,232 @@ class TreeWriter:
         #### Args:
         - `extracted_tree`: the tree list extracted by `Extractor` class
         - `save_to`: where to save the final `.tree` file
+        - `compress`: write a gzip compressed `.tree.gz` file instead
+        - `binary`: write a binary `.treeb` file instead
         """
         assert exists(save_to), "'%s' does not exists" % save_to
 
-        spacer = "    "  # Spacer for indentation
+        if binary:
+            extension = tree_binary.EXTENSION
+        elif compress:
+            extension = ".tree.gz"
+        else:
+            extension = ".tree"
 
         # Non-Existent filename (Folder-Name or Timestamp)
         filename = join(save_to, extracted_tree[0][1])
-        filename = incremented_filename("%s.tree" % filename)
+        filename = incremented_filename(filename + extension, extension=extension)
 
         console.verbose("Creating %s..." % filename)
+        console.verbose("Writing tree to %s..." % filename)
+        cls.write_file(extracted_tree, filename)
 
-        # Write the tree
-        with open(filename, "w", encoding="utf-8") as f:
-            console.verbose("Writing tree to %s..." % filename)
-            for entry in extracted_tree:
-                f.write(
-                    "%s%s%s\n"
-                    % (
-                        spacer * entry[2],
-                        entry[1],
-                        "/" if entry[0] == "directory" else "",
-                    )
-                )
+        return filename
+
+    @classmethod
+    def write_file(
+        cls,
+        extracted_tree: Iterable[Tuple[str, str, int]],
+        filename: str,
+    ):
+        """Write the `extracted_tree` into `filename` (overwrites it). The format
+        is picked from the extension: `.treeb` binary, `.gz` gzip compressed
+        text, and plain text for everything else."""
+        if filename.endswith(tree_binary.EXTENSION):
+            with open(filename, "wb") as f:
+                cls.write_binary(extracted_tree, f)
+            return
+
+        if filename.endswith(".gz"):
+            f = gzip.open(filename, "wt", encoding="utf-8", compresslevel=6)
+        else:
+            f = open(filename, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+
+        with f:
+            cls.write_lines(extracted_tree, f)
+
+    @classmethod
+    def write_binary(
+        cls,
+        extracted_tree: Iterable[Tuple[str, str, int]],
+        file: BinaryIO,
+    ):
+        """Write the `extracted_tree` in binary `.treeb` format (see
+        `maketree.core.tree_binary`) into an open binary `file`.
+        Comments are left out. Names must not contain NUL characters
+        (which `Validator` doesn't allow anyway)."""
+        records = bytearray()
+        strings = bytearray()
+        count = 0
+
+        pack = tree_binary.RECORD.pack
+        type_codes = tree_binary.TYPE_CODES
+        for type_, name, depth in extracted_tree:
+            if type_ == "comment":
+                continue
+            records += pack(type_codes[type_], depth, len(strings))
+            strings += name.encode("utf-8")
+            strings += b"\0"
+            count += 1
+
+        file.write(
+            tree_binary.HEADER.pack(
+                tree_binary.MAGIC,
+                tree_binary.VERSION,
+                count,
+                len(strings),
+            )
+        )
+        file.write(records)
+        file.write(strings)
+
+    @classmethod
+    def convert(cls, src: str, dst: str) -> int:
+        """
+        ### Convert
+        Convert the tree file `src` into `dst`, between `.tree`, `.tree.gz` and
+        `.treeb` formats (picked by the extension of `dst`, see `write_file`).
+
+        Returns the number of entries converted. Comments are not carried over.
+        """
+        entries = Parser.load_entries(src)
+        cls.write_file(entries, dst)
+        return len(entries)
+
+    @classmethod
+    def write_stream(
+        cls,
+        extracted_tree: Iterable[Tuple[str, str, int]],
+        stream: BinaryIO,
+        compress: bool = False,
+        binary: bool = False,
+    ):
+        """Write the `extracted_tree` into an open binary `stream` (e.g,
+        `sys.stdout.buffer`), as text, gzip compressed text or `.treeb`.
+        The `stream` is flushed, but not closed."""
+        if binary:
+            cls.write_binary(extracted_tree, stream)
+        elif compress:
+            with gzip.GzipFile(fileobj=stream, mode="wb", compresslevel=6) as gz:
+                cls.write_stream(extracted_tree, gz)
+        else:
+            text = io.TextIOWrapper(stream, encoding="utf-8")
+            try:
+                cls.write_lines(extracted_tree, text)
+                text.flush()
+            finally:
+                text.detach()  # Leave `stream` open
+
+        stream.flush()
+
+    @classmethod
+    def write_lines(
+        cls,
+        extracted_tree: Iterable[Tuple[str, str, int]],
+        file: TextIO,
+    ):
+        """Write the `extracted_tree` in `.tree` format into an open text `file`.
+        Lines are formatted in batches and written with `writelines`."""
+        indents: List[str] = []  # Indentation for each depth
+        batch: List[str] = []
+
+        for type_, name, depth in extracted_tree:
+            while len(indents) <= depth:
+                indents.append("    " * len(indents))
+
+            if type_ == "directory":
+                batch.append("%s%s/\n" % (indents[depth], name))
+            elif type_ == "comment":  # Comments (e.g, symlink marks)
+                batch.append("%s// %s\n" % (indents[depth], name))
+            else:
+                batch.append("%s%s\n" % (indents[depth], name))
+
+            if len(batch) >= WRITE_BATCH_SIZE:
+                file.writelines(batch)
+                batch.clear()
+
+        file.writelines(batch)
+
+    @classmethod
+    def write_metadata(
+        cls,
+        columns: "TreeColumns",
+        console: Console,
+        save_to: str = ".",
+    ) -> str:
+        """
+        ### Write Metadata
+        Write the `columns` (extracted by `Extractor.extract_columns`) into a
+        tab-separated `.tsv` file and return the filename.
+
+        One row per entry (comments are left out), paths relative to the
+        extracted directory (directories end with `/`):
+        ```
+        path    type    size    mode    mtime_ns
+        ./      directory   4096    40755   1700000000000000000
+        src/    directory   4096    40755   1700000000000000000
+        src/main.py file    120 100644  1700000000000000000
+        ```
+        `mode` is the octal `st_mode`, `mtime_ns` is nanoseconds since epoch.
+        Backslashes, tabs & newlines in names are escaped (`\\\\`, `\\t`, `\\n`,
+        `\\r`), so every row stays one line of 5 columns.
+
+        #### Args:
+        - `columns`: the columns extracted by `Extractor.extract_columns`
+        - `save_to`: where to save the final `.tsv` file
+        """
+        assert exists(save_to), "'%s' does not exists" % save_to
+
+        # Non-Existent filename (Folder-Name)
+        filename = join(save_to, columns.names[0])
+        filename = incremented_filename("%s.tsv" % filename)
+
+        console.verbose("Writing metadata to %s..." % filename)
+
+        with open(filename, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
+            cls.write_metadata_lines(columns, f)
 
         return filename
+
+    @classmethod
+    def write_metadata_lines(cls, columns: "TreeColumns", file: TextIO):
+        """Write the `columns` as tab-separated rows (see `write_metadata`)
+        into an open text `file`."""
+        parents: List[str] = []  # Parent dir path at each depth
+        types = columns.TYPES
+        batch: List[str] = ["path\ttype\tsize\tmode\tmtime_ns\n"]
+
+        for i in range(len(columns)):
+            type_ = types[columns.types[i]]
+            if type_ == "comment":
+                continue
+
+            # Root is "" (shown as "./"), everything else relative to it
+            depth = columns.depths[i]
+            name = columns.names[i]
+            if TSV_SPECIAL.search(name):
+                name = name.translate(TSV_ESCAPES)
+            path = parents[depth - 1] + name if depth else ""
+
+            if type_ == "directory":
+                if depth:
+                    path += "/"
+                del parents[depth:]
+                parents.append(path)
+
+            batch.append(
+                "%s\t%s\t%d\t%o\t%d\n"
+                % (
+                    path or "./",
+                    type_,
+                    columns.sizes[i],
+                    columns.modes[i],
+                    columns.mtimes[i],
+                )
+            )
+
+            if len(batch) >= WRITE_BATCH_SIZE:
+                file.writelines(batch)
+                batch.clear()
+
+        file.writelines(batch)
@@ -1,47 +1,310 @@
-from maketree.utils import is_valid_dir, is_valid_file
+import os
+import sys
+from functools import lru_cache
+from os.path import abspath
+from maketree.utils import is_valid_dir, is_valid_file, get_path_limits, path_length
 from maketree.console import Console
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union, Tuple, Set, Sequence
+
+# Max number of distinct names whose validity is remembered
+NAME_CACHE_SIZE = 65536
+
+# Below this many distinct names, starting a process pool costs more than
+# it saves (a name takes about a microsecond to check), so it's done serially
+PARALLEL_MIN_NAMES = 100_000
 
 
 class ValidationError(Exception):
-    def __init__(self, *args: object) -> None:
+    """Raised by `Validator.validate`. `errors` holds the formatted error
+    messages, `details` a dict per error (`line`, `type`, `name`, `reason`)."""
+
+    def __init__(
+        self,
+        *args: object,
+        errors: Optional[List[str]] = None,
+        details: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
         super().__init__(*args)
         self.args = args
+        self.errors = errors or [str(arg) for arg in args]
+        self.details = details or []
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def check_name(type_: str, name: str) -> Union[bool, str]:
+    """Validate `name` of a `type_` ("directory" or "file") entry. Results
+    are cached, since names like `src` or `__init__.py` repeat a lot."""
+    if type_ == "directory":
+        return is_valid_dir(name)
+    return is_valid_file(name)
+
+
+def check_names(names: List[Tuple[str, str]]) -> List[Tuple[str, str, str]]:
+    """Validate `(TYPE, NAME)` pairs and return `(TYPE, NAME, REASON)` for the
+    invalid ones. Runs in the worker processes of parallel validation."""
+    invalid = []
+    for type_, name in names:
+        if type_ == "directory":
+            valid = is_valid_dir(name)
+        else:
+            valid = is_valid_file(name)
+
+        if valid is not True:
+            invalid.append((type_, name, valid))
+
+    return invalid
+
+
+class PathLimits:
+    """
+    ### Path Limits
+    Checks names & full paths against the length limits of the filesystem
+    that `root` is on, so too-long paths are caught before anything is
+    created (instead of failing with `ENAMETOOLONG` halfway through a build).
+    With a list of roots, the tightest limits (and longest root) apply.
+
+    Lengths are tracked incrementally: every item only adds its own name to
+    its parent's length. Start with `root_length`.
+    """
+
+    def __init__(self, root: Union[str, Sequence[str]]):
+        roots = [root] if isinstance(root, str) else root
+        limits = [get_path_limits(root) for root in roots]
+        self.path_max = min(path_max for path_max, _ in limits)
+        self.name_max = min(name_max for _, name_max in limits)
+        self.root_length = max(path_length(abspath(root)) for root in roots)
+        self.unit = "characters" if sys.platform == "win32" else "bytes"
+
+    def check(self, name: str, parent_length: int) -> Tuple[int, Union[bool, str]]:
+        """Check `name` under a parent of `parent_length`. Returns a tuple of the
+        full path length and `True` (valid) or the reason (`str`, invalid)."""
+        name_length = path_length(name)
+        length = parent_length + 1 + name_length  # +1 for the separator
+
+        if name_length > self.name_max:
+            return length, "names cannot be longer than %d %s on this filesystem" % (
+                self.name_max,
+                self.unit,
+            )
+
+        # PATH_MAX includes the terminating NUL
+        if length >= self.path_max:
+            return length, "the full path would be %d %s long, the limit is %d" % (
+                length,
+                self.unit,
+                self.path_max - 1,
+            )
+
+        return length, True
 
 
 class Validator:
     @classmethod
-    def validate(cls, tree: List[Dict], console: Optional[Console] = None):
-        cls.console = console
-
-        # Validate every item (dir/file)
-        for item in tree:
-            if item["type"] == "directory":
-                valid = is_valid_dir(item["name"])
-                # Print Error and Exit
-                if valid is not True:
-                    raise ValidationError(cls.format_error(item, error_message=valid))
+    def validate(
+        cls,
+        tree: List[Dict],
+        console: Optional[Console] = None,
+        max_errors: Optional[int] = None,
+        jobs: int = 1,
+        root: Optional[Union[str, Sequence[str]]] = None,
+        size: Optional[int] = None,
+    ):
+        """
+        ### Validate
+        Validate names of every item (dir/file) in `tree`. Does nothing on pass,
+        raises `ValidationError` containing all errors (in line order) on fail.
+
+        #### Args:
+        - `tree`: the parsed tree
+        - `max_errors`: stop after this many errors (`None` for no limit)
+        - `jobs`: number of processes to validate with (`0` for one per CPU).
+        Small trees (and single-CPU machines) are always validated serially.
+        - `root`: where the tree will be created. If given, full path & name
+        lengths are checked against the limits of its filesystem (`PathLimits`),
+        or of all of them, if a list
+        - `size`: number of items of `tree` (or more), if known. Saves
+        counting them to decide whether to validate in parallel
+        """
+        limits = PathLimits(root) if root is not None else None
+
+        # More processes than CPUs would only add overhead
+        jobs = min(jobs or os.cpu_count() or 1, os.cpu_count() or 1)
+
+        # Distinct names are at most as many as items, count those first (cheap)
+        if jobs > 1 and size is None:
+            size = cls.count(tree, limit=PARALLEL_MIN_NAMES)
+        if jobs > 1 and size >= PARALLEL_MIN_NAMES:
+            items = cls.flatten(tree)
+            names = {(item["type"], item["name"]) for item in items}
+            if len(names) >= PARALLEL_MIN_NAMES:
+                cls._validate_parallel(
+                    tree, items, names, max_errors, jobs, limits, console
+                )
+                return
+
+        errors: List[Tuple[Dict, str]] = []  # (ITEM, REASON)
+        root_length = limits.root_length if limits else 0
 
-            else:  # File
-                valid = is_valid_file(item["name"])
-                # Print Error and Exit
+        # Depth-first, in line order (no recursion, trees can be deep)
+        # (ITEM, PARENT'S PATH LENGTH)
+        stack = [(item, root_length) for item in reversed(tree)]
+        while stack:
+            item, parent_length = stack.pop()
+
+            valid = check_name(item["type"], item["name"])
+            length = 0
+            if limits:
+                # Children's lengths need it, whether this name is valid or not
+                length, fits = limits.check(item["name"], parent_length)
+                if valid is True:
+                    valid = fits
+
+            if valid is not True:
+                errors.append((item, valid))
+                if max_errors and len(errors) >= max_errors:
+                    break
+
+            # Children next (if directory)
+            if item.get("children"):
+                stack.extend((child, length) for child in reversed(item["children"]))
+
+        if errors:
+            raise cls.error(errors, console)
+
+    @classmethod
+    def _validate_parallel(
+        cls,
+        tree: List[Dict],
+        items: List[Dict],
+        names: Set[Tuple[str, str]],
+        max_errors: Optional[int],
+        jobs: int,
+        limits: Optional[PathLimits] = None,
+        console: Optional[Console] = None,
+    ):
+        """Validate the distinct `names` across a process pool, then report
+        errors for `items` (sorted by line). Falls back to serial checks if
+        a process pool can't be started on this platform. Path lengths (if
+        `limits`) are checked serially, they depend on the parents."""
+
+        # More chunks than workers, so a slow chunk doesn't hold up the rest
+        names_list = list(names)
+        size = -(-len(names_list) // (jobs * 4))  # Ceil
+        chunks = [names_list[i : i + size] for i in range(0, len(names_list), size)]
+
+        invalid: Dict[Tuple[str, str], str] = {}
+        parallel = False
+        try:
+            # Imported here, it takes longer to import than most trees to validate
+            from concurrent.futures.process import BrokenProcessPool
+            from concurrent.futures import ProcessPoolExecutor
+        except ImportError:
+            pass
+        else:
+            try:
+                with ProcessPoolExecutor(max_workers=jobs) as executor:
+                    for result in executor.map(check_names, chunks):
+                        for type_, name, reason in result:
+                            invalid[(type_, name)] = reason
+                parallel = True
+            # Can't start one here, or a worker died (e.g, killed for memory)
+            except (OSError, NotImplementedError, BrokenProcessPool):
+                invalid.clear()
+
+        if not parallel:
+            for type_, name, reason in check_names(names_list):
+                invalid[(type_, name)] = reason
+
+        # Path length errors (ID of ITEM: REASON)
+        too_long: Dict[int, str] = {}
+        if limits:
+            stack = [(item, limits.root_length) for item in tree]
+            while stack:
+                item, parent_length = stack.pop()
+                length, valid = limits.check(item["name"], parent_length)
                 if valid is not True:
-                    raise ValidationError(cls.format_error(item, error_message=valid))
+                    too_long[id(item)] = valid
+                if item.get("children"):
+                    stack.extend((child, length) for child in item["children"])
 
-            # Recurse (if directory)
+        if not invalid and not too_long:
+            return
+
+        errors: List[Tuple[Dict, str]] = []
+        for item in sorted(items, key=lambda item: item["line"]):
+            reason = invalid.get((item["type"], item["name"]), too_long.get(id(item)))
+            if reason is not None:
+                errors.append((item, reason))
+                if max_errors and len(errors) >= max_errors:
+                    break
+
+        raise cls.error(errors, console)
+
+    @classmethod
+    def error(
+        cls, errors: List[Tuple[Dict, str]], console: Optional[Console] = None
+    ) -> ValidationError:
+        """Return a `ValidationError` for `(ITEM, REASON)` tuples, messages
+        colored by `console` (if given)."""
+        messages = [
+            cls.format_error(item, error_message=reason, console=console)
+            for item, reason in errors
+        ]
+        details = [
+            {
+                "line": item["line"],
+                "type": item["type"],
+                "name": item["name"],
+                "reason": reason,
+            }
+            for item, reason in errors
+        ]
+        return ValidationError("\n\n".join(messages), errors=messages, details=details)
+
+    @classmethod
+    def count(cls, tree: List[Dict], limit: Optional[int] = None) -> int:
+        """Return the number of items (dirs/files) in `tree`, counting no
+        further than `limit` (if given)."""
+        count = 0
+        stack = [tree]
+        while stack:
+            children = stack.pop()
+            count += len(children)
+            if limit is not None and count >= limit:
+                break
+            stack.extend(item["children"] for item in children if item.get("children"))
+
+        return count
+
+    @classmethod
+    def flatten(cls, tree: List[Dict]) -> List[Dict]:
+        """Return every item (dir/file) of `tree` in a flat list, in line order."""
+        items = []
+        stack = list(reversed(tree))
+        while stack:
+            item = stack.pop()
+            items.append(item)
             if item.get("children"):
-                cls.validate(item["children"], console)
+                stack.extend(reversed(item["children"]))
+
+        return items
 
     @classmethod
-    def format_error(cls, item: Dict[str, Any], error_message: str) -> str:
+    def format_error(
+        cls,
+        item: Dict[str, Any],
+        error_message: str,
+        console: Optional[Console] = None,
+    ) -> str:
         slash = "/" if item["type"] == "directory" else ""
         spacer = "    " * item["indent"]
 
-        clr_error = cls.console.clr_error
-        label = cls.console.colored("Error:", fgcolor=clr_error)
-        reason_label = cls.console.colored("Reason:", fgcolor=cls.console.clr_primary)
-        underline = cls.console.colored(
-            "^" * len(item["name"]),
+        console = console or Console(verbose=False, no_color=True)
+        clr_error = console.clr_error
+        label = console.colored("Error:", fgcolor=clr_error)
+        reason_label = console.colored("Reason:", fgcolor=console.clr_primary)
+        underline = console.colored(
+            "^" * max(len(item["name"]), 1),
             fgcolor=clr_error,
         )
 
@@ -51,4 +314,4 @@ class Validator:
             f"{spacer}{item['name']}{slash}\n"
             f"{spacer}{underline}\n"
             f"{reason_label} {error_message}"
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,147 @@
+"""Per-phase timing & filesystem operation counts of a run, for `--profile`."""
+
+import os
+import sys
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+
+class Profiler:
+    """
+    ### Profiler
+    Records the wall time & number of entries of every phase of a run, and
+    how many filesystem operations were issued.
+
+    ```
+    profiler = Profiler()
+    with profiler.phase("parse"):
+        ...
+    profiler.entries("parse", 1000)
+    profiler.count("mkdir", 10)
+    profiler.print_report()
+    ```
+
+    A phase entered more than once adds up. Phases are reported in the
+    order they first ran.
+    """
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.finished: Optional[float] = None
+        self.phases: Dict[str, float] = {}  # PHASE: SECONDS
+        self.phase_entries: Dict[str, int] = {}  # PHASE: ENTRIES
+        self.operations: Dict[str, int] = {}  # OPERATION: COUNT
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the `with` block as (part of) phase `name`."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def entries(self, phase: str, count: int):
+        """Set the number of entries phase `phase` processed."""
+        self.phase_entries[phase] = count
+
+    def count(self, operation: str, count: int = 1):
+        """Count `count` filesystem operations of kind `operation`."""
+        self.operations[operation] = self.operations.get(operation, 0) + count
+
+    def add_operations(self, operations: Dict[str, int]):
+        """Count all of `operations` (`{OPERATION: COUNT}`)."""
+        for operation, count in operations.items():
+            self.count(operation, count)
+
+    def stop(self):
+        """Stop the total time (the run is over)."""
+        self.finished = perf_counter()
+
+    def report(self) -> Dict[str, Any]:
+        """Returns the report as a dictionary (e.g, to write as JSON)."""
+        total = (self.finished or perf_counter()) - self.started
+        phases = []
+        for name, seconds in self.phases.items():
+            entries = self.phase_entries.get(name)
+            phases.append(
+                {
+                    "phase": name,
+                    "seconds": round(seconds, 6),
+                    "entries": entries,
+                    "per_second": (
+                        round(entries / seconds) if entries and seconds else None
+                    ),
+                }
+            )
+
+        return {
+            "total_seconds": round(total, 6),
+            "phases": phases,
+            "operations": dict(self.operations),
+        }
+
+    def print_report(self, stream: Optional[TextIO] = None):
+        """Print the report as a table into `stream` (default: stderr)."""
+        stream = stream or sys.stderr
+        report = self.report()
+        total = report["total_seconds"]
+
+        print("\nProfile (wall time):", file=stream)
+        for phase in report["phases"]:
+            share = phase["seconds"] / total * 100 if total else 0.0
+            entries = (
+                "" if phase["entries"] is None else "%d entries" % phase["entries"]
+            )
+            rate = "" if phase["per_second"] is None else "(%d/s)" % phase["per_second"]
+            print(
+                "  %-12s %10.2f ms %5.1f%%  %s %s"
+                % (phase["phase"], phase["seconds"] * 1000, share, entries, rate),
+                file=stream,
+            )
+        print("  %-12s %10.2f ms" % ("total", total * 1000), file=stream)
+
+        if report["operations"]:
+            print("\nFilesystem operations:", file=stream)
+            for operation, count in report["operations"].items():
+                print("  %-12s %10d" % (operation, count), file=stream)
+
+    @classmethod
+    def is_report(cls, filepath: str) -> bool:
+        """Is `filepath` a report written by `--profile-output`?"""
+        import json
+
+        try:
+            with open(filepath, encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return isinstance(report, dict) and {"phases", "operations"} <= set(report)
+
+    @classmethod
+    def is_stats(cls, filepath: str) -> bool:
+        """Is `filepath` stats written by `cProfile` (e.g, `--cprofile`)?"""
+        import pstats
+
+        try:
+            pstats.Stats(filepath)
+        except Exception:  # Whatever unmarshalling garbage raises
+            return False
+        return True
+
+    @classmethod
+    def check_output(cls, filepath: str, kind: str = "report"):
+        """Can a `kind` (`report` or `stats`) be written into `filepath`?
+        Returns `True`, or a `str` with the reason it can't: only missing
+        files and older outputs of the same kind are (over)written."""
+        if os.path.isdir(filepath):
+            return "'%s' is a directory." % filepath
+        if not os.path.exists(filepath):
+            return True
+
+        is_output = cls.is_report if kind == "report" else cls.is_stats
+        if not is_output(filepath):
+            return "'%s' exists, and is not a profile %s." % (filepath, kind)
+        return True
@@ -0,0 +1,174 @@
+"""Live progress meter for long builds & extractions (printed from a background thread)."""
+
+import sys
+import threading
+from shutil import get_terminal_size
+from time import monotonic
+from typing import Optional, TextIO, Iterable, Iterator, Callable, TypeVar
+
+# Seconds between redraws on a terminal, and between lines otherwise
+REFRESH_INTERVAL = 0.2
+LOG_INTERVAL = 5.0
+
+T = TypeVar("T")
+
+
+class Progress:
+    """
+    ### Progress
+    Shows the number of processed entries, throughput (entries/s), ETA and
+    the path being processed while work is being done.
+
+    The worker only bumps a counter (`update`), a background thread does the
+    formatting & printing at a fixed rate, so the cost per entry stays tiny.
+    On a terminal the line is redrawn in place, otherwise (e.g, logs, CI)
+    a one-line summary is printed every `LOG_INTERVAL` seconds.
+
+    ```
+    with Progress("Building", total=len(paths)) as progress:
+        for path in paths:
+            ...
+            progress.update(path)
+    ```
+
+    #### ARGS:
+    - `label`: what's being done (e.g, `Building`)
+    - `total`: number of entries expected (`None` if unknown, no ETA then)
+    - `stream`: where to print (default: `sys.stderr`)
+    - `interval`: seconds between updates (default: depends on `stream`)
+    """
+
+    def __init__(
+        self,
+        label: str,
+        total: Optional[int] = None,
+        stream: Optional[TextIO] = None,
+        interval: Optional[float] = None,
+    ):
+        self.label = label
+        self.total = total
+        self.stream = stream or sys.stderr
+        self.tty = self.stream.isatty()
+        if interval is None:
+            interval = REFRESH_INTERVAL if self.tty else LOG_INTERVAL
+        self.interval = interval
+
+        self.count = 0
+        self.current = ""  # Last path processed
+        self._lock = threading.Lock()  # Many workers may update (build_many)
+
+        self._started = 0.0
+        self._last = (0.0, 0)  # (TIME, COUNT) of the last update
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def update(self, current: Optional[str] = None, count: int = 1):
+        """Count `count` processed entries, `current` is the path of the last one.
+        Safe to call from many threads."""
+        with self._lock:
+            self.count += count
+        if current is not None:
+            self.current = current
+
+    def track(
+        self,
+        iterable: Iterable[T],
+        current: Optional[Callable[[T], Optional[str]]] = None,
+    ) -> Iterator[T]:
+        """Yield the items of `iterable`, counting each one. `current` returns
+        the path to show for an item (or `None` to keep the previous one)."""
+        for item in iterable:
+            with self._lock:
+                self.count += 1
+            if current is not None:
+                path = current(item)
+                if path is not None:
+                    self.current = path
+            yield item
+
+    def start(self) -> "Progress":
+        """Start the background thread."""
+        self._started = monotonic()
+        self._last = (self._started, 0)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background thread and print the final state."""
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._print(final=True)
+
+    def __enter__(self) -> "Progress":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._print()
+
+    def _print(self, final: bool = False):
+        now = monotonic()
+        count = self.count
+        elapsed = now - self._started
+
+        if final:
+            rate = count / elapsed if elapsed > 0 else 0.0
+        else:
+            # Recent throughput (since the last update), shows slowdowns right away
+            last_time, last_count = self._last
+            rate = (count - last_count) / (now - last_time) if now > last_time else 0
+            self._last = (now, count)
+
+        line = self.format(count, rate, elapsed)
+        try:
+            if self.tty:
+                width = get_terminal_size().columns - 1
+                end = "\n" if final else ""
+                self.stream.write("\r\033[K%s%s" % (line[:width], end))
+            else:
+                self.stream.write("[progress] %s\n" % line)
+            self.stream.flush()
+        except (OSError, ValueError):
+            pass
+
+    def format(self, count: int, rate: float, elapsed: float) -> str:
+        """Return the progress line for `count` entries at `rate` entries/s."""
+        parts = []
+        if self.total:
+            parts.append(
+                "%s: %d/%d (%d%%)"
+                % (self.label, count, self.total, count * 100 // self.total)
+            )
+        else:
+            parts.append("%s: %d entries" % (self.label, count))
+
+        parts.append("%d/s" % rate)
+
+        if self.total and count < self.total:
+            average = count / elapsed if elapsed > 0 else 0
+            if average > 0:
+                parts.append("ETA %s" % format_seconds((self.total - count) / average))
+        else:
+            parts.append("%s elapsed" % format_seconds(elapsed))
+
+        if self.current:
+            parts.append(self.current)
+
+        return " | ".join(parts)
+
+
+def format_seconds(seconds: float) -> str:
+    """Format `seconds` as `MM:SS` (or `H:MM:SS`)."""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return "%d:%02d:%02d" % (hours, minutes, seconds)
+    return "%02d:%02d" % (minutes, seconds)
@@ -0,0 +1,241 @@
+"""Keeps maketree resident (`maketree serve`), running requests from `maketree.client` over a Unix socket."""
+
+import json
+import os
+import signal
+import sys
+import traceback
+from io import BytesIO, StringIO, TextIOWrapper
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from maketree.client import default_socket_path, private_dir, check_owner
+from typing import List, Tuple, Optional
+
+try:
+    from socketserver import ThreadingUnixStreamServer, StreamRequestHandler
+except ImportError:  # No Unix sockets (Windows)
+    ThreadingUnixStreamServer = StreamRequestHandler = None
+
+# Max size of a request line (bytes)
+MAX_REQUEST_SIZE = 1024 * 1024
+
+# Parsed templates of a worker process (see `execute`)
+_templates = None
+
+
+def check_args(argv: List[str]):
+    """Can `argv` run on the server? Returns `True`, or a `str` with the
+    reason it can't."""
+    from maketree import cli
+
+    if argv[:1] == ["compile"]:
+        return True
+
+    args = cli.parse_args(argv)
+    if args.watch:
+        # Would never return, keeping the worker busy
+        return "option --watch is not allowed by the server."
+    if args.src == "-":
+        return "cannot read the tree from stdin through the server."
+    if args.extract_tree and args.output == "-" and (args.gzip or args.binary):
+        # Responses are text
+        return "cannot stream a binary tree through the server, use -out PATH."
+    return True
+
+
+def execute(argv: List[str], cwd: str) -> Tuple[int, str, str]:
+    """
+    ### Execute
+    Run maketree with `argv` in `cwd`, and return a tuple of the exit status,
+    stdout and stderr. Runs in the worker processes of the server, one request
+    at a time per process (the working directory & `sys.stdout` are global).
+
+    Every worker keeps the `.tree` files it parsed, so repeated requests
+    for the same template skip parsing.
+    """
+    global _templates
+    from maketree import cli
+    from maketree.core.templates import TemplateCache
+
+    if _templates is None:
+        _templates = TemplateCache()
+
+    # Bytes underneath, trees are streamed to `sys.stdout.buffer` (-et -out -)
+    stdout_bytes = BytesIO()
+    stdout = TextIOWrapper(stdout_bytes, encoding="utf-8", write_through=True)
+    stderr = StringIO()
+    saved = (sys.stdin, sys.stdout, sys.stderr)
+    sys.stdin, sys.stdout, sys.stderr = StringIO(), stdout, stderr  # No prompts
+    status = 0
+    try:
+        os.chdir(cwd)
+        allowed = check_args(argv)
+        if allowed is not True:
+            print("Error: %s" % allowed, file=stderr)
+            sys.exit(2)
+        cli.main(argv, templates=_templates)
+    except SystemExit as e:
+        if e.code is None:
+            status = 0
+        elif isinstance(e.code, int):
+            status = e.code
+        else:
+            print(e.code, file=stderr)
+            status = 1
+    except Exception:
+        # Report, but keep the worker alive
+        traceback.print_exc(file=stderr)
+        status = 1
+    finally:
+        sys.stdin, sys.stdout, sys.stderr = saved
+        stdout.flush()
+
+    output = stdout_bytes.getvalue().decode("utf-8", errors="replace")
+    return status, output, stderr.getvalue()
+
+
+if ThreadingUnixStreamServer is not None:
+
+    class RequestHandler(StreamRequestHandler):
+        """Reads a request line `{"argv": [...], "cwd": "..."}` and writes
+        back a response line `{"status": 0, "stdout": "...", "stderr": "..."}`."""
+
+        def handle(self):
+            try:
+                request = json.loads(self.rfile.readline(MAX_REQUEST_SIZE))
+                argv, cwd = request["argv"], request["cwd"]
+                if not isinstance(cwd, str) or not all(
+                    isinstance(arg, str) for arg in argv
+                ):
+                    raise TypeError()
+            except (ValueError, KeyError, TypeError):
+                return self.respond(2, "", "Error: invalid request.\n")
+
+            if argv[:1] == ["serve"]:
+                return self.respond(2, "", "Error: cannot serve from the server.\n")
+
+            try:
+                status, stdout, stderr = self.server.executor.submit(
+                    execute, argv, cwd
+                ).result()
+            except Exception as e:  # e.g, a worker died
+                status, stdout, stderr = 1, "", "Error: %s\n" % e
+
+            self.respond(status, stdout, stderr)
+
+        def respond(self, status: int, stdout: str, stderr: str):
+            response = {"status": status, "stdout": stdout, "stderr": stderr}
+            try:
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+            except OSError:
+                pass  # Client went away
+
+    class Server(ThreadingUnixStreamServer):
+        """
+        ### Server
+        Accepts requests on the Unix socket at `socket_path`, and runs them
+        in a pool of `jobs` worker processes. That's also the concurrency
+        limit, more requests than workers wait for a free worker.
+        """
+
+        daemon_threads = True
+
+        def __init__(self, socket_path: str, jobs: int):
+            # Workers are spawned (not forked), the server has threads running
+            self.executor = ProcessPoolExecutor(jobs, mp_context=get_context("spawn"))
+            self.socket_path = socket_path
+
+            # Only the current user can connect
+            umask = os.umask(0o177)
+            try:
+                super().__init__(socket_path, RequestHandler)
+            finally:
+                os.umask(umask)
+
+        def server_close(self):
+            super().server_close()
+            self.executor.shutdown(wait=False)
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+
+def prepare_socket_dir(socket_path: str):
+    """Create the directory of `socket_path` (only the current user can enter
+    it), if missing. Raises `PermissionError` if it's the default one in `/tmp`
+    (see `private_dir`), and not private to the current user."""
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory, mode=0o700)
+    elif directory == private_dir():
+        # Anyone could have made it first
+        check_owner(directory)
+        if os.path.islink(directory) or os.stat(directory).st_mode & 0o077:
+            raise PermissionError("'%s' is accessible to other users" % directory)
+
+
+def serve_main(argv: Optional[List[str]] = None):
+    """Entry point of `maketree serve`."""
+    parser = ArgumentParser(
+        prog="maketree serve",
+        description="Stay resident and run requests from maketree-client.",
+    )
+    parser.add_argument(
+        "-sock",
+        "--socket",
+        metavar="PATH",
+        default=default_socket_path(),
+        help="Unix socket to listen on (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        metavar="N",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="run up to N requests at once (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    if ThreadingUnixStreamServer is None:
+        print("Error: serve needs Unix sockets, not available here.", file=sys.stderr)
+        sys.exit(1)
+
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    try:
+        prepare_socket_dir(args.socket)
+    except OSError as e:
+        print("Error: %s." % e, file=sys.stderr)
+        sys.exit(1)
+
+    # Left behind by a server that didn't exit cleanly?
+    if os.path.exists(args.socket):
+        from maketree.client import request
+
+        try:
+            request(["--help"], socket_path=args.socket)
+        except PermissionError as e:
+            print("Error: %s." % e, file=sys.stderr)
+            sys.exit(1)
+        except OSError:
+            os.unlink(args.socket)
+        else:
+            print("Error: already serving on '%s'." % args.socket, file=sys.stderr)
+            sys.exit(1)
+
+    server = Server(args.socket, args.jobs)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(
+        "Serving on '%s' (%d workers)..." % (args.socket, args.jobs),
+        file=sys.stderr,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,6 +1,7 @@
 """Responsible for coloring the text (ANSI stuff)"""
 
-from typing import List
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
 # ANSI Attribute codes
 ATTRIBUTES = {
@@ -47,6 +48,36 @@ def get_color(color: str, mode: str = "fg") -> int:
     return COLORS[color] + 10
 
 
+# Ansi Reset code
+RESET = "\033[0m"
+
+
+@lru_cache(maxsize=None)
+def compile_style(
+    fgcolor: Optional[str] = None,
+    bgcolor: Optional[str] = None,
+    attrs: Optional[Tuple[str, ...]] = None,
+) -> str:
+    """
+    ### Compile Style
+    Returns the ANSI prefix for a style (computed once per style, then cached).
+    `prefix + text + RESET` is the same as `colored(text, ...)`.
+
+    #### Args:
+    - `fgcolor`: foreground color
+    - `bgcolor`: background color
+    - `attrs`: attributes (a tuple, so it can be cached)
+    """
+    # Same order as applying them one by one (attributes outermost)
+    codes = [ATTRIBUTES[attr] for attr in reversed(attrs or ())]
+    if bgcolor:
+        codes.append(get_color(bgcolor, "bg"))
+    if fgcolor:
+        codes.append(get_color(fgcolor))
+
+    return "".join("\033[%dm" % code for code in codes)
+
+
 def colored(
     text: str,
     fgcolor: str = None,
@@ -57,25 +88,9 @@ def colored(
     assert isinstance(text, str), "text must be str"
     assert text, "text must not be empty"
 
-    # Ansi Format string
-    FMT_STR = "\033[%dm%s"
-
-    result = text
-
-    # Apply foreground color
-    if fgcolor:
-        result = FMT_STR % (get_color(fgcolor), result)
-
-    # Apply background color
-    if bgcolor:
-        result = FMT_STR % (get_color(bgcolor, "bg"), result)
-
-    # Apply attributes
-    if attrs:
-        for attr in attrs:
-            result = FMT_STR % (ATTRIBUTES[attr], result)
-
-    return result + "\033[0m"
+    return (
+        compile_style(fgcolor, bgcolor, tuple(attrs) if attrs else None) + text + RESET
+    )
 
 
 def printc(
@@ -2,13 +2,15 @@
 
 import re
 from sys import platform
-from os import makedirs
-from os.path import exists, splitext, join
-from pathlib import Path
-from typing import List, Dict, Set, Union, Iterable, Optional
+from os import makedirs, listdir, fsencode
+from os.path import exists, splitext, join, abspath, dirname
+from os.path import normpath, normcase, realpath
+from typing import List, Dict, Set, Union, Iterable, Optional, Tuple, TYPE_CHECKING
 from maketree.terminal_colors import colored
 from maketree.console import Console
-from datetime import datetime
+
+if TYPE_CHECKING:
+    from pathlib import Path
 
 
 # File/Dir Name REGEXes
@@ -41,6 +43,11 @@ RESERVED_WINDOWS_NAMES: Set[str] = {
     "LPT9",
 }
 
+# Path & Name length limits, when the filesystem can't be asked
+# (Windows: in characters. Not the old MAX_PATH of 260, long paths may be
+# enabled, which can't be told from here, so only the extended-length limit)
+DEFAULT_PATH_LIMITS = (32767, 255) if platform == "win32" else (4096, 255)
+
 
 def get_os_name():
     """Returns the OS Name `Windows`, `Linux` or `MacOS`"""
@@ -57,8 +64,37 @@ def get_nonexisting_paths(paths: List[str]) -> List[str]:
     return list(filter(lambda p: not exists(p), paths))
 
 
-def get_existing_paths(paths: List[str]) -> List[str]:
-    """Returns a list of existing paths from `paths` list."""
+def rebase_paths(paths: Dict[str, List[str]], rootpath: str) -> Dict[str, List[str]]:
+    """Returns the `paths` dictionary of a tree (relative to the tree, see
+    `Pipeline.run`) as paths under `rootpath`. `paths` is not modified, so a
+    tree parsed & validated once can be built into many destinations."""
+    return {
+        "directories": [join(rootpath, path) for path in paths["directories"]],
+        "files": [join(rootpath, path) for path in paths["files"]],
+    }
+
+
+def unique_paths(paths: Iterable[str]) -> List[str]:
+    """Returns `paths` normalized, without those naming the same place as an
+    earlier one (e.g, `dst` and `./dst`, or a link to it), in order. So the
+    same destination is never built twice at once."""
+    seen: Set[str] = set()
+    unique = []
+    for path in paths:
+        key = normcase(realpath(path))
+        if key not in seen:
+            seen.add(key)
+            unique.append(normpath(path))
+    return unique
+
+
+def get_existing_paths(
+    paths: List[str], operations: Optional[Dict[str, int]] = None
+) -> List[str]:
+    """Returns a list of existing paths from `paths` list. The `stat` calls
+    are counted in `operations`, if given (see `TreeBuilder.build`)."""
+    if operations is not None:
+        operations["stat"] = operations.get("stat", 0) + len(paths)
     return list(filter(lambda p: exists(p), paths))
 
 
@@ -166,6 +202,8 @@ def is_valid_dirpath(dirpath: str):
     if dirpath in {".", ".."}:  # No Further checking needed
         return True
 
+    from pathlib import Path
+
     d = Path(dirpath)
     if d.drive:  # Remove drive letter
         root_parts = d.parts[1:]
@@ -194,6 +232,44 @@ def is_valid_dirpath(dirpath: str):
     return True
 
 
+def get_path_limits(path: str) -> Tuple[int, int]:
+    """
+    ### Get Path Limits
+    Returns the max length of a full path and of a single name (`PATH_MAX` and
+    `NAME_MAX`) on the filesystem `path` is (or would be) on.
+
+    Lengths are in bytes (characters on Windows), see `path_length`.
+    If `path` doesn't exist, its nearest existing parent is asked instead.
+    """
+    if platform == "win32":
+        return DEFAULT_PATH_LIMITS
+    from os import pathconf  # Unix only
+
+    # Nearest existing parent
+    path = abspath(path)
+    while not exists(path) and dirname(path) != path:
+        path = dirname(path)
+
+    limits = []
+    for name, default in zip(("PC_PATH_MAX", "PC_NAME_MAX"), DEFAULT_PATH_LIMITS):
+        try:
+            limit = pathconf(path, name)
+        except (OSError, ValueError):
+            limit = default
+        # -1 means there's no limit
+        limits.append(limit if limit > 0 else default)
+
+    return limits[0], limits[1]
+
+
+def path_length(path: str) -> int:
+    """Returns the length of `path` as the filesystem counts it (encoded bytes,
+    or characters on Windows)."""
+    if platform == "win32":
+        return len(path)
+    return len(fsencode(path))
+
+
 def contains_chars(string: str, chars: str) -> bool:
     """
     ### Contains
@@ -205,61 +281,102 @@ def contains_chars(string: str, chars: str) -> bool:
     return any(char for char in chars if char in string)
 
 
-def print_tree(tree: List[Dict], console: Console, root: str = "."):
-    """Prints the parsed `tree` in a graphical format. _(Not perfect but, gets the job done)_"""
-    tab = 0
+def print_tree(
+    tree: List[Dict],
+    console: Console,
+    root: str = ".",
+    max_depth: Optional[int] = None,
+    max_children: Optional[int] = None,
+):
+    """Prints the parsed `tree` in a graphical format (all at once, see `render_tree`)."""
+    print(
+        render_tree(tree, console, root, max_depth, max_children), file=console.stream
+    )
+
+
+def render_tree(
+    tree: List[Dict],
+    console: Console,
+    root: str = ".",
+    max_depth: Optional[int] = None,
+    max_children: Optional[int] = None,
+) -> str:
+    """
+    ### Render Tree
+    Returns the parsed `tree` in a graphical format, as a single string.
+
+    #### Args:
+    - `tree`: the parsed tree
+    - `root`: the root directory (first line)
+    - `max_depth`: show only this many levels, deeper entries are collapsed
+    into a `… N more entries` line
+    - `max_children`: show only the first this many entries of a directory,
+    the rest are collapsed (same as above)
+    """
     BAR = console.colored("│   ", "dark_grey")
     LINK = console.colored("├───", "dark_grey")
     LINK_LAST = console.colored("└───", "dark_grey")
-    FMT_STR = f"%s%s %s"
-
-    def traverse(node: Dict, childs: int):
-        nonlocal tab
-        count = 0  # keeps track of child counts
+    # Colored once, names are filled in (instead of coloring every name)
+    DIR_FMT = console.colored("%s/", fgcolor="light_green", attrs=["italic", "bold"])
+    MORE_FMT = console.colored("… %d more %s", "dark_grey")
 
-        for child in node.get("children", []):
-            count += 1
+    def more(items: List[Dict], depth: int) -> str:
+        count = count_entries(items)
+        entries = "entry" if count == 1 else "entries"
+        return "%s%s %s" % (BAR * depth, LINK_LAST, MORE_FMT % (count, entries))
 
-            child_name = child["name"]
-
-            # Add a Slash '/' after a directory
-            if child["type"] == "directory":
-                child_name = console.colored(
-                    "%s/" % child_name,
-                    fgcolor="light_green",
-                    attrs=["italic", "bold"],
-                )
+    root = str(root) if str(root) == "." else f"{root}/"
+    lines = [console.colored(root, fgcolor="light_green", attrs=["italic", "bold"])]
+
+    # Depth-first, no recursion (trees can be deep)
+    # (CHILDREN, INDEX OF NEXT CHILD, DEPTH)
+    stack = [(tree, 0, 0)]
+    while stack:
+        children, index, depth = stack[-1]
+        count = len(children)
+        shown = count if max_children is None else min(count, max_children)
+
+        # Done with this directory
+        if index >= shown:
+            stack.pop()
+            if index < count:
+                lines.append(more(children[index:], depth))
+            continue
+
+        stack[-1] = (children, index + 1, depth)
+        child = children[index]
+        is_dir = child["type"] == "directory"
+
+        lines.append(
+            "%s%s %s"
+            % (
+                BAR * depth,
+                LINK_LAST if index == count - 1 else LINK,
+                DIR_FMT % child["name"] if is_dir else child["name"],
+            )
+        )
 
-            if count == childs:
-                # Last Child
-                print(FMT_STR % (BAR * tab, LINK_LAST, child_name))
+        if is_dir and child["children"]:
+            if max_depth is not None and depth + 1 >= max_depth:
+                lines.append(more(child["children"], depth + 1))
             else:
-                # Others
-                print(FMT_STR % (BAR * tab, LINK, child_name))
+                stack.append((child["children"], 0, depth + 1))
 
-            if child["type"] == "directory" and child["children"]:
-                tab += 1
-                traverse(child, len(child["children"]))
-        tab -= 1
-        return
+    return "\n".join(lines)
 
-    root = str(root) if str(root) == "." else f"{root}/"
-    print(
-        console.colored(
-            root,
-            fgcolor="light_green",
-            attrs=["italic", "bold"],
-        )
-    )
 
-    traverse(
-        node={
-            "type": "directory",
-            "name": root,
-            "children": tree,
-        },
-        childs=len(tree),
-    )
+def count_entries(tree: List[Dict]) -> int:
+    """Returns the number of entries (dirs & files) in `tree`, at all levels."""
+    count = 0
+    stack = [tree]
+    while stack:
+        children = stack.pop()
+        count += len(children)
+        for child in children:
+            if child.get("children"):
+                stack.append(child["children"])
+
+    return count
 
 
 def create_dir(path: str):
@@ -272,7 +389,11 @@ def create_dir(path: str):
         return str(e)
 
 
-def incremented_filename(filepath: Union[Path, str], dst_path: str = "") -> str:
+def incremented_filename(
+    filepath: Union["Path", str],
+    dst_path: str = "",
+    extension: Optional[str] = None,
+) -> str:
     """
     ### Incremented Filename
     Increments filename in the `filepath` if file already exists in `dst_path`.
@@ -280,6 +401,9 @@ def incremented_filename(filepath: Union[Path, str], dst_path: str = "") -> str:
     if `dst_path` is omitted, method will use the `filepath`'s root dir to look
     if filename exists or not.
 
+    `extension` overrides the extension of `filepath`, for extensions with
+    more than one dot (e.g. `.tree.gz` increments as `file_1.tree.gz`)
+
     ```
     >> incremented_filename("path/to/file.txt")
     # IF File already exists
@@ -289,6 +413,8 @@ def incremented_filename(filepath: Union[Path, str], dst_path: str = "") -> str:
     'path/to/file.txt'
     ```
     """
+    from pathlib import Path
+
     filepath = Path(filepath)
 
     # Exists? return if not
@@ -306,23 +432,40 @@ def incremented_filename(filepath: Union[Path, str], dst_path: str = "") -> str:
     root = Path(root)
 
     # Extract filename and extension
-    filename = filepath.stem
-    extension = filepath.suffix
+    if extension and filepath.name.endswith(extension):
+        filename = filepath.name[: -len(extension)]
+    else:
+        filename = filepath.stem
+        extension = filepath.suffix
 
     # Create new_name
     new_name = root / (filename + extension)
 
     # File exists?
-    if new_name.exists():
-        num = 1
-        while True:
-            new_name = f"{root / filename}_{num}{extension}"
-            if not exists(new_name):
-                return new_name
-            num += 1
-    else:
+    if not new_name.exists():
         return str(new_name)
 
+    # List the directory once, instead of probing `name_1`, `name_2`, ...
+    try:
+        taken = set(listdir(root))
+    except OSError:
+        taken = None
+
+    # Case-insensitive filesystems (most likely)
+    fold = platform in {"win32", "darwin"}
+    if taken is not None and fold:
+        taken = {name.casefold() for name in taken}
+
+    num = 1
+    while True:
+        candidate = f"{filename}_{num}{extension}"
+        if taken is None:
+            if not exists(root / candidate):
+                return str(root / candidate)
+        elif (candidate.casefold() if fold else candidate) not in taken:
+            return str(root / candidate)
+        num += 1
+
 
 def now(format_: str = "%d %B %Y %I:%M %p") -> str:
     """
@@ -364,4 +507,6 @@ def now(format_: str = "%d %B %Y %I:%M %p") -> str:
     '25 September 2024'
     ```
     """
+    from datetime import datetime
+
     return datetime.now().strftime(format_)
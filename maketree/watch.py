@@ -0,0 +1,232 @@
+"""Keeps built trees in sync with their `.tree` file while it's edited (`--watch`)."""
+
+import os
+import time
+from maketree.console import Console
+from maketree.utils import rebase_paths
+from typing import List, Dict, Tuple, Optional
+
+# Seconds between checks of the source file
+WATCH_INTERVAL = 0.5
+
+# (DESTINATION, ITS PATHS), same as the CLI builds
+Plans = List[Tuple[str, Dict[str, List[str]]]]
+
+
+class Watch:
+    """
+    ### Watch
+    Polls the source file (mtime & size, stdlib only), and whenever it
+    changes, loads it again and applies the difference to every destination:
+    added entries are created, and with `prune`, removed entries are deleted.
+
+    Removing only deletes empty directories and empty files (what maketree
+    creates), anything with content is kept and reported. Entries that
+    changed type (e.g, `foo` into `foo/`) are replaced the same way, even
+    without `prune`, and entries that can't be created are reported.
+    """
+
+    @classmethod
+    def run(
+        cls,
+        sourcefile: str,
+        plans: Plans,
+        console: Console,
+        prune: bool = False,
+        max_errors: Optional[int] = None,
+        jobs: int = 1,
+        interval: float = WATCH_INTERVAL,
+    ):
+        """Watch `sourcefile` (until interrupted), `plans` being what's
+        already been built from it."""
+        destinations = [dst for dst, _ in plans]
+        version = cls.version(sourcefile)
+        console.print(
+            "\nWatching '%s' for changes... (Ctrl+C to stop)" % sourcefile,
+            "light_magenta",
+            force_print=not console.events,
+        )
+
+        try:
+            while True:
+                time.sleep(interval)
+                current = cls.version(sourcefile)
+                if current == version:
+                    continue
+                version = current
+
+                new_plans = cls.load(
+                    sourcefile, destinations, console, max_errors, jobs
+                )
+                if new_plans is None:
+                    continue  # Keep the last good plans, until it's fixed
+                cls.apply(plans, new_plans, console, prune)
+                plans = new_plans
+        except KeyboardInterrupt:
+            pass
+
+    @classmethod
+    def version(cls, filepath: str) -> Optional[Tuple[int, int]]:
+        """Returns `(MTIME_NS, SIZE)` of `filepath`, `None` if it's missing."""
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @classmethod
+    def load(
+        cls,
+        sourcefile: str,
+        destinations: List[str],
+        console: Console,
+        max_errors: Optional[int] = None,
+        jobs: int = 1,
+    ) -> Optional[Plans]:
+        """Load `sourcefile` (a tree file or plan) for every destination.
+        Errors are reported, and `None` returned."""
+        from maketree.core.parser import ParseError
+        from maketree.core.validator import ValidationError
+
+        try:
+            if sourcefile.endswith(".plan"):
+                from maketree.core.plan import Plan
+
+                paths, lengths = Plan.load(sourcefile)
+                for dst in destinations:
+                    valid = Plan.check(lengths, dst)
+                    if valid is not True:
+                        raise ParseError("cannot build into '%s': %s" % (dst, valid))
+            else:
+                from maketree.core.pipeline import Pipeline
+
+                _, paths = Pipeline.run(
+                    sourcefile,
+                    destinations,
+                    console=console,
+                    max_errors=max_errors,
+                    jobs=jobs,
+                )
+        except ValidationError as e:
+            if console.events:
+                for detail in e.details:
+                    console.event("invalid", **detail)
+            else:
+                console.print(str(e), force_print=True)
+            cls.report_error("found %d invalid entries." % len(e.errors), console)
+            return None
+        except (ParseError, UnicodeDecodeError, OSError) as e:
+            cls.report_error("cannot load '%s': %s" % (sourcefile, e), console)
+            return None
+
+        return [(dst, rebase_paths(paths, dst)) for dst in destinations]
+
+    @classmethod
+    def report_error(cls, message: str, console: Console):
+        """Report an error without exiting (unlike `Console.error`)."""
+        if console.events:
+            console.event("error", message=message)
+            console.events.flush()
+        else:
+            console.print(
+                console.labeled("Error:", message, console.clr_error),
+                force_print=True,
+            )
+
+    @classmethod
+    def diff(
+        cls, old: Dict[str, List[str]], new: Dict[str, List[str]]
+    ) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+        """Returns the paths `(ADDED, REMOVED)` from `old` to `new` (both
+        paths dictionaries), in the order of `new` and `old` respectively."""
+        added = {}
+        removed = {}
+        for key in ("directories", "files"):
+            old_paths, new_paths = set(old[key]), set(new[key])
+            added[key] = [path for path in new[key] if path not in old_paths]
+            removed[key] = [path for path in old[key] if path not in new_paths]
+
+        return added, removed
+
+    @classmethod
+    def apply(cls, old: Plans, new: Plans, console: Console, prune: bool = False):
+        """Apply the difference between the `old` and `new` plans."""
+        from maketree.core.tree_builder import TreeBuilder
+
+        for (dst, old_paths), (_, new_paths) in zip(old, new):
+            added, removed = cls.diff(old_paths, new_paths)
+
+            # Removed first, the new entries may take their place
+            if not prune:
+                removed = cls.type_changes(added, removed)
+            removed_dirs, removed_files = cls.prune(removed, console)
+
+            # Entries that exist already (e.g, created by hand) are left alone
+            errors = []
+            dirs, files = TreeBuilder.build(added, console, skip=True, errors=errors)
+            for path, error in errors:
+                cls.report_error("cannot create '%s': %s" % (path, error), console)
+
+            if console.events:
+                console.event(
+                    "changed",
+                    dst=dst,
+                    directories=dirs,
+                    files=files,
+                    removed_directories=removed_dirs,
+                    removed_files=removed_files,
+                )
+                console.events.flush()
+                continue
+
+            message = "'%s': %d directories and %d files created" % (dst, dirs, files)
+            if prune or removed_dirs or removed_files:
+                message += ", %d directories and %d files removed" % (
+                    removed_dirs,
+                    removed_files,
+                )
+            console.print(message, "light_green", force_print=True, flush=True)
+
+    @classmethod
+    def type_changes(
+        cls, added: Dict[str, List[str]], removed: Dict[str, List[str]]
+    ) -> Dict[str, List[str]]:
+        """Returns the `removed` paths that are `added` back as the other
+        type (a file as a directory, or a directory as a file)."""
+        added_dirs, added_files = set(added["directories"]), set(added["files"])
+        return {
+            "directories": [p for p in removed["directories"] if p in added_files],
+            "files": [p for p in removed["files"] if p in added_dirs],
+        }
+
+    @classmethod
+    def prune(cls, removed: Dict[str, List[str]], console: Console) -> Tuple[int, int]:
+        """Delete the `removed` paths that are empty. Returns the number of
+        directories & files deleted."""
+        files = 0
+        for path in removed["files"]:
+            try:
+                if os.path.getsize(path) == 0:
+                    os.remove(path)
+                    files += 1
+                    console.event("removed", type="file", path=path)
+                else:
+                    console.warning("Keeping '%s', it's not empty" % path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                console.warning("Cannot remove '%s': %s" % (path, e))
+
+        # Deepest first, so emptied parents can go too
+        dirs = 0
+        for path in sorted(removed["directories"], key=len, reverse=True):
+            try:
+                os.rmdir(path)
+                dirs += 1
+                console.event("removed", type="directory", path=path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                console.warning("Keeping '%s', it's not empty" % path)
+
+        return dirs, files
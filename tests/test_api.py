@@ -0,0 +1,97 @@
+"""Tests for maketree/api.py"""
+
+import os
+import shutil
+from io import StringIO
+from pytest import raises
+import maketree
+from maketree.core.parser import Parser
+
+TEMP_DIR = "temp"
+TREE = "src/\n    app.py\nREADME.md\n"
+
+
+def test_build():
+    os.mkdir(TEMP_DIR)
+    try:
+        dst = os.path.join(TEMP_DIR, "a")
+        result = maketree.build(StringIO(TREE), dst)
+        assert (result.directories, result.files) == (1, 2)
+        assert os.path.join(dst, "src", "app.py") in result.paths["files"]
+        assert os.path.isfile(os.path.join(dst, "README.md"))
+
+        # Existing files (raised, not exited)
+        with raises(maketree.ExistingFilesError) as e:
+            maketree.build(TREE.splitlines(), dst)
+        assert len(e.value.paths) == 2
+        assert maketree.build(TREE.splitlines(), dst, skip=True).files == 0
+
+        # Tree file & parsed tree, into many destinations
+        src = os.path.join(TEMP_DIR, "app.tree")
+        with open(src, "w") as f:
+            f.write(TREE)
+        dsts = [os.path.join(TEMP_DIR, "b"), os.path.join(TEMP_DIR, "c")]
+        assert maketree.build(src, dsts).files == 4
+        tree = Parser.parse_file(src)
+        assert maketree.build(tree, dsts, overwrite=True).files == 4
+
+        # The same destination, built once
+        dst = os.path.join(TEMP_DIR, "e")
+        result = maketree.build(tree, [dst, os.path.join(".", dst, "")])
+        assert result.files == 2
+        assert len(result.paths["files"]) == 2
+
+        # Tree text (a str source is a path)
+        result = maketree.build(text=TREE, dst=os.path.join(TEMP_DIR, "d"))
+        assert (result.directories, result.files) == (1, 2)
+    finally:
+        shutil.rmtree(TEMP_DIR)
+
+
+def test_build_errors():
+    os.mkdir(TEMP_DIR)
+    try:
+        with raises(maketree.InvalidTreeError) as e:
+            maketree.build(["ok.txt", "a|b.txt"], TEMP_DIR)
+        assert e.value.details[0]["line"] == 2
+
+        with raises(maketree.SourceError):
+            maketree.build(os.path.join(TEMP_DIR, "missing.tree"), TEMP_DIR)
+        with raises(maketree.DestinationError):
+            maketree.build(["a.txt"], os.path.join(TEMP_DIR, "x"), create_dst=False)
+        with raises(ValueError):
+            maketree.build(["a.txt"], TEMP_DIR, skip=True, overwrite=True)
+        with raises(ValueError):
+            maketree.build(["a.txt"], TEMP_DIR, text="b.txt")
+        with raises(maketree.CollisionError) as e:
+            maketree.build(text="a.txt\nA.txt\n", dst=TEMP_DIR, collisions="on")
+        assert len(e.value.collisions) == 1
+
+        # Failed while building (a directory in the way of a file)
+        os.mkdir(os.path.join(TEMP_DIR, "a.txt"))
+        with raises(maketree.DestinationError):
+            maketree.build(["a.txt"], TEMP_DIR, overwrite=True)
+
+        # All of them are MaketreeErrors
+        assert issubclass(maketree.SourceError, maketree.MaketreeError)
+    finally:
+        shutil.rmtree(TEMP_DIR)
+
+
+def test_extract():
+    os.makedirs(os.path.join(TEMP_DIR, "src"))
+    try:
+        open(os.path.join(TEMP_DIR, "src", "app.py"), "w").close()
+
+        result = maketree.extract(TEMP_DIR)
+        assert result.entries == [
+            ("directory", "temp", 0),
+            ("directory", "src", 1),
+            ("file", "app.py", 2),
+        ]
+        assert result.text() == "temp/\n    src/\n        app.py\n"
+
+        with raises(maketree.SourceError):
+            maketree.extract(os.path.join(TEMP_DIR, "missing"))
+    finally:
+        shutil.rmtree(TEMP_DIR)
@@ -0,0 +1,84 @@
+"""Tests for maketree/batch.py"""
+
+import os
+import shutil
+from io import StringIO
+from argparse import Namespace
+from maketree.batch import Batch
+from maketree.console import Console
+from maketree.events import EventWriter
+
+TEMP_DIR = "temp"
+
+
+def write_file(name: str, text: str) -> str:
+    path = os.path.join(TEMP_DIR, name)
+    with open(path, "w") as f:
+        f.write(text)
+    return path
+
+
+def test_load_manifest():
+    os.mkdir(TEMP_DIR)
+    try:
+        path = write_file(
+            "jobs.txt",
+            "# Tenants\n\napp.tree out/a -cd\n'my app.tree' \"out/b c\"  # Quoted\n",
+        )
+        assert Batch.load_manifest(path) == [
+            (3, ["app.tree", "out/a", "-cd"]),
+            (4, ["my app.tree", "out/b c"]),
+        ]
+    finally:
+        shutil.rmtree(TEMP_DIR)
+
+
+def test_parse_job():
+    args = Batch.parse_job(["app.tree", "out", "-cd", "-p"])
+    assert isinstance(args, Namespace)
+    assert args.no_confirm and not args.progress
+
+    assert "unrecognized arguments" in Batch.parse_job(["app.tree", "--bogus"])
+    assert "not allowed" in Batch.parse_job(["app.tree", "-g"])
+    assert "required: src" in Batch.parse_job(["-cd"])
+
+
+def test_run():
+    os.mkdir(TEMP_DIR)
+    try:
+        tree = write_file("app.tree", "src/\n    app.py\nREADME.md\n")
+        out = os.path.join(TEMP_DIR, "out")
+        manifest = write_file(
+            "jobs.txt",
+            "\n".join(
+                [
+                    "%s %s/a -cd" % (tree, out),
+                    "%s %s/b -cd" % (tree, out),
+                    "%s %s/c -cd --bogus" % (tree, out),
+                    "%s/missing.tree %s/d -cd" % (TEMP_DIR, out),
+                ]
+            ),
+        )
+
+        stream = StringIO()
+        console = Console(False, True, stream=stream)
+        summary = Batch.run(manifest, console, jobs=2)
+        assert summary == {"jobs": 4, "failed": 2, "directories": 2, "files": 4}
+        assert os.path.isfile(os.path.join(out, "a", "src", "app.py"))
+        assert os.path.isfile(os.path.join(out, "b", "README.md"))
+        assert not os.path.exists(os.path.join(out, "c"))
+
+        output = stream.getvalue()
+        assert "[line 3] %s %s/c -cd --bogus: failed" % (tree, out) in output
+        assert "Error: source '%s/missing.tree' does not exist." % TEMP_DIR in output
+
+        # Same jobs again: files exist now (as events)
+        stream = StringIO()
+        console = Console(False, True, stream=stream, events=EventWriter(stream))
+        summary = Batch.run(manifest, console, jobs=2)
+        console.events.flush()
+        assert summary["failed"] == 4
+        assert stream.getvalue().count('{"event":"job"') == 4
+        assert '"event":"exists"' in stream.getvalue()
+    finally:
+        shutil.rmtree(TEMP_DIR)
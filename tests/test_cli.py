@@ -0,0 +1,134 @@
+"""Tests for maketree/cli.py"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+TEMP_DIR = "temp"
+
+
+def test_lazy_imports():
+    # Modules only some commands need, must not be imported at startup
+    lazy = [
+        "maketree.core.extractor",
+        "maketree.core.tree_writer",
+        "maketree.core.collisions",
+        "maketree.progress",
+        "maketree.events",
+        "maketree.api",
+        "maketree.profiler",
+        "cProfile",
+        "concurrent.futures",
+        "datetime",
+    ]
+    code = "import sys, maketree.cli; print(*[m for m in %r if m in sys.modules])"
+    result = subprocess.run(
+        [sys.executable, "-c", code % lazy],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.split() == []
+
+
+def test_src_from_stdin():
+    try:
+        result = subprocess.run(
+            [sys.executable, "-m", "maketree", "-", TEMP_DIR, "-cd", "-nC", "-nc"],
+            input="src/\n    app.py\nREADME.md\n",
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stdout
+        assert os.path.isfile(os.path.join(TEMP_DIR, "src", "app.py"))
+        assert os.path.isfile(os.path.join(TEMP_DIR, "README.md"))
+    finally:
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+
+def test_profile():
+    os.mkdir(TEMP_DIR)
+    try:
+        src = os.path.join(TEMP_DIR, "app.tree")
+        report = os.path.join(TEMP_DIR, "profile.json")
+        with open(src, "w") as f:
+            f.write("src/\n    app.py\nREADME.md\n")
+
+        dst = os.path.join(TEMP_DIR, "out")
+        argv = [src, dst, "-cd", "-nC", "-nc", "--profile-output", report]
+        result = subprocess.run(
+            [sys.executable, "-m", "maketree", *argv],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stdout
+
+        with open(report) as f:
+            profile = json.load(f)
+        phases = {phase["phase"]: phase for phase in profile["phases"]}
+        assert phases["pipeline"]["entries"] == 3
+        assert phases["existing"]["entries"] == 2
+        assert phases["build"]["entries"] == 3
+        assert profile["operations"] == {"stat": 2, "mkdir": 1, "open": 2}
+    finally:
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+
+def test_profile_keeps_files():
+    os.mkdir(TEMP_DIR)
+    try:
+        src = os.path.join(TEMP_DIR, "app.tree")
+        with open(src, "w") as f:
+            f.write("src/\n")
+
+        # Not a report, it's never replaced
+        argv = [src, os.path.join(TEMP_DIR, "out"), "-cd", "-nC", "-pfo", src]
+        result = subprocess.run(
+            [sys.executable, "-m", "maketree", *argv],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 1
+        with open(src) as f:
+            assert f.read() == "src/\n"
+
+        # Arguments rejected before any phase ran, no report
+        report = os.path.join(TEMP_DIR, "profile.json")
+        argv = [os.path.join(TEMP_DIR, "missing.tree"), "-nC", "-pfo", report]
+        result = subprocess.run(
+            [sys.executable, "-m", "maketree", *argv],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 1
+        assert not os.path.exists(report)
+    finally:
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+
+def test_same_destination(tmp_path):
+    (tmp_path / "app.tree").write_text("src/\n    a.txt\nREADME.md\n")
+
+    # Built once, not twice at once
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "maketree",
+            "app.tree",
+            "d5",
+            "./d5",
+            "-cd",
+            "-nC",
+            "-nc",
+        ],
+        cwd=str(tmp_path),
+        env={**os.environ, "PYTHONPATH": os.getcwd()},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "1 directories and 2 files have been created." in result.stdout
+    assert "d5:" not in result.stdout  # No per-destination counts
@@ -0,0 +1,51 @@
+"""Tests for maketree/core/collisions.py"""
+
+import os
+import shutil
+from maketree.core.collisions import CollisionIndex
+
+TEMP_DIR = "temp"
+
+
+def test_find():
+    paths = {
+        "directories": ["./Src", "./src", "./docs"],
+        "files": [
+            "./README.md",
+            "./Readme.md",
+            "./caf\u00e9.txt",  # NFC
+            "./CAFE\u0301.TXT",  # NFD (and upper case)
+            "./docs",  # Same as a directory
+        ],
+    }
+
+    collisions = CollisionIndex().find(paths)
+    assert collisions == [
+        ("./Src", "./src"),
+        ("./README.md", "./Readme.md"),
+        ("./caf\u00e9.txt", "./CAFE\u0301.TXT"),
+        ("./docs", "./docs"),
+    ]
+
+    # Only case folding
+    collisions = CollisionIndex(fold_case=True, fold_unicode=False).find(paths)
+    assert ("./caf\u00e9.txt", "./CAFE\u0301.TXT") not in collisions
+    assert ("./README.md", "./Readme.md") in collisions
+
+    # Only normalization
+    index = CollisionIndex(fold_case=False, fold_unicode=True)
+    assert index.find_in(["./caf\u00e9", "./cafe\u0301", "./A", "./a"]) == [
+        ("./caf\u00e9", "./cafe\u0301")
+    ]
+
+
+def test_probe():
+    os.mkdir(TEMP_DIR)
+    try:
+        case, unicode = CollisionIndex.probe(os.path.join(TEMP_DIR, "not", "yet"))
+        assert isinstance(case, bool) and isinstance(unicode, bool)
+
+        # Nothing left behind
+        assert os.listdir(TEMP_DIR) == []
+    finally:
+        shutil.rmtree(TEMP_DIR)
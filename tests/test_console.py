@@ -30,3 +30,17 @@ def test_color_substrs():
         colored_s
         == "Th\x1b[32mis\x1b[0m \x1b[32mis\x1b[0m a dummy str\x1b[32min\x1b[0mg."
     )
+
+
+def test_color_substrs_overlapping():
+    console = Console(verbose=False, no_color=False)
+
+    # Single pass: sub-strings are never matched inside inserted codes
+    assert console.color_substrs("3 of 30", ["3", "30"], "green") == (
+        "\x1b[32m3\x1b[0m of \x1b[32m30\x1b[0m"
+    )
+
+    # Labels are colored, not the same word inside the message
+    assert console.labeled("Error:", "Error: again", "light_red") == (
+        "\x1b[91mError:\x1b[0m Error: again"
+    )
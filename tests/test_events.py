@@ -0,0 +1,64 @@
+"""Tests for maketree/events.py"""
+
+import json
+import shutil
+from io import StringIO
+from os import mkdir
+from maketree import events as events_module
+from maketree.events import EventWriter
+from maketree.console import Console
+from maketree.core.parser import Parser
+from maketree.core.normalizer import Normalizer
+from maketree.core.tree_builder import TreeBuilder
+
+TEMP_DIR = "temp"
+
+
+def test_event_writer(monkeypatch):
+    monkeypatch.setattr(events_module, "EVENT_BATCH_SIZE", 2)
+    stream = StringIO()
+    events = EventWriter(stream)
+
+    # Buffered until a batch is full
+    events.emit("created", type="file", path="./a.txt")
+    assert stream.getvalue() == ""
+    events.emit("created", type="file", path="./\udcff.txt")  # Undecodable name
+    events.emit("built", directories=0, files=2)
+    events.flush()
+
+    lines = stream.getvalue().splitlines()
+    assert [json.loads(line)["event"] for line in lines] == [
+        "created",
+        "created",
+        "built",
+    ]
+    assert json.loads(lines[0]) == {
+        "event": "created",
+        "type": "file",
+        "path": "./a.txt",
+    }
+
+
+def test_build_events():
+    stream = StringIO()
+    console = Console(False, True, events=EventWriter(stream))
+    tree = Parser._parse_lines(["src/", "    a.txt", "b.txt"])
+    paths = Normalizer.normalize(tree, TEMP_DIR)
+
+    mkdir(TEMP_DIR)
+    try:
+        TreeBuilder.build(paths, console)
+        TreeBuilder.build(paths, console, skip=True)
+        console.events.flush()
+    finally:
+        shutil.rmtree(TEMP_DIR)
+
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(event["event"], event["type"]) for event in events] == [
+        ("created", "directory"),
+        ("created", "file"),
+        ("created", "file"),
+        ("skipped", "directory"),
+        ("skipped", "file"),
+        ("skipped", "file"),
+    ]
@@ -1,7 +1,10 @@
-from os import mkdir
+from os import mkdir, utime, symlink, stat
+from sys import platform
+from pytest import mark
 from pathlib import Path
 from shutil import rmtree
 from maketree.core.extractor import Extractor
+from maketree.core.snapshot import Snapshot
 from maketree.console import Console
 
 # Create temporary files/folders inside this and delete aftwards
@@ -56,3 +59,90 @@ def test_extract():
     assert sorted_tree[2][1] == "file3.json"
 
     rmtree(TEMP_DIR)
+
+
+def test_extract_incremental():
+    try:
+        mkdir(TEMP_DIR)
+    except FileExistsError:
+        pass
+
+    try:
+        mkdir(f"{TEMP_DIR}/folder")
+        with open(f"{TEMP_DIR}/folder/file1.txt", "w") as _:
+            pass
+
+        # Backdate mtimes (recently modified dirs are never cached)
+        for dir_ in [TEMP_DIR, f"{TEMP_DIR}/folder"]:
+            utime(dir_, ns=(1_000_000_000, 1_000_000_000))
+
+        snapshot = Snapshot.new()
+        full_tree = Extractor.extract(Path(TEMP_DIR), snapshot=snapshot)
+        assert full_tree == Extractor.extract(Path(TEMP_DIR))
+        assert len(snapshot["dirs"]) == 2
+
+        # Unchanged mtime: listing comes from the snapshot
+        with open(f"{TEMP_DIR}/folder/file2.txt", "w") as _:
+            pass
+        utime(f"{TEMP_DIR}/folder", ns=(1_000_000_000, 1_000_000_000))
+        assert Extractor.extract(Path(TEMP_DIR), snapshot=snapshot) == full_tree
+
+        # Changed mtime: directory gets listed again
+        utime(f"{TEMP_DIR}/folder", ns=(2_000_000_000, 2_000_000_000))
+        tree = Extractor.extract(Path(TEMP_DIR), snapshot=snapshot)
+        assert tree == Extractor.extract(Path(TEMP_DIR))
+        assert ("file", "file2.txt", 2) in tree
+    finally:
+        rmtree(TEMP_DIR)
+
+
+@mark.skipif(platform == "win32", reason="symlinks need privileges on Windows")
+def test_extract_follow_links():
+    try:
+        mkdir(TEMP_DIR)
+    except FileExistsError:
+        pass
+
+    try:
+        mkdir(f"{TEMP_DIR}/folder")
+        with open(f"{TEMP_DIR}/folder/file.txt", "w") as _:
+            pass
+        # Link back to the parent (a cycle)
+        symlink("..", f"{TEMP_DIR}/folder/loop")
+
+        # Not followed by default
+        tree = Extractor.extract(Path(TEMP_DIR))
+        assert ("directory", "loop", 2) not in tree
+
+        # Followed, but never descended twice
+        tree = Extractor.extract(Path(TEMP_DIR), follow_links=True, mark_links=True)
+        assert ("directory", "loop", 2) in tree
+        assert ("comment", "loop/ -> ..", 2) in tree
+        assert len([e for e in tree if e[0] == "directory"]) == 3
+    finally:
+        rmtree(TEMP_DIR)
+
+
+def test_extract_columns():
+    try:
+        mkdir(TEMP_DIR)
+    except FileExistsError:
+        pass
+
+    try:
+        mkdir(f"{TEMP_DIR}/folder")
+        with open(f"{TEMP_DIR}/folder/file.txt", "w") as f:
+            f.write("12345")
+
+        columns = Extractor.extract_columns(Path(TEMP_DIR))
+
+        # Same layout as `extract`
+        assert list(columns) == Extractor.extract(Path(TEMP_DIR))
+        assert columns[2] == ("file", "file.txt", 2)
+
+        # Metadata
+        assert len(columns.sizes) == len(columns) == 3
+        assert columns.sizes[2] == 5
+        assert columns.mtimes[2] == stat(f"{TEMP_DIR}/folder/file.txt").st_mtime_ns
+    finally:
+        rmtree(TEMP_DIR)
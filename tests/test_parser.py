@@ -32,3 +32,89 @@ README.md
     assert parsed_tree[0]["name"] == expected_tree[0]["name"]
     assert parsed_tree[1]["type"] == expected_tree[1]["type"]
     assert Parser._parse_lines(["", "", ""]) == []  # Empty lines
+
+
+def test_parse_string():
+    text = "src/\n    app.py\n// Comment\nREADME.md\n"
+    assert Parser.parse_string(text) == Parser._parse_lines(text.splitlines())
+
+
+def test_open_stream():
+    import gzip
+    from io import BufferedReader, BytesIO, RawIOBase
+    from pytest import raises
+    from maketree.core import tree_binary
+    from maketree.core.parser import ParseError
+
+    text = "src/\n    app.py\n"
+    for data in (text.encode(), gzip.compress(text.encode())):
+        stream = Parser.open_stream(BufferedReader(BytesIO(data)))
+        assert Parser._parse_lines(stream) == Parser.parse_string(text)
+
+    with raises(ParseError):
+        Parser.open_stream(BufferedReader(BytesIO(tree_binary.MAGIC + b"\0" * 8)))
+
+    # A slow pipe, one byte at a time (peek() would only see the first)
+    class Trickle(RawIOBase):
+        def __init__(self, data):
+            self.data = data
+
+        def readable(self):
+            return True
+
+        def readinto(self, buffer):
+            byte, self.data = self.data[:1], self.data[1:]
+            buffer[: len(byte)] = byte
+            return len(byte)
+
+    stream = Parser.open_stream(BufferedReader(Trickle(gzip.compress(text.encode()))))
+    assert Parser._parse_lines(stream) == Parser.parse_string(text)
+
+
+def test_parse_file_formats(tmp_path):
+    import gzip
+    from pytest import raises
+    from maketree.core import tree_binary
+    from maketree.core.parser import ParseError
+
+    text = "src/\n    app.py\nREADME.md\n"
+    (tmp_path / "app.tree").write_text(text)
+    (tmp_path / "app.tree.gz").write_bytes(gzip.compress(text.encode()))
+    for name in ("app.tree", "app.tree.gz"):
+        assert Parser.parse_file(str(tmp_path / name)) == Parser.parse_string(text)
+
+    # An empty file is an empty tree
+    path = tmp_path / "bad.treeb"
+    path.write_bytes(b"")
+    assert Parser.parse_file(str(path)) == []
+
+    # Truncated or corrupt binary trees (only the magic, no records, bad type)
+    header = tree_binary.HEADER.pack(tree_binary.MAGIC, tree_binary.VERSION, 1, 2)
+    bad_record = tree_binary.RECORD.pack(9, 0, 0) + b"a\0"
+    for data in (tree_binary.MAGIC, header, header + bad_record):
+        path.write_bytes(data)
+        with raises(ParseError):
+            Parser.parse_file(str(path))
+
+
+def test_parse_file_stopped_early(tmp_path, monkeypatch):
+    import gc
+    import sys
+
+    # Stopping mid-file (e.g, --max-errors) closes everything quietly
+    unraisable = []
+    monkeypatch.setattr(sys, "unraisablehook", unraisable.append)
+    (tmp_path / "app.tree").write_text("a.txt\nb.txt\nc.txt\n")
+
+    class Stop(Exception):
+        pass
+
+    def visit(item, state):
+        raise Stop()
+
+    try:
+        Parser.parse_file(str(tmp_path / "app.tree"), visit)
+    except Stop:
+        pass
+    gc.collect()
+    assert unraisable == []
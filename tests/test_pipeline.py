@@ -0,0 +1,84 @@
+"""Tests for maketree/core/pipeline.py"""
+
+from pytest import raises
+from maketree.core.pipeline import Pipeline
+from maketree.core.parser import Parser
+from maketree.core.validator import Validator, ValidationError
+from maketree.core.normalizer import Normalizer
+from maketree.console import Console
+from maketree.utils import rebase_paths
+
+console = Console(verbose=False, no_color=True)
+
+
+def test_run_lines():
+    src = """
+src/
+    file.txt
+    file.json
+    lib/
+        file.txt
+src/
+    file.txt
+README.md
+"""
+    tree, paths = Pipeline.run_lines(src.splitlines(), "root", console=console)
+
+    # Same as Parser -> Normalizer
+    parsed_tree = Parser._parse_lines(src.splitlines())
+    assert tree == parsed_tree
+    assert paths == Normalizer.normalize(parsed_tree, "root")
+
+
+def test_run_lines_invalid():
+    src = ["a|b/", "    c?.txt", "ok.txt", "d:e.txt"]
+
+    # Same errors as Validator
+    with raises(ValidationError) as e:
+        Pipeline.run_lines(src, console=console)
+    with raises(ValidationError) as expected:
+        Validator.validate(Parser._parse_lines(src), console=console)
+    assert e.value.errors == expected.value.errors
+
+    # Stops at the cap
+    with raises(ValidationError) as e:
+        Pipeline.run_lines(src, console=console, max_errors=2)
+    assert len(e.value.errors) == 2
+
+
+def test_run_lines_path_limits(monkeypatch):
+    from maketree.core import validator
+
+    monkeypatch.setattr(validator, "get_path_limits", lambda path: (4096, 16))
+    with raises(ValidationError) as e:
+        Pipeline.run_lines(["src/", "    %s.txt" % ("n" * 17)], console=console)
+    assert "names cannot be longer than 16" in str(e.value)
+
+    # Children of an invalid name still count its length
+    from os.path import abspath
+
+    path_max = len(abspath(".")) + 20
+    monkeypatch.setattr(validator, "get_path_limits", lambda path: (path_max, 16))
+    with raises(ValidationError) as e:
+        Pipeline.run_lines(["a|b/", "    %s.txt" % ("n" * 12)], console=console)
+    assert len(e.value.errors) == 2
+    assert "the full path would be" in e.value.errors[1]
+
+
+def test_run_lines_many_destinations(monkeypatch):
+    src = ["src/", "    file.txt", "README.md"]
+
+    # Paths relative to the tree, rebased onto every destination
+    tree, paths = Pipeline.run_lines(src, ["a", "b/c"], console=console)
+    assert paths == {"directories": ["src"], "files": ["src/file.txt", "README.md"]}
+    assert rebase_paths(paths, "b/c") == Normalizer.normalize(tree, "b/c")
+
+    # Checked against the longest destination
+    from os.path import abspath
+    from maketree.core import validator
+
+    path_max = len(abspath("a")) + 20
+    monkeypatch.setattr(validator, "get_path_limits", lambda path: (path_max, 255))
+    Pipeline.run_lines(src, ["a"], console=console)
+    with raises(ValidationError):
+        Pipeline.run_lines(src, ["a", "b" * 64], console=console)
@@ -0,0 +1,115 @@
+"""Tests for maketree/core/plan.py"""
+
+import os
+import shutil
+from pytest import raises
+from maketree.core.plan import Plan
+from maketree.core.parser import ParseError
+from maketree.core.validator import ValidationError
+from maketree.console import Console
+
+TEMP_DIR = "temp"
+console = Console(verbose=False, no_color=True)
+
+
+def test_compile_load():
+    os.mkdir(TEMP_DIR)
+    try:
+        src = os.path.join(TEMP_DIR, "app.tree")
+        plan = os.path.join(TEMP_DIR, "app.plan")
+        with open(src, "w") as f:
+            f.write(
+                "src/\n    lib/\n        x.py\n    app.py\nsrc/\n    app.py\nREADME.md\n"
+            )
+
+        assert Plan.compile(src, plan, console=console) == 5
+        paths, lengths = Plan.load(plan)
+        assert paths == {
+            "directories": ["src", os.path.join("src", "lib")],
+            "files": [
+                os.path.join("src", "lib", "x.py"),
+                os.path.join("src", "app.py"),
+                "README.md",
+            ],
+        }
+        assert lengths == (len("src/lib/x.py"), len("README.md"))
+
+        # Directories first, then files
+        assert Plan.to_tree(paths) == [
+            {
+                "type": "directory",
+                "name": "src",
+                "children": [
+                    {
+                        "type": "directory",
+                        "name": "lib",
+                        "children": [{"type": "file", "name": "x.py"}],
+                    },
+                    {"type": "file", "name": "app.py"},
+                ],
+            },
+            {"type": "file", "name": "README.md"},
+        ]
+    finally:
+        shutil.rmtree(TEMP_DIR)
+
+
+def test_compile_invalid():
+    os.mkdir(TEMP_DIR)
+    try:
+        src = os.path.join(TEMP_DIR, "bad.tree")
+        with open(src, "w") as f:
+            f.write("a|b.txt\n")
+
+        with raises(ValidationError):
+            Plan.compile(src, os.path.join(TEMP_DIR, "bad.plan"), console=console)
+        assert not os.path.exists(os.path.join(TEMP_DIR, "bad.plan"))
+    finally:
+        shutil.rmtree(TEMP_DIR)
+
+
+def test_load_invalid():
+    os.mkdir(TEMP_DIR)
+    try:
+        plan = os.path.join(TEMP_DIR, "bad.plan")
+        for text, message in [
+            ("D\tsrc\n", "not a valid plan"),
+            ("maketree-plan\t9\t3\t3\nD\tsrc\n", "version 9 plan"),
+            ("maketree-plan\t1\t3\t3\nD\tsrc\nX\tsrc\n", "corrupt at line 3"),
+            ("maketree-plan\t1\tx\t3\nD\tsrc\n", "not a valid plan"),
+            ("maketree-plan\t1\t9\t3\nD\t../escaped\n", "unsafe path at line 2"),
+            ("maketree-plan\t1\t9\t3\nF\t/abs/path\n", "unsafe path at line 2"),
+            ("maketree-plan\t1\t9\t3\nF\tC:/file\n", "unsafe path at line 2"),
+            ("maketree-plan\t1\t9\t3\nF\tsrc//a\n", "unsafe path at line 2"),
+        ]:
+            with open(plan, "w") as f:
+                f.write(text)
+            with raises(ParseError) as e:
+                Plan.load(plan)
+            assert message in str(e.value)
+    finally:
+        shutil.rmtree(TEMP_DIR)
+
+
+def test_check(monkeypatch):
+    from maketree.core import validator
+
+    monkeypatch.setattr(validator, "get_path_limits", lambda path: (4096, 16))
+    assert Plan.check((100, 16), ".") is True
+    assert "names cannot be longer than 16" in Plan.check((100, 17), ".")
+    assert "the full path would be" in Plan.check((4096, 10), ".")
+
+
+def test_compile_any_cwd(tmp_path, monkeypatch):
+    from maketree.core import validator
+
+    # Names may hold line breaks other than "\n"
+    src, plan = tmp_path / "app.tree", tmp_path / "app.plan"
+    src.write_text("a\u2028b.txt\nc\x0cd.txt\ne.txt\n", encoding="utf-8")
+
+    # Lengths are only checked against the real destination, later
+    monkeypatch.setattr(validator, "get_path_limits", lambda path: (8, 4))
+    assert Plan.compile(str(src), str(plan), console=console) == 3
+    paths, lengths = Plan.load(str(plan))
+    assert paths["files"] == ["a\u2028b.txt", "c\x0cd.txt", "e.txt"]
+    assert Plan.check(lengths, str(tmp_path)) is not True
@@ -0,0 +1,55 @@
+"""Tests for maketree/profiler.py"""
+
+import os
+import shutil
+from io import StringIO
+from maketree.profiler import Profiler
+
+TEMP_DIR = "temp"
+
+
+def test_report():
+    profiler = Profiler()
+    with profiler.phase("pipeline"):
+        pass
+    with profiler.phase("build"):
+        pass
+    with profiler.phase("pipeline"):  # Adds up
+        pass
+    profiler.entries("pipeline", 100)
+    profiler.count("mkdir", 10)
+    profiler.add_operations({"mkdir": 5, "open": 20})
+    profiler.stop()
+
+    report = profiler.report()
+    assert [phase["phase"] for phase in report["phases"]] == ["pipeline", "build"]
+    assert report["phases"][0]["entries"] == 100
+    assert report["phases"][1]["entries"] is None
+    assert report["operations"] == {"mkdir": 15, "open": 20}
+    assert report["total_seconds"] >= sum(p["seconds"] for p in report["phases"])
+
+    stream = StringIO()
+    profiler.print_report(stream)
+    output = stream.getvalue()
+    assert "pipeline" in output and "100 entries" in output
+    assert "mkdir" in output and "15" in output
+
+
+def test_check_output():
+    os.mkdir(TEMP_DIR)
+    try:
+        report = os.path.join(TEMP_DIR, "report.json")
+        assert Profiler.check_output(report) is True  # Missing
+
+        with open(report, "w") as f:
+            f.write('{"phases": [], "operations": {}}')
+        assert Profiler.check_output(report) is True  # An older report
+        assert Profiler.check_output(report, "stats") is not True
+
+        other = os.path.join(TEMP_DIR, "app.tree")
+        with open(other, "w") as f:
+            f.write("src/\n")
+        assert Profiler.check_output(other) is not True
+        assert Profiler.check_output(TEMP_DIR) is not True
+    finally:
+        shutil.rmtree(TEMP_DIR)
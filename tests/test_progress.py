@@ -0,0 +1,51 @@
+"""Tests for maketree/progress.py"""
+
+from io import StringIO
+from time import sleep
+from maketree.progress import Progress, format_seconds
+
+
+def test_progress():
+    stream = StringIO()  # Not a TTY, prints lines
+    with Progress("Building", total=4, stream=stream, interval=0.01) as progress:
+        progress.update("src")
+        progress.update("src/a.txt", count=2)
+        sleep(0.05)
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) >= 2  # Periodic & final lines
+    assert lines[-1].startswith("[progress] Building: 3/4 (75%) | ")
+    assert lines[-1].endswith(" | src/a.txt")
+
+
+def test_progress_track():
+    stream = StringIO()
+    progress = Progress("Extracting", stream=stream, interval=60).start()
+    entries = [("directory", "src", 0), ("file", "a.txt", 1)]
+    tracked = progress.track(entries, current=lambda entry: entry[1])
+    assert list(tracked) == entries
+    progress.stop()
+
+    assert progress.count == 2
+    assert stream.getvalue().startswith("[progress] Extracting: 2 entries | ")
+
+
+def test_progress_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    progress = Progress("Building", total=40_000, stream=StringIO())
+
+    def work(_):
+        for _ in range(10_000):
+            progress.update()
+
+    # Every update counted, none lost between threads
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(work, range(4)))
+    assert progress.count == 40_000
+
+
+def test_format_seconds():
+    assert format_seconds(5) == "00:05"
+    assert format_seconds(125.7) == "02:05"
+    assert format_seconds(3725) == "1:02:05"
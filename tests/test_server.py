@@ -0,0 +1,128 @@
+"""Tests for maketree/server.py & maketree/client.py"""
+
+import os
+import threading
+from sys import platform
+from pytest import mark, raises
+from maketree import server
+from maketree import client
+from maketree.client import request
+from maketree.core.templates import TemplateCache
+
+
+def test_execute(tmp_path, monkeypatch):
+    # execute changes the cwd & keeps templates in a global, both restored after
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(server, "_templates", None)
+    (tmp_path / "app.tree").write_text("src/\n    a.txt\nbad|name.txt\n")
+
+    # Same output as the CLI (stdout & stderr captured)
+    status, stdout, stderr = server.execute(
+        ["app.tree", "out", "-cd", "-nC", "-nc"], str(tmp_path)
+    )
+    assert status == 1
+    assert "Error: at line 3" in stdout
+    assert server._templates.misses == 1
+
+    # Parsed template is reused
+    server.execute(["app.tree", "-g"], str(tmp_path))
+    assert server._templates.hits == 1
+
+    # Trees streamed to stdout (bytes) too
+    (tmp_path / "dir" / "sub").mkdir(parents=True)
+    status, stdout, stderr = server.execute(["-et", "dir", "-out", "-"], str(tmp_path))
+    assert status == 0, stderr
+    assert stdout.split() == ["dir/", "sub/"]
+
+
+@mark.skipif(platform == "win32", reason="needs Unix sockets")
+def test_serve(tmp_path):
+    socket_path = str(tmp_path / "maketree.sock")
+    instance = server.Server(socket_path, jobs=1)
+    thread = threading.Thread(target=instance.serve_forever, daemon=True)
+    thread.start()
+    try:
+        (tmp_path / "app.tree").write_text("src/\n    a.txt\nREADME.md\n")
+
+        cwd = str(tmp_path)
+        status, stdout, _ = request(
+            ["app.tree", "out", "-cd", "-nC", "-nc"], cwd, socket_path
+        )
+        assert status == 0
+        assert "1 directories and 2 files have been created." in stdout
+        assert (tmp_path / "out" / "src" / "a.txt").is_file()
+
+        # Existing files, same exit status as the CLI
+        status, stdout, _ = request(["app.tree", "out", "-nC"], cwd, socket_path)
+        assert status == 1
+
+        # No nested servers
+        assert request(["serve"], cwd, socket_path)[0] == 2
+    finally:
+        instance.shutdown()
+        instance.server_close()
+
+    assert not os.path.exists(socket_path)
+
+
+def test_template_cache(tmp_path):
+    path = tmp_path / "app.tree"
+    path.write_text("src/\n")
+
+    templates = TemplateCache()
+    tree = templates.get(str(path))
+    assert templates.get(str(path)) is tree
+
+    # Changed file is parsed again
+    path.write_text("src/\n    a.txt\n")
+    assert templates.get(str(path))[0]["children"][0]["name"] == "a.txt"
+    assert (templates.hits, templates.misses) == (1, 2)
+
+
+def test_execute_watch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(server, "_templates", None)
+    status, _, stderr = server.execute(["app.tree", "--watch"], str(tmp_path))
+    assert status == 2
+    assert "--watch is not allowed" in stderr
+
+
+def test_execute_not_allowed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(server, "_templates", None)
+    (tmp_path / "dir").mkdir()
+
+    # Nothing to read from stdin, nor a way to send back bytes
+    for argv, message in [
+        (["-", "out", "-cd", "-nC"], "stdin"),
+        (["-et", "dir", "-out", "-", "-z"], "binary tree"),
+        (["-et", "dir", "-out", "-", "-b"], "binary tree"),
+    ]:
+        status, stdout, stderr = server.execute(argv, str(tmp_path))
+        assert status == 2
+        assert message in stderr
+        assert stdout == ""
+    assert not (tmp_path / "out").exists()
+
+
+@mark.skipif(platform == "win32", reason="needs Unix sockets")
+def test_socket_owner(tmp_path, monkeypatch):
+    socket_path = tmp_path / "run" / "maketree.sock"
+    server.prepare_socket_dir(str(socket_path))
+    assert (tmp_path / "run").stat().st_mode & 0o777 == 0o700
+
+    # The default directory in /tmp, made by someone else or open to everyone
+    monkeypatch.setattr(client, "private_dir", lambda: str(tmp_path / "run"))
+    monkeypatch.setattr(server, "private_dir", lambda: str(tmp_path / "run"))
+    (tmp_path / "run").chmod(0o755)
+    with raises(PermissionError):
+        server.prepare_socket_dir(str(socket_path))
+    (tmp_path / "run").chmod(0o700)
+    server.prepare_socket_dir(str(socket_path))
+
+    socket_path.write_text("")
+    monkeypatch.setattr(os, "getuid", lambda: os.stat(str(socket_path)).st_uid + 1)
+    with raises(PermissionError):
+        request(["--help"], str(tmp_path), str(socket_path))
+    with raises(PermissionError):
+        server.prepare_socket_dir(str(socket_path))
@@ -1,7 +1,7 @@
 """Tests for maketree/terminal_colors.py"""
 
 from pytest import raises
-from maketree.terminal_colors import colored, get_color
+from maketree.terminal_colors import colored, get_color, compile_style, RESET
 
 
 def test_get_color():
@@ -31,3 +31,33 @@ def test_colored():
 
     with raises(AssertionError):
         assert colored("") == "\033[0m"
+
+
+def test_compile_style():
+    assert compile_style() == ""
+    assert compile_style("blue") == "\x1b[34m"
+
+    # Same as colored (attributes outermost, in reverse)
+    style = compile_style("blue", "dark_grey", ("bold", "italic"))
+    assert style + "text" + RESET == colored(
+        "text", "blue", "dark_grey", ["bold", "italic"]
+    )
+    assert style == "\x1b[3m\x1b[1m\x1b[100m\x1b[34m"
+
+    # Cached
+    assert compile_style("blue", "dark_grey", ("bold", "italic")) is style
+
+
+def test_colored_cached_style():
+    # Styles are compiled once, then every call reuses them
+    colored("src/", "light_green", attrs=["italic", "bold"])
+    before = compile_style.cache_info()
+    for _ in range(100):
+        text = colored("src/", "light_green", attrs=["italic", "bold"])
+    after = compile_style.cache_info()
+
+    assert after.misses == before.misses
+    assert after.hits == before.hits + 100
+    assert (
+        text == compile_style("light_green", None, ("italic", "bold")) + "src/" + RESET
+    )
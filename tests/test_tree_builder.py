@@ -44,3 +44,21 @@ README.md
 
     # Remove temp directory
     shutil.rmtree(TEMP_DIR)
+
+
+def test_build_operations():
+    console = Console(False, True)
+    parsed_tree = Parser._parse_lines(["src/", "    a.py", "    b.py", "lib/"])
+    paths = Normalizer.normalize(parsed_tree, rootpath=TEMP_DIR)
+    mkdir(TEMP_DIR)
+    try:
+        operations = {}
+        TreeBuilder.build(paths, console=console, operations=operations)
+        assert operations == {"mkdir": 2, "open": 2}
+
+        # Overwriting opens every existing file twice
+        operations = {}
+        TreeBuilder.build(paths, console, overwrite=True, operations=operations)
+        assert operations == {"mkdir": 2, "open": 4}
+    finally:
+        shutil.rmtree(TEMP_DIR)
@@ -1,9 +1,13 @@
 """Tests for maketree/core/tree_writer.py"""
 
+from io import BytesIO
+from gzip import decompress
 from os import mkdir
 from shutil import rmtree
 from maketree.core.tree_writer import TreeWriter
+from maketree.core import tree_binary
 from maketree.core.parser import Parser
+from maketree.core.extractor import TreeColumns
 from maketree.console import Console
 
 # Create temporary files/folders inside this and delete aftwards
@@ -39,3 +43,135 @@ def test_write():
     assert parsed_tree[1]["name"] == "README.md"
 
     rmtree(TEMP_DIR)
+
+
+def test_write_metadata():
+    try:
+        mkdir(TEMP_DIR)
+    except FileExistsError:
+        pass
+
+    columns = TreeColumns()
+    columns.append(("directory", "src", 0))
+    columns.append(("directory", "lib", 1))
+    columns.append(("file", "main.py", 2))
+    columns.append(("file", "README.md", 1))
+
+    try:
+        filename = TreeWriter.write_metadata(columns, console=console, save_to=TEMP_DIR)
+        with open(filename, encoding="utf-8") as f:
+            rows = [line.split("\t")[:2] for line in f.read().splitlines()]
+
+        assert rows == [
+            ["path", "type"],
+            ["./", "directory"],
+            ["lib/", "directory"],
+            ["lib/main.py", "file"],
+            ["README.md", "file"],
+        ]
+    finally:
+        rmtree(TEMP_DIR)
+
+
+def test_write_metadata_escapes():
+    from io import StringIO
+
+    columns = TreeColumns()
+    columns.append(("directory", "root", 0))
+    columns.append(("directory", "a\tb", 1))
+    columns.append(("file", "c\nd\\e.txt", 2))
+
+    file = StringIO()
+    TreeWriter.write_metadata_lines(columns, file)
+    rows = [line.split("\t") for line in file.getvalue().splitlines()]
+
+    # One row per entry, 5 columns each
+    assert [len(row) for row in rows] == [5, 5, 5, 5]
+    assert rows[2][0] == "a\\tb/"
+    assert rows[3][0] == "a\\tb/c\\nd\\\\e.txt"
+
+
+def test_write_compressed():
+    try:
+        mkdir(TEMP_DIR)
+    except FileExistsError:
+        pass
+
+    sample_tree = [
+        ("directory", "src", 0),
+        ("file", "file.html", 1),
+    ]
+
+    try:
+        filename = TreeWriter.write(
+            sample_tree, console=console, save_to=TEMP_DIR, compress=True
+        )
+        assert filename.endswith("src.tree.gz")
+
+        # Doesn't overwrite, increments
+        filename_1 = TreeWriter.write(
+            sample_tree, console=console, save_to=TEMP_DIR, compress=True
+        )
+        assert filename_1.endswith("src_1.tree.gz")
+
+        # Parsed transparently
+        parsed_tree = Parser.parse_file(filename)
+        assert parsed_tree[0]["name"] == "src"
+        assert parsed_tree[0]["children"][0]["name"] == "file.html"
+    finally:
+        rmtree(TEMP_DIR)
+
+
+def test_write_binary_and_convert():
+    try:
+        mkdir(TEMP_DIR)
+    except FileExistsError:
+        pass
+
+    sample_tree = [
+        ("directory", "src", 0),
+        ("comment", "not written", 1),
+        ("file", "fïle.html", 1),
+        ("file", "README.md", 0),
+    ]
+
+    try:
+        filename = TreeWriter.write(
+            sample_tree, console=console, save_to=TEMP_DIR, binary=True
+        )
+        assert filename.endswith("src.treeb")
+        with open(filename, "rb") as f:
+            assert f.read(len(tree_binary.MAGIC)) == tree_binary.MAGIC
+
+        # Same entries as the text format
+        text_filename = TreeWriter.write(sample_tree, console=console, save_to=TEMP_DIR)
+        assert Parser.load_entries(filename) == Parser.load_entries(text_filename)
+        assert Parser.parse_file(filename)[0]["children"][0]["name"] == "fïle.html"
+
+        # Binary -> Text -> Binary
+        converted = "%s/converted.tree" % TEMP_DIR
+        assert TreeWriter.convert(filename, converted) == 3
+        assert TreeWriter.convert(converted, "%s/back.treeb" % TEMP_DIR) == 3
+        assert Parser.load_entries("%s/back.treeb" % TEMP_DIR) == [
+            ("directory", "src", 0),
+            ("file", "fïle.html", 1),
+            ("file", "README.md", 0),
+        ]
+    finally:
+        rmtree(TEMP_DIR)
+
+
+def test_write_stream():
+    sample_tree = [
+        ("directory", "src", 0),
+        ("file", "file.html", 1),
+    ]
+
+    stream = BytesIO()
+    TreeWriter.write_stream(sample_tree, stream)
+    assert stream.getvalue().decode("utf-8").splitlines() == ["src/", "    file.html"]
+
+    # Compressed
+    stream = BytesIO()
+    TreeWriter.write_stream(sample_tree, stream, compress=True)
+    assert decompress(stream.getvalue()).decode("utf-8").splitlines()[0] == "src/"
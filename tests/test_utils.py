@@ -16,7 +16,11 @@ from maketree.utils import (
     now,
     create_dir,
     get_os_name,
+    render_tree,
+    count_entries,
 )
+from maketree.core.parser import Parser
+from maketree.console import Console
 
 
 # Create temporary files/folders inside this and delete aftwards
@@ -49,7 +53,18 @@ def test_get_non_existing_paths():
         shutil.rmtree(TEMP_DIR)
 
 
-def test_get_existing_paths():
+def test_unique_paths(tmp_path):
+    from maketree.utils import unique_paths
+
+    (tmp_path / "a").mkdir()
+    a, b = str(tmp_path / "a"), str(tmp_path / "b")
+    assert unique_paths([a, b, a + os.sep, os.path.join(b, "..", "a")]) == [a, b]
+
+    # A link to a destination is the same destination
+    if platform != "win32":
+        os.symlink(a, str(tmp_path / "link"))
+        assert unique_paths([str(tmp_path / "link"), a]) == [str(tmp_path / "link")]
+
     try:
         os.mkdir(TEMP_DIR)
     except FileExistsError:
@@ -247,6 +262,11 @@ def test_incremented_filename():
             pass
 
         assert incremented_filename(filepath) == expected_filepath
+
+        # Skips the taken numbers too
+        with open(expected_filepath, "w") as f:
+            pass
+        assert incremented_filename(filepath) == os.path.join(TEMP_DIR, "file_2.txt")
     finally:
         # Remove TEMP dir
         shutil.rmtree(TEMP_DIR)
@@ -281,3 +301,36 @@ def test_get_os_name():
         os_name = "Linux"
 
     assert get_os_name() == os_name
+
+
+def test_render_tree():
+    console = Console(verbose=False, no_color=True)
+    tree = Parser._parse_lines(
+        ["src/", "    a.js", "    lib/", "        x.py", "    b.js", "README.md"]
+    )
+    assert count_entries(tree) == 6
+
+    assert render_tree(tree, console, root="app") == "\n".join(
+        [
+            "app/",
+            "├─── src/",
+            "│   ├─── a.js",
+            "│   ├─── lib/",
+            "│   │   └─── x.py",
+            "│   └─── b.js",
+            "└─── README.md",
+        ]
+    )
+
+    # Collapsed levels & directories
+    assert render_tree(tree, console, max_depth=1) == "\n".join(
+        [".", "├─── src/", "│   └─── … 4 more entries", "└─── README.md"]
+    )
+    assert render_tree(tree, console, max_children=1).splitlines()[-2:] == [
+        "│   └─── … 3 more entries",
+        "└─── … 1 more entry",
+    ]
+
+    # Deeper than the recursion limit
+    deep_tree = Parser._parse_lines(["%sdir/" % ("    " * i) for i in range(2000)])
+    assert len(render_tree(deep_tree, console).splitlines()) == 2001
@@ -1,7 +1,8 @@
 """Tests for maketree/core/validator.py"""
 
-from sys import platform
+from sys import platform, getrecursionlimit
 from pytest import raises
+from maketree.core import validator
 from maketree.core.validator import Validator, ValidationError
 from maketree.core.parser import Parser
 from maketree.console import Console
@@ -54,3 +55,110 @@ def test_validate():
                 Parser()._parse_lines(["fold/er/", "folder\\2/"]),
                 console=console,
             )
+
+
+def test_validate_all_errors():
+    console = Console(verbose=False, no_color=True)
+    tree = Parser()._parse_lines(["a|b/", "    c?.txt", "    ok.txt", "d:e.txt"])
+
+    # Reports every error, in line order
+    with raises(ValidationError) as e:
+        Validator.validate(tree, console=console)
+    assert len(e.value.errors) == 3
+    assert e.value.errors[0].startswith("Error: at line 1")
+    assert e.value.errors[2].startswith("Error: at line 4")
+    assert e.value.details[0] == {
+        "line": 1,
+        "type": "directory",
+        "name": "a|b",
+        "reason": 'directory names cannot contain these characters <:"/\\|?*\\0\\t\\r\\n>',
+    }
+
+    # Stops at the cap
+    with raises(ValidationError) as e:
+        Validator.validate(tree, console=console, max_errors=1)
+    assert len(e.value.errors) == 1
+
+    # Deeper than the recursion limit
+    deep_tree = Parser()._parse_lines(
+        ["%sdir/" % ("    " * i) for i in range(getrecursionlimit() + 100)]
+    )
+    Validator.validate(deep_tree, console=console)
+
+
+def test_validate_parallel(monkeypatch):
+    console = Console(verbose=False, no_color=True)
+    tree = Parser()._parse_lines(["src/", "    a|b.txt", "    ok.txt", "c?.txt"])
+
+    # Force the process pool, even for a tiny tree (or a single CPU)
+    monkeypatch.setattr(validator, "PARALLEL_MIN_NAMES", 0)
+    monkeypatch.setattr(validator.os, "cpu_count", lambda: 2)
+    with raises(ValidationError) as e:
+        Validator.validate(tree, console=console, jobs=2)
+
+    # Same errors as serial validation
+    with raises(ValidationError) as serial:
+        Validator.validate(tree, console=console)
+    assert e.value.errors == serial.value.errors
+
+    # A worker died: validated serially instead
+    import concurrent.futures
+    from concurrent.futures.process import BrokenProcessPool
+
+    class BrokenPool(concurrent.futures.ThreadPoolExecutor):
+        def map(self, *args, **kwargs):
+            raise BrokenProcessPool("killed")
+
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", BrokenPool)
+    with raises(ValidationError) as broken:
+        Validator.validate(tree, console=console, jobs=2)
+    assert broken.value.errors == serial.value.errors
+
+
+def test_validate_parallel_small(monkeypatch):
+    # Small trees are validated serially, without flattening them first
+    monkeypatch.setattr(validator.os, "cpu_count", lambda: 2)
+    monkeypatch.setattr(Validator, "flatten", None)
+    tree = Parser()._parse_lines(["src/", "    ok.txt"])
+    Validator.validate(tree, jobs=2)
+    assert Validator.count(tree) == 2
+    assert Validator.count(tree, limit=1) == 1
+
+
+def test_validate_path_limits(monkeypatch):
+    console = Console(verbose=False, no_color=True)
+    root_length = validator.PathLimits(".").root_length
+    path_max = root_length + 30
+    monkeypatch.setattr(validator, "get_path_limits", lambda path: (path_max, 16))
+
+    # root + "/" + 14 + "/" + 14 reaches the limit
+    tree = Parser()._parse_lines(
+        ["src/", "    %s.txt" % ("n" * 17), "%s/" % ("d" * 14), "    %s/" % ("d" * 14)]
+    )
+
+    with raises(ValidationError) as e:
+        Validator.validate(tree, console=console, root=".")
+    assert len(e.value.errors) == 2
+    assert "names cannot be longer than 16" in e.value.errors[0]
+    assert "the full path would be %d" % path_max in e.value.errors[1]
+
+    # Not checked without a root
+    Validator.validate(tree, console=console)
+
+    # Children of an invalid name still count its length
+    tree = Parser()._parse_lines(["%s|/" % ("d" * 14), "    %s/" % ("d" * 14)])
+    with raises(ValidationError) as e:
+        Validator.validate(tree, console=console, root=".")
+    assert len(e.value.errors) == 2
+    assert "the full path would be" in e.value.errors[1]
+
+
+def test_validate_console_not_kept():
+    tree = Parser._parse_lines(["bad|name.txt"])
+
+    # Errors are colored by the console given, and only for that call
+    with raises(ValidationError) as e:
+        Validator.validate(tree, console=Console(verbose=False, no_color=False))
+    assert "\033[" in str(e.value)
+
+    assert "\033[" not in Validator.format_error(tree[0], "reason")
@@ -0,0 +1,85 @@
+"""Tests for maketree/watch.py"""
+
+import os
+import shutil
+from io import StringIO
+from maketree.watch import Watch
+from maketree.console import Console
+
+TEMP_DIR = "temp"
+
+
+def test_diff():
+    old = {"directories": ["src", "lib"], "files": ["src/a.py", "lib/b.py"]}
+    new = {"directories": ["src", "docs"], "files": ["src/a.py", "docs/c.md"]}
+
+    added, removed = Watch.diff(old, new)
+    assert added == {"directories": ["docs"], "files": ["docs/c.md"]}
+    assert removed == {"directories": ["lib"], "files": ["lib/b.py"]}
+
+
+def test_load_apply():
+    os.mkdir(TEMP_DIR)
+    try:
+        src = os.path.join(TEMP_DIR, "app.tree")
+        dst = os.path.join(TEMP_DIR, "out")
+        stream = StringIO()
+        console = Console(False, True, stream=stream)
+
+        with open(src, "w") as f:
+            f.write("src/\n    a.py\n    b.py\nlib/\n    c.py\n")
+        old = Watch.load(src, [dst], console)
+        os.mkdir(dst)
+        Watch.apply([(dst, {"directories": [], "files": []})], old, console)
+        assert os.path.isfile(os.path.join(dst, "lib", "c.py"))
+
+        # a.py has content now, so it's kept
+        with open(os.path.join(dst, "src", "a.py"), "w") as f:
+            f.write("print()\n")
+        with open(src, "w") as f:
+            f.write("src/\n    d.py\n")
+        new = Watch.load(src, [dst], console)
+        Watch.apply(old, new, console, prune=True)
+
+        assert os.path.isfile(os.path.join(dst, "src", "d.py"))
+        assert os.path.isfile(os.path.join(dst, "src", "a.py"))
+        assert not os.path.exists(os.path.join(dst, "src", "b.py"))
+        assert not os.path.exists(os.path.join(dst, "lib"))
+        assert "1 directories and 2 files removed" in stream.getvalue()
+
+        # Errors are reported, not exited on
+        with open(src, "w") as f:
+            f.write("a|b.txt\n")
+        assert Watch.load(src, [dst], console) is None
+        assert "Error: found 1 invalid entries." in stream.getvalue()
+    finally:
+        shutil.rmtree(TEMP_DIR)
+
+
+def test_apply_type_change():
+    os.mkdir(TEMP_DIR)
+    try:
+        stream = StringIO()
+        console = Console(False, True, stream=stream)
+        dst = os.path.join(TEMP_DIR, "out")
+        foo, bar = os.path.join(dst, "foo"), os.path.join(dst, "foo", "bar.txt")
+        old = [(dst, {"directories": [dst], "files": [foo]})]
+        Watch.apply([(dst, {"directories": [], "files": []})], old, console)
+        assert os.path.isfile(foo)
+
+        # `foo` into `foo/`, replaced even without prune
+        new = [(dst, {"directories": [dst, foo], "files": [bar]})]
+        Watch.apply(old, new, console)
+        assert os.path.isfile(bar)
+
+        # Back into a file: foo/ isn't empty, kept & reported, not exited on
+        Watch.apply(new, old, console)
+        assert os.path.isfile(bar)
+        assert "Keeping '%s', it's not empty" % foo in stream.getvalue()
+
+        # Entries that can't be created are reported too
+        blocked = [(dst, {"directories": [], "files": [os.path.join(bar, "x")]})]
+        Watch.apply(new, blocked, console)
+        assert "Error: cannot create" in stream.getvalue()
+    finally:
+        shutil.rmtree(TEMP_DIR)